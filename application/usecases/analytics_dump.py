@@ -0,0 +1,274 @@
+# application/usecases/analytics_dump.py
+
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from application.usecases.archive import OPENING_OPERATION_PREFIX
+from config.settings import SHEETS_READ_CHUNK_ROWS
+from domain.models.expenses import Operation, OperationRow
+from domain.repositories import IOperationArchive, IOperationRepository, IOperationRowRepository
+
+
+# Имя файла с отметками (watermark) внутри каталога выгрузки
+WATERMARK_FILE = "_watermark.json"
+
+# Наборы данных выгрузки = листы таблицы
+DATASET_OPERATIONS = "operations"
+DATASET_OPERATION_ROWS = "operationsRows"
+
+
+def _operation_columns(ops: list[Operation]) -> dict[str, list]:
+    return {
+        "date": [op.date for op in ops],
+        "id": [op.id for op in ops],
+        "operation_type": [op.operation_type for op in ops],
+        "person_id": [op.person_id for op in ops],
+        "is_expense": [op.is_expense for op in ops],
+        "category": [op.category for op in ops],
+        "comment": [op.comment for op in ops],
+        "amount_cents": [op.amount_cents for op in ops],
+        "active": [op.active for op in ops],
+    }
+
+
+def _row_columns(rows: list[OperationRow]) -> dict[str, list]:
+    return {
+        "date": [r.date for r in rows],
+        "operation_id": [r.operation_id for r in rows],
+        "person_id": [r.person_id for r in rows],
+        "category": [r.category for r in rows],
+        "row_type": [r.row_type for r in rows],
+        "amount_cents": [r.amount_cents for r in rows],
+        "active": [r.active for r in rows],
+    }
+
+
+@dataclass
+class DumpReport:
+    """
+    Итог выгрузки: сколько записей и файлов добавлено по каждому набору.
+    """
+
+    records: dict[str, int] = field(default_factory=dict)
+    files: dict[str, int] = field(default_factory=dict)
+    watermarks: dict[str, int] = field(default_factory=dict)
+    # Наборы, выгруженные заново из-за архивации листов
+    rebuilt: list[str] = field(default_factory=list)
+
+
+@dataclass
+class AnalyticsDumpService:
+    """
+    Снимок листов operations и operationsRows в Parquet для офлайн-анализа.
+
+    Раскладка каталога (hive-разбиение, читается pandas/pyarrow как один набор):
+
+        <out_dir>/operations/group_id=<G>/year=<YYYY>/month=<MM>/part-<с>-<по>.parquet
+        <out_dir>/operationsRows/group_id=<G>/year=<YYYY>/month=<MM>/part-<с>-<по>.parquet
+
+    Колонки типизированы: date — timestamp, amount_cents — int64
+    (целые копейки), category / operation_type / row_type — словарные
+    (categorical). group_id, year, month берутся из пути.
+
+    Watermark: в <out_dir>/_watermark.json хранится номер последней
+    выгруженной строки каждого листа. Следующий запуск читает лист только
+    после неё и дописывает новые part-файлы. Правки старых строк
+    (например, отмена операции) так не видны — для этого full=True
+    пересобирает выгрузку с нуля.
+
+    Рядом с номером строки хранится дата архива (archived_through):
+    архивация удаляет строки из листов, номера сдвигаются, и новые строки
+    оказываются ниже старой отметки. Если дата архива изменилась, набор
+    выгружается заново.
+
+    Набор, выгружаемый с нуля, сначала получает операции закрытых
+    периодов из архива (файлы archive-*.parquet), затем строки листа.
+    Строки входящего остатка, которые архивация пишет в operationsRows,
+    не выгружаются: это сводка архивных строк, они уже есть в наборе.
+    """
+
+    operation_repo: IOperationRepository
+    operation_row_repo: IOperationRowRepository
+    # Архив закрытых периодов (None — архива нет, листы не сжимаются)
+    archive: IOperationArchive | None = None
+    chunk_rows: int = SHEETS_READ_CHUNK_ROWS
+
+    def dump(self, out_dir: str, full: bool = False) -> DumpReport:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Для выгрузки в Parquet нужен пакет pyarrow.")
+
+        watermark_path = os.path.join(out_dir, WATERMARK_FILE)
+        if full:
+            for name in (DATASET_OPERATIONS, DATASET_OPERATION_ROWS, WATERMARK_FILE):
+                path = os.path.join(out_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+
+        os.makedirs(out_dir, exist_ok=True)
+        watermarks = self._load_watermarks(watermark_path)
+        archived_through = self._archived_through_iso()
+        report = DumpReport()
+
+        archive = self.archive
+        datasets = [
+            (
+                DATASET_OPERATIONS,
+                self.operation_repo.iter_all,
+                _operation_columns,
+                archive.iter_operations if archive is not None else None,
+            ),
+            (
+                DATASET_OPERATION_ROWS,
+                self.operation_row_repo.iter_all,
+                _row_columns,
+                archive.iter_rows if archive is not None else None,
+            ),
+        ]
+        for name, iter_all, columns, iter_archived in datasets:
+            mark = watermarks.get(name)
+            if mark is not None and mark["archived_through"] != archived_through:
+                # Листы сжали архивацией — номера строк отметки устарели
+                del watermarks[name]
+                self._save_watermarks(watermark_path, watermarks)
+                report.rebuilt.append(name)
+                mark = None
+
+            if mark is None:
+                # Набор выгружается с нуля: part-файлы без отметки
+                # (прежняя выгрузка или прерванный запуск) не нужны
+                dataset_dir = os.path.join(out_dir, name)
+                if os.path.isdir(dataset_dir):
+                    shutil.rmtree(dataset_dir)
+                if archived_through is not None:
+                    self._dump_archived(out_dir, name, iter_archived(), columns, report)
+
+            last_row = mark["row"] if mark is not None else 0
+            start_row = last_row + 1 if last_row else None
+
+            batch: list[tuple[int, Any]] = []
+            for row_no, record in iter_all(start_row):
+                if getattr(record, "operation_id", "").startswith(OPENING_OPERATION_PREFIX):
+                    # Входящий остаток — сводка строк, выгруженных из архива
+                    continue
+                batch.append((row_no, record))
+                if len(batch) >= self.chunk_rows:
+                    self._write_batch(out_dir, name, batch, columns, report)
+                    watermarks[name] = {"row": batch[-1][0], "archived_through": archived_through}
+                    self._save_watermarks(watermark_path, watermarks)
+                    batch = []
+            if batch:
+                self._write_batch(out_dir, name, batch, columns, report)
+                watermarks[name] = {"row": batch[-1][0], "archived_through": archived_through}
+                self._save_watermarks(watermark_path, watermarks)
+
+            report.records.setdefault(name, 0)
+            report.files.setdefault(name, 0)
+
+        report.watermarks = {name: mark["row"] for name, mark in watermarks.items()}
+        return report
+
+    def _archived_through_iso(self) -> Optional[str]:
+        if self.archive is None:
+            return None
+        archived_through = self.archive.archived_through()
+        return archived_through.isoformat() if archived_through else None
+
+    def _dump_archived(
+        self,
+        out_dir: str,
+        dataset: str,
+        records: Iterable[Any],
+        columns: Callable[[list], dict[str, list]],
+        report: DumpReport,
+    ) -> None:
+        """
+        Выгрузить записи архива пакетами по chunk_rows. Номеров строк
+        у них нет — файлы нумеруются по порядку записей в архиве.
+        """
+        batch: list[tuple[int, Any]] = []
+        for seq, record in enumerate(records, start=1):
+            batch.append((seq, record))
+            if len(batch) >= self.chunk_rows:
+                self._write_batch(out_dir, dataset, batch, columns, report, prefix="archive")
+                batch = []
+        if batch:
+            self._write_batch(out_dir, dataset, batch, columns, report, prefix="archive")
+
+    def _write_batch(
+        self,
+        out_dir: str,
+        dataset: str,
+        batch: list[tuple[int, Any]],
+        columns: Callable[[list], dict[str, list]],
+        report: DumpReport,
+        prefix: str = "part",
+    ) -> None:
+        """
+        Разложить пакет записей по разделам (группа, год, месяц)
+        и записать в каждый раздел по одному новому файлу
+        <prefix>-<с>-<по>.parquet.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partitions: dict[tuple[str, int, int], list] = {}
+        for _, record in batch:
+            key = (record.group_id, record.date.year, record.date.month)
+            partitions.setdefault(key, []).append(record)
+
+        # Имя part-файла — диапазон строк листа, поэтому повторная
+        # запись того же пакета (после сбоя) перезапишет тот же файл
+        part_name = f"{prefix}-{batch[0][0]:08d}-{batch[-1][0]:08d}.parquet"
+
+        for (group_id, year, month), records in partitions.items():
+            data = columns(records)
+            arrays = {}
+            for name, values in data.items():
+                if name == "date":
+                    arrays[name] = pa.array(values, type=pa.timestamp("s"))
+                elif name == "amount_cents":
+                    arrays[name] = pa.array(values, type=pa.int64())
+                elif name in ("category", "operation_type", "row_type"):
+                    arrays[name] = pa.array(values, type=pa.string()).dictionary_encode()
+                elif name in ("is_expense", "active"):
+                    arrays[name] = pa.array(values, type=pa.bool_())
+                else:
+                    arrays[name] = pa.array(values, type=pa.string())
+
+            part_dir = os.path.join(
+                out_dir, dataset, f"group_id={group_id}", f"year={year}", f"month={month:02d}"
+            )
+            os.makedirs(part_dir, exist_ok=True)
+            pq.write_table(pa.table(arrays), os.path.join(part_dir, part_name))
+
+            report.records[dataset] = report.records.get(dataset, 0) + len(records)
+            report.files[dataset] = report.files.get(dataset, 0) + 1
+
+    def _load_watermarks(self, path: str) -> dict[str, dict]:
+        """
+        {набор -> {"row": номер строки, "archived_through": дата архива}}.
+        В старом формате (только номер строки) дата архива неизвестна —
+        такая отметка годится, только пока архива нет.
+        """
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            name: mark if isinstance(mark, dict) else {"row": int(mark), "archived_through": None}
+            for name, mark in data.items()
+        }
+
+    def _save_watermarks(self, path: str, watermarks: dict[str, dict]) -> None:
+        # Атомарная подмена, как у файла состояния импорта
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f)
+        os.replace(tmp_path, path)
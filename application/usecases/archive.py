@@ -0,0 +1,126 @@
+# application/usecases/archive.py
+
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterator, Tuple
+
+from domain.models.expenses import Operation, OperationRow
+from domain.repositories import (
+    IOperationArchive,
+    IOperationRepository,
+    IOperationRowRepository,
+)
+
+
+# Категория и префикс id у строк входящего остатка в operationsRows
+OPENING_CATEGORY = "opening"
+OPENING_OPERATION_PREFIX = "opening:"
+
+
+@dataclass
+class ArchiveReport:
+    """
+    Итог архивации: сколько строк перенесено и сколько строк остатка записано.
+    """
+
+    archived_through: date
+    operations_archived: int = 0
+    rows_archived: int = 0
+    opening_rows: int = 0
+
+
+@dataclass
+class ArchiveService:
+    """
+    Архивация закрытых периодов.
+
+    Все операции и строки операций с датой по cutoff включительно
+    переносятся в архив и удаляются из листов. Вместо них в operationsRows
+    записывается по одной строке входящего остатка на (группу, участника),
+    поэтому баланс группы не меняется, а лист перестаёт расти бесконечно.
+
+    Строки остатка датированы cutoff, так что при следующей архивации
+    они сами попадут в архив и войдут в новый остаток.
+
+    Отчёт по категориям за архивные периоды берёт операции из архива
+    (см. ReportService.archive).
+    """
+
+    operation_repo: IOperationRepository
+    operation_row_repo: IOperationRowRepository
+    archive: IOperationArchive
+
+    def archive_through(self, cutoff: date, today: date | None = None) -> ArchiveReport:
+        if today is None:
+            today = date.today()
+
+        # Архивируем только закрытые кварталы (и годы)
+        if cutoff.month % 3 != 0 or cutoff.day != monthrange(cutoff.year, cutoff.month)[1]:
+            raise ValueError(f"{cutoff:%d.%m.%Y} — не последний день квартала.")
+        if cutoff >= today:
+            raise ValueError(f"Период по {cutoff:%d.%m.%Y} ещё не закрыт.")
+        already = self.archive.archived_through()
+        if already is not None and cutoff <= already:
+            raise ValueError(f"Операции по {already:%d.%m.%Y} уже в архиве.")
+
+        report = ArchiveReport(archived_through=cutoff)
+
+        # 1. Операции: в архив пишем потоком, запоминаем только номера строк
+        op_row_numbers: list[int] = []
+
+        def archived_operations() -> Iterator[Operation]:
+            for row_no, op in self.operation_repo.iter_all():
+                if op.date.date() <= cutoff:
+                    op_row_numbers.append(row_no)
+                    yield op
+
+        self.archive.append_operations(archived_operations())
+        report.operations_archived = len(op_row_numbers)
+
+        # 2. Строки операций: то же самое плюс остаток по (группе, участнику)
+        row_row_numbers: list[int] = []
+        balances: Dict[Tuple[str, str], int] = {}
+
+        def archived_rows() -> Iterator[OperationRow]:
+            for row_no, row in self.operation_row_repo.iter_all():
+                if row.date.date() > cutoff:
+                    continue
+                row_row_numbers.append(row_no)
+                if row.active:
+                    key = (row.group_id, row.person_id)
+                    amount_cents = row.amount_cents
+                    if row.row_type == "credit":
+                        amount_cents = -amount_cents
+                    balances[key] = balances.get(key, 0) + amount_cents
+                yield row
+
+        self.archive.append_rows(archived_rows())
+        report.rows_archived = len(row_row_numbers)
+
+        # 3. Строки входящего остатка (нулевые не пишем)
+        opening_date = datetime.combine(cutoff, datetime.min.time())
+        opening_rows = [
+            OperationRow(
+                group_id=group_id,
+                date=opening_date,
+                operation_id=f"{OPENING_OPERATION_PREFIX}{cutoff.isoformat()}",
+                person_id=person_id,
+                category=OPENING_CATEGORY,
+                row_type="debit" if balance > 0 else "credit",
+                amount_cents=abs(balance),
+                active=True,
+            )
+            for (group_id, person_id), balance in sorted(balances.items())
+            if balance != 0
+        ]
+        report.opening_rows = len(opening_rows)
+
+        # 4. Удаляем перенесённое и пишем остаток одним атомарным запросом.
+        #    Архив уже записан: если сбой случится до этого шага, повторный
+        #    запуск перенесёт те же строки ещё раз (повторы в архиве
+        #    отбрасываются при чтении по id операции).
+        self.operation_repo.compact(op_row_numbers, row_row_numbers, opening_rows)
+        self.archive.set_archived_through(cutoff)
+
+        return report
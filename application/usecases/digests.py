@@ -0,0 +1,132 @@
+# application/usecases/digests.py
+
+import html
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List
+
+from application.usecases.reports import ReportService, _format_category_lines
+from common.money import format_money
+from domain.models.expenses import Operation
+from domain.repositories import (
+    IOperationArchive,
+    IOperationRepository,
+    IUserGroupRepository,
+    IUserRepository,
+)
+
+
+@dataclass
+class GroupDigest:
+    """
+    Сводка по одной группе за период: балансы участников
+    и затраты по категориям (всё в копейках).
+    """
+
+    group_id: str
+    member_ids: List[str]
+    # имена участников {user_id -> имя} (только у кого имя есть)
+    names: Dict[str, str] = field(default_factory=dict)
+    balances: Dict[str, int] = field(default_factory=dict)
+    sum_by_category: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class DigestService:
+    """
+    Сводки сразу по всем группам (для рассылки итогов месяца).
+
+    Вместо отчётов ReportService по каждой группе (каждый из которых
+    заново читает листы) листы userGroups, users, operations и
+    operationsRows читаются по одному разу, а балансы и затраты
+    по категориям всех групп считаются за один проход.
+    """
+
+    report_svc: ReportService
+    operation_repo: IOperationRepository
+    user_group_repo: IUserGroupRepository
+    user_repo: IUserRepository
+    # Архив закрытых периодов (None — архива нет, всё в листах)
+    archive: IOperationArchive | None = None
+
+    def build_digests(self, start_date: date, end_date: date) -> List[GroupDigest]:
+        """
+        Сводки всех групп с участниками за период (границы включительно).
+
+        Балансы — на текущий момент, затраты — за период.
+        """
+        # 1. Участники всех групп — одно чтение userGroups
+        members = self.user_group_repo.get_all_members()
+        digests: Dict[str, GroupDigest] = {
+            group_id: GroupDigest(group_id=group_id, member_ids=member_ids)
+            for group_id, member_ids in members.items()
+        }
+
+        # 2. Имена всех пользователей — одно чтение users
+        all_names = self.user_repo.get_all_names()
+        for digest in digests.values():
+            digest.names = {uid: all_names[uid] for uid in digest.member_ids if uid in all_names}
+
+        # 3. Балансы всех групп — один проход по operationsRows.
+        #    Как и в отчёте по балансу, показываем только текущих участников.
+        all_balances = self.report_svc.get_all_group_balances()
+        for group_id, digest in digests.items():
+            group_balances = all_balances.get(group_id, {})
+            digest.balances = {uid: group_balances.get(uid, 0) for uid in digest.member_ids}
+
+        # 4. Затраты по категориям — один проход по operations
+        #    (плюс архив, если период попадает в архивные кварталы)
+        operations = (op for _, op in self.operation_repo.iter_all())
+        for op in operations:
+            op_date = op.date.date()
+            if op_date < start_date or op_date > end_date:
+                continue
+            self._add_expense(digests, op)
+
+        if self.archive is not None:
+            archived_through = self.archive.archived_through()
+            if archived_through is not None and start_date <= archived_through:
+                for op in self.archive.iter_operations(start_date, min(end_date, archived_through)):
+                    self._add_expense(digests, op)
+
+        return [digests[group_id] for group_id in sorted(digests)]
+
+    @staticmethod
+    def _add_expense(digests: Dict[str, GroupDigest], op: Operation) -> None:
+        if not op.is_expense or not op.active:
+            return
+        digest = digests.get(op.group_id.strip().upper())
+        if digest is None:
+            # Операции группы, в которой больше нет участников
+            return
+        category = op.category or "Без категории"
+        digest.sum_by_category[category] = digest.sum_by_category.get(category, 0) + op.amount_cents
+
+
+def format_digest(digest: GroupDigest, start_date: date, end_date: date) -> str:
+    """
+    Текст сводки группы (HTML: имена и категории экранируются).
+    """
+    lines: List[str] = [
+        f"Итоги за период {start_date:%d.%m.%Y}–{end_date:%d.%m.%Y}",
+        f"Группа: {html.escape(digest.group_id)}",
+        "",
+    ]
+
+    total = sum(digest.sum_by_category.values())
+    if total:
+        lines.append("Затраты по категориям:")
+        lines.extend(
+            html.escape(line) for line in _format_category_lines(digest.sum_by_category, total)
+        )
+        lines.append(f"Всего: {format_money(total)}")
+    else:
+        lines.append("Затрат за период не было.")
+
+    lines.append("")
+    lines.append("Баланс на сегодня:")
+    for user_id, balance in digest.balances.items():
+        display_name = digest.names.get(user_id) or f"Пользователь {user_id}"
+        lines.append(f"{html.escape(display_name)}: {format_money(balance)}")
+
+    return "\n".join(lines)
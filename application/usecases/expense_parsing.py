@@ -0,0 +1,67 @@
+# application/usecases/expense_parsing.py
+
+from application.usecases.expenses import ExpenseDraft
+from common.money import parse_money
+
+
+def parse_amount(text: str) -> int | None:
+    """
+    Разобрать сумму вида "1500", "123,45", "1 500.50" в копейки.
+
+    Возвращает None, если это не положительное число.
+    """
+    amount_cents = parse_money(text)
+    if amount_cents is None or amount_cents <= 0:
+        return None
+    return amount_cents
+
+
+def parse_expense_lines(
+    text: str,
+    categories: list[str],
+) -> tuple[list[ExpenseDraft], list[str]]:
+    """
+    Разобрать одну или несколько строк вида:
+
+        <сумма> <категория> [комментарий]
+
+    например "1500 Реклама таргет VK". Пустые строки пропускаются.
+    Категория сверяется со списком categories без учёта регистра
+    и записывается в каноническом написании.
+
+    Возвращает:
+    - drafts: черновики затрат по всем корректным строкам;
+    - errors: тексты ошибок с номерами строк (если пусто — всё корректно).
+    """
+    by_lower = {c.lower(): c for c in categories}
+
+    drafts: list[ExpenseDraft] = []
+    errors: list[str] = []
+
+    for line_no, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        parts = line.split(maxsplit=2)
+        if len(parts) < 2:
+            errors.append(f"Строка {line_no}: нужно указать сумму и категорию.")
+            continue
+
+        amount_cents = parse_amount(parts[0])
+        if amount_cents is None:
+            errors.append(f"Строка {line_no}: не удалось понять сумму '{parts[0]}'.")
+            continue
+
+        category = by_lower.get(parts[1].lower())
+        if category is None:
+            errors.append(
+                f"Строка {line_no}: неизвестная категория '{parts[1]}'. "
+                f"Доступны: {', '.join(categories)}."
+            )
+            continue
+
+        comment = parts[2].strip() if len(parts) > 2 else ""
+        drafts.append(ExpenseDraft(category=category, comment=comment, amount_cents=amount_cents))
+
+    return drafts, errors
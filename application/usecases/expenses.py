@@ -4,27 +4,58 @@ from dataclasses import dataclass
 from datetime import datetime
 import uuid
 
+from common.money import split_cents
+from common.tracing import trace_methods
 from domain.models.expenses import Operation, OperationRow
 from domain.repositories import (
+    IIdempotencyStore,
     IOperationRepository,
     IOperationRowRepository,
     IUserGroupRepository,
 )
 
 
+class OperationCancelError(ValueError):
+    """
+    Операцию нельзя отменить (не найдена, чужая группа, уже отменена).
+    Текст ошибки можно показать пользователю.
+    """
+
+
+@dataclass
+class ExpenseDraft:
+    """
+    Черновик одной затраты 'за всех в группе' (ещё не записанной):
+    категория, комментарий и сумма в копейках.
+    """
+
+    category: str
+    comment: str
+    amount_cents: int
+
+
+@trace_methods
 @dataclass
 class ExpenseService:
     """
     Сервис работы с финансовыми операциями.
 
     Сейчас умеет:
-    - создавать затраты типа 'expense' за всех участников группы;
-    - (ниже добавим) создавать передачи типа 'transfer' между двумя пользователями.
+    - создавать затраты типа 'expense' за всех участников группы
+      (по одной или пачкой — create_expenses_batch);
+    - (ниже добавим) создавать передачи типа 'transfer' между двумя пользователями;
+    - отменять операции (флаг Active = FALSE) — cancel_operation и undo_last.
+
+    Методы создания принимают idempotency_key (например, id сообщения
+    Telegram): повторный вызов с тем же ключом ничего не пишет
+    и возвращает id, созданные в первый раз.
     """
 
     operation_repo: IOperationRepository
     operation_row_repo: IOperationRowRepository
     user_group_repo: IUserGroupRepository
+    # Результаты по ключам идемпотентности (None — без защиты от повторов)
+    idempotency: IIdempotencyStore | None = None
 
     def create_expense_for_all(
         self,
@@ -32,7 +63,9 @@ class ExpenseService:
         group_id: str,
         category: str,
         comment: str,
-        amount: float,
+        amount_cents: int,
+        member_ids: list[str] | None = None,
+        idempotency_key: str | None = None,
     ) -> str:
         """
         Создать затрату типа 'expense' для всех участников группы.
@@ -40,13 +73,124 @@ class ExpenseService:
         Правило:
         - у потратившего пользователя debit на всю сумму X;
         - у всех участников группы (включая его) credit на X / k,
-          где k — количество участников группы.
+          где k — количество участников группы (в копейках, остаток
+          от деления — см. split_cents).
+
+        member_ids — список участников, если он уже известен вызывающему
+        коду (например, загружен заранее при старте диалога); тогда
+        лист userGroups повторно не читается.
 
         Возвращает:
         - UUID созданной операции.
         """
+        if idempotency_key is not None and self.idempotency is not None:
+            return self.idempotency.run_once(
+                idempotency_key,
+                lambda: self.create_expense_for_all(
+                    user_id, group_id, category, comment, amount_cents, member_ids
+                ),
+            )
+
+        # Список участников группы из userGroups (если не передан)
+        if member_ids is None:
+            member_ids = self.user_group_repo.get_member_ids(group_id)
+
+        op, rows = self.build_expense_for_all(
+            user_id=user_id,
+            group_id=group_id,
+            category=category,
+            comment=comment,
+            amount_cents=amount_cents,
+            member_ids=member_ids,
+            now=datetime.now(),
+        )
+
+        # 1. Основная операция
+        self.operation_repo.create(op)
+
+        if not rows:
+            # На практике лучше бросить исключение, здесь просто вернём id операции.
+            return op.id
+
+        # 2. Строки проводок
+        self.operation_row_repo.create_many(rows)
+        return op.id
+
+    def create_expenses_batch(
+        self,
+        user_id: str,
+        group_id: str,
+        drafts: list["ExpenseDraft"],
+        member_ids: list[str] | None = None,
+        idempotency_key: str | None = None,
+    ) -> list[str]:
+        """
+        Создать сразу несколько затрат 'за всех в группе'.
+
+        Правила те же, что у create_expense_for_all, но:
+        - участники группы читаются один раз на все затраты;
+        - все операции и все их строки operationsRows записываются
+          одним пакетным вызовом репозитория.
+
+        Возвращает:
+        - список UUID созданных операций в порядке drafts.
+        """
+        if not drafts:
+            return []
+
+        if idempotency_key is not None and self.idempotency is not None:
+            return self.idempotency.run_once(
+                idempotency_key,
+                lambda: self.create_expenses_batch(user_id, group_id, drafts, member_ids),
+            )
+
+        if member_ids is None:
+            member_ids = self.user_group_repo.get_member_ids(group_id)
+
         now = datetime.now()
-        op_id = str(uuid.uuid4())
+        ops: list[Operation] = []
+        rows: list[OperationRow] = []
+
+        for draft in drafts:
+            op, op_rows = self.build_expense_for_all(
+                user_id=user_id,
+                group_id=group_id,
+                category=draft.category,
+                comment=draft.comment,
+                amount_cents=draft.amount_cents,
+                member_ids=member_ids,
+                now=now,
+            )
+            ops.append(op)
+            rows.extend(op_rows)
+
+        self.operation_repo.create_batch(ops, rows)
+        return [op.id for op in ops]
+
+    def build_expense_for_all(
+        self,
+        user_id: str,
+        group_id: str,
+        category: str,
+        comment: str,
+        amount_cents: int,
+        member_ids: list[str],
+        now: datetime,
+        op_id: str | None = None,
+    ) -> tuple[Operation, list[OperationRow]]:
+        """
+        Собрать операцию 'expense' и её строки без записи в хранилище.
+
+        Сумма делится поровну между member_ids (это могут быть и не все
+        участники группы — например, при импорте истории с разбивкой).
+        Делим в копейках: лишние копейки остатка детерминированно
+        получают первые участники (split_cents), сумма credit-строк
+        всегда равна debit.
+        Если участников нет, строк не будет (только сама операция).
+        op_id можно задать заранее (детерминированный id при импорте).
+        """
+        if op_id is None:
+            op_id = str(uuid.uuid4())
 
         # 1. Основная операция
         op = Operation(
@@ -58,31 +202,14 @@ class ExpenseService:
             is_expense=True,
             category=category,
             comment=comment,
-            amount=amount,
+            amount_cents=amount_cents,
             active=True,
         )
-        self.operation_repo.create(op)
-
-        # 2. Список участников группы из userGroups
-        # TODO: лучше вынести в отдельный метод репозитория,
-        # сейчас используем внутренний вспомогательный метод.
-        links, _ = self.user_group_repo._read_all_rows()
-
-        member_ids: list[str] = []
-        for row in links:
-            if not row:
-                continue
-            row_user_id = row[0].strip()
-            row_group_id = row[1].strip().upper() if len(row) > 1 else ""
-            if row_group_id == group_id.strip().upper():
-                member_ids.append(row_user_id)
 
         if not member_ids:
-            # На практике лучше бросить исключение, здесь просто вернём id операции.
-            return op_id
+            return op, []
 
-        k = len(member_ids)
-        share = amount / k
+        shares = split_cents(amount_cents, member_ids)
 
         rows: list[OperationRow] = []
 
@@ -95,7 +222,7 @@ class ExpenseService:
                 person_id=user_id,
                 category=category,
                 row_type="debit",
-                amount=amount,
+                amount_cents=amount_cents,
                 active=True,
             )
         )
@@ -110,13 +237,12 @@ class ExpenseService:
                     person_id=pid,
                     category=category,
                     row_type="credit",
-                    amount=share,
+                    amount_cents=shares[pid],
                     active=True,
                 )
             )
 
-        self.operation_row_repo.create_many(rows)
-        return op_id
+        return op, rows
 
     # ---------- НОВЫЙ МЕТОД: ПЕРЕДАЧА ДЕНЕГ МЕЖДУ ДВУМЯ ПОЛЬЗОВАТЕЛЯМИ ----------
 
@@ -126,7 +252,8 @@ class ExpenseService:
         from_user_id: str,
         to_user_id: str,
         comment: str,
-        amount: float,
+        amount_cents: int,
+        idempotency_key: str | None = None,
     ) -> str:
         """
         Создать операцию передачи денег между двумя пользователями.
@@ -141,11 +268,17 @@ class ExpenseService:
         - from_user_id: id пользователя-отправителя (кто регистрирует операцию);
         - to_user_id: id пользователя-получателя (выбран из меню);
         - comment: текст описания передачи;
-        - amount: сумма передачи.
+        - amount_cents: сумма передачи в копейках.
 
         Возвращает:
         - UUID созданной операции.
         """
+        if idempotency_key is not None and self.idempotency is not None:
+            return self.idempotency.run_once(
+                idempotency_key,
+                lambda: self.create_transfer(group_id, from_user_id, to_user_id, comment, amount_cents),
+            )
+
         now = datetime.now()
         op_id = str(uuid.uuid4())
 
@@ -160,7 +293,7 @@ class ExpenseService:
             is_expense=False,  
             category="transfer",
             comment=comment,
-            amount=amount,
+            amount_cents=amount_cents,
             active=True,
         )
         self.operation_repo.create(op)
@@ -177,7 +310,7 @@ class ExpenseService:
                 person_id=from_user_id,
                 category="transfer",
                 row_type="debit",       # у отправителя долг уменьшается
-                amount=amount,
+                amount_cents=amount_cents,
                 active=True,
             )
         )
@@ -191,7 +324,7 @@ class ExpenseService:
                 person_id=to_user_id,
                 category="transfer",
                 row_type="credit",      # у получателя долг/баланс увеличивается
-                amount=amount,
+                amount_cents=amount_cents,
                 active=True,
             )
         )
@@ -200,3 +333,37 @@ class ExpenseService:
         self.operation_row_repo.create_many(rows)
 
         return op_id
+
+    # ---------- ОТМЕНА ОПЕРАЦИЙ ----------
+
+    def cancel_operation(self, group_id: str, operation_id: str) -> Operation:
+        """
+        Отменить операцию группы по её id.
+
+        Строки не удаляются: у операции и всех её строк operationsRows
+        флаг Active становится FALSE, и отчёты их больше не учитывают.
+
+        Возвращает отменённую операцию.
+        """
+        op = self.operation_repo.get_by_id(operation_id.strip())
+        if op is None or op.group_id.strip().upper() != group_id.strip().upper():
+            raise OperationCancelError(f"Операция {operation_id} не найдена в вашей группе.")
+        if not op.active:
+            raise OperationCancelError(f"Операция {operation_id} уже отменена.")
+
+        self.operation_repo.set_active(op.id, False)
+        op.active = False
+        return op
+
+    def undo_last(self, user_id: str, group_id: str) -> Operation:
+        """
+        Отменить последнюю активную операцию, которую пользователь
+        зарегистрировал в группе.
+        """
+        op = self.operation_repo.get_last_active_for_person(group_id, user_id)
+        if op is None:
+            raise OperationCancelError("Нет операций, которые можно отменить.")
+
+        self.operation_repo.set_active(op.id, False)
+        op.active = False
+        return op
@@ -0,0 +1,191 @@
+# application/usecases/exports.py
+
+import csv
+import io
+import itertools
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import BinaryIO, Iterator
+
+from application.usecases.archive import OPENING_OPERATION_PREFIX
+from application.usecases.reports import ReportPeriod, _get_period_bounds
+from common.money import cents_to_units
+from common.tracing import trace_methods
+from domain.models.expenses import Operation, OperationRow
+from domain.repositories import IOperationArchive, IOperationRepository, IOperationRowRepository
+
+
+# Поддерживаемые форматы выгрузки
+EXPORT_FORMATS = ("csv", "xlsx", "json")
+
+# Код периода "за всё время" (в дополнение к ReportPeriod)
+EXPORT_PERIOD_ALL = "period:all"
+
+# Колонки выгрузки: одна таблица на операции и одна на строки операций
+OPERATION_COLUMNS = (
+    "group_id", "date", "id", "operation_type", "person_id",
+    "is_expense", "category", "comment", "amount", "active",
+)
+ROW_COLUMNS = (
+    "group_id", "date", "operation_id", "person_id",
+    "category", "row_type", "amount", "active",
+)
+
+
+class ExportFormatError(ValueError):
+    """
+    Неизвестный или недоступный формат выгрузки.
+    """
+
+
+def _operation_record(op: Operation) -> list:
+    return [
+        op.group_id, op.date.isoformat(), op.id, op.operation_type, op.person_id,
+        op.is_expense, op.category, op.comment, cents_to_units(op.amount_cents), op.active,
+    ]
+
+
+def _row_record(r: OperationRow) -> list:
+    return [
+        r.group_id, r.date.isoformat(), r.operation_id, r.person_id,
+        r.category, r.row_type, cents_to_units(r.amount_cents), r.active,
+    ]
+
+
+@trace_methods
+@dataclass
+class LedgerExportService:
+    """
+    Выгрузка журнала группы (операции и строки операций) в файл.
+
+    Данные читаются из листов порциями и сразу пишутся в выходной
+    поток, поэтому в памяти одновременно нет всей истории группы.
+    Куда писать (файл, SpooledTemporaryFile и т.п.) решает вызывающий код.
+
+    Если период задевает закрытые периоды (archived_through), их
+    операции и строки берутся из архива, остальное — из листов.
+    Строки входящего остатка тогда не выгружаются: они сводят
+    архивные строки, которые уже есть в выгрузке.
+    """
+
+    operation_repo: IOperationRepository
+    operation_row_repo: IOperationRowRepository
+    # Архив закрытых периодов (None — архива нет, всё в листах)
+    archive: IOperationArchive | None = None
+
+    def write_export(
+        self,
+        group_id: str,
+        period_code: str,
+        fmt: str,
+        out: BinaryIO,
+    ) -> None:
+        """
+        Записать выгрузку группы за период period_code в поток out.
+
+        period_code — одно из значений ReportPeriod или EXPORT_PERIOD_ALL.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ExportFormatError(f"Неизвестный формат '{fmt}'. Доступны: {', '.join(EXPORT_FORMATS)}.")
+
+        start_date, end_date = _export_bounds(period_code)
+        operations = self.operation_repo.iter_operations_for_group(group_id, start_date, end_date)
+        rows = self.operation_row_repo.iter_rows_for_group(group_id, start_date, end_date)
+
+        # Закрытые периоды перенесены в архив — сначала выгружаем их оттуда
+        archived_through = self.archive.archived_through() if self.archive is not None else None
+        if archived_through is not None and (start_date is None or start_date <= archived_through):
+            archive_end = archived_through if end_date is None else min(end_date, archived_through)
+            operations = itertools.chain(
+                self.archive.iter_operations(start_date, archive_end, group_id=group_id),
+                operations,
+            )
+            rows = itertools.chain(
+                self.archive.iter_rows(start_date, archive_end, group_id=group_id),
+                (r for r in rows if not r.operation_id.startswith(OPENING_OPERATION_PREFIX)),
+            )
+
+        if fmt == "csv":
+            _write_csv(operations, rows, out)
+        elif fmt == "json":
+            _write_json(operations, rows, out)
+        else:
+            _write_xlsx(operations, rows, out)
+
+
+def _export_bounds(period_code: str) -> tuple[date | None, date | None]:
+    """
+    Границы периода выгрузки (None — без ограничения).
+    """
+    if period_code == EXPORT_PERIOD_ALL:
+        return None, None
+    if period_code not in {value for value in ReportPeriod}:
+        raise ValueError(f"Неизвестный период '{period_code}'.")
+    return _get_period_bounds(period_code)
+
+
+def _write_csv(operations: Iterator[Operation], rows: Iterator[OperationRow], out: BinaryIO) -> None:
+    """
+    Один CSV: колонка record различает операции и строки операций.
+    """
+    # utf-8-sig — чтобы Excel правильно открыл кириллицу
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    columns = list(OPERATION_COLUMNS) + [c for c in ROW_COLUMNS if c not in OPERATION_COLUMNS]
+
+    writer.writerow(["record"] + columns)
+    for op in operations:
+        writer.writerow(["operation"] + _operation_record(op) + [""] * (len(columns) - len(OPERATION_COLUMNS)))
+    for r in rows:
+        values = dict(zip(ROW_COLUMNS, _row_record(r)))
+        writer.writerow(["row"] + [values.get(c, "") for c in columns])
+
+    text.flush()
+    # Отвязываем обёртку, чтобы её закрытие не закрыло сам out
+    text.detach()
+
+
+def _write_json(operations: Iterator[Operation], rows: Iterator[OperationRow], out: BinaryIO) -> None:
+    """
+    {"operations": [...], "operationsRows": [...]} — пишется по одному объекту.
+    """
+    def write_list(name: str, columns: tuple, records: Iterator[list]) -> None:
+        out.write(f'"{name}": ['.encode("utf-8"))
+        for i, record in enumerate(records):
+            if i:
+                out.write(b",")
+            out.write(b"\n  ")
+            out.write(json.dumps(dict(zip(columns, record)), ensure_ascii=False).encode("utf-8"))
+        out.write(b"\n]")
+
+    out.write(b"{\n")
+    write_list("operations", OPERATION_COLUMNS, (_operation_record(op) for op in operations))
+    out.write(b",\n")
+    write_list("operationsRows", ROW_COLUMNS, (_row_record(r) for r in rows))
+    out.write(b"\n}\n")
+
+
+def _write_xlsx(operations: Iterator[Operation], rows: Iterator[OperationRow], out: BinaryIO) -> None:
+    """
+    Книга с двумя листами: operations и operationsRows.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportFormatError("Формат xlsx недоступен: не установлен пакет openpyxl.")
+
+    # write_only: строки сразу уходят во временный файл, а не копятся в памяти
+    wb = Workbook(write_only=True)
+
+    ops_sheet = wb.create_sheet("operations")
+    ops_sheet.append(list(OPERATION_COLUMNS))
+    for op in operations:
+        ops_sheet.append(_operation_record(op))
+
+    rows_sheet = wb.create_sheet("operationsRows")
+    rows_sheet.append(list(ROW_COLUMNS))
+    for r in rows:
+        rows_sheet.append(_row_record(r))
+
+    wb.save(out)
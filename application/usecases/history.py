@@ -0,0 +1,39 @@
+# application/usecases/history.py
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from common.tracing import trace_methods
+from domain.models.expenses import OperationPage
+from domain.repositories import IOperationRepository, IUserRepository
+
+
+@trace_methods
+@dataclass
+class OperationHistoryService:
+    """
+    Журнал операций группы постранично, от новых к старым.
+
+    Курсор страницы — номер строки хранилища: страница "дальше"
+    берёт операции до первой строки текущей, "назад" — после последней.
+    Читаются только строки самой страницы.
+    """
+
+    operation_repo: IOperationRepository
+    user_repo: IUserRepository
+
+    def page(
+        self,
+        group_id: str,
+        limit: int,
+        before_row: int | None = None,
+        after_row: int | None = None,
+    ) -> Tuple[OperationPage, Dict[str, str]]:
+        """
+        Страница журнала и имена авторов её операций {user_id -> имя}.
+        """
+        page = self.operation_repo.get_page_for_group(
+            group_id, limit, before_row=before_row, after_row=after_row
+        )
+        names = self.user_repo.get_names(sorted({op.person_id for _, op in page.items}))
+        return page, names
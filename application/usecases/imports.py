@@ -0,0 +1,313 @@
+# application/usecases/imports.py
+
+import csv
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional
+
+from application.usecases.expense_parsing import parse_amount
+from application.usecases.expenses import ExpenseService
+from config.settings import IMPORT_CHUNK_SIZE, IMPORT_MIN_INTERVAL_SECONDS
+from domain.models.expenses import CATEGORIES, Operation, OperationRow
+from domain.repositories import IUserGroupRepository, IUserRepository
+
+
+# Колонки CSV (первая строка файла — заголовок, порядок любой)
+REQUIRED_COLUMNS = ("date", "payer", "category", "amount")
+OPTIONAL_COLUMNS = ("comment", "split")
+
+# Значения колонки split, означающие "поровну на всех участников группы"
+SPLIT_ALL_VALUES = {"", "all", "все"}
+
+# Категория без учёта регистра -> каноническое написание
+_CATEGORY_BY_LOWER = {c.lower(): c for c in CATEGORIES}
+
+# В режиме проверки (dry run) храним не больше стольких текстов ошибок
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportRowError(ValueError):
+    """
+    Ошибка в конкретной строке CSV.
+    """
+
+
+@dataclass
+class ImportReport:
+    """
+    Итог импорта.
+
+    Поля:
+    - rows_read: сколько строк данных прочитано из файла;
+    - rows_skipped: сколько строк пропущено, т.к. они уже импортированы
+      в прошлый запуск (возобновление);
+    - rows_imported: сколько строк записано (в dry run — сколько корректны);
+    - error_count / errors: ошибки (текстов не больше MAX_REPORTED_ERRORS).
+    """
+
+    rows_read: int = 0
+    rows_skipped: int = 0
+    rows_imported: int = 0
+    error_count: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, text: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(text)
+
+
+@dataclass
+class ExpenseImportService:
+    """
+    Импорт истории затрат группы из CSV.
+
+    Файл читается потоково, строка за строкой, поэтому память
+    не зависит от размера файла: в памяти только текущий пакет.
+
+    Каждая строка превращается в Operation + OperationRow ровно так же,
+    как это делает ExpenseService (debit плательщику, credit поровну
+    участникам из колонки split). Пакеты по chunk_size операций
+    пишутся одним вызовом create_batch с паузой между пакетами,
+    чтобы не выйти за квоту Sheets.
+
+    Возобновление: после каждого записанного пакета номер последней
+    строки сохраняется в файл состояния. Повторный запуск пропускает
+    уже записанные строки. Перед записью пакета в состояние попадает
+    и его последняя строка (pending_through): если процесс упал между
+    записью и сохранением состояния, при повторе операции этого пакета,
+    уже попавшие в листы (id детерминированы), не пишутся второй раз.
+    На первой строке с ошибкой импорт
+    останавливается (всё до неё уже записано) — её можно исправить
+    и запустить импорт снова. dry_run проверяет весь файл без записи.
+    """
+
+    expense_svc: ExpenseService
+    user_group_repo: IUserGroupRepository
+    user_repo: IUserRepository
+    chunk_size: int = IMPORT_CHUNK_SIZE
+    min_interval_seconds: float = IMPORT_MIN_INTERVAL_SECONDS
+
+    def import_csv(
+        self,
+        path: str,
+        group_id: str,
+        dry_run: bool = False,
+        delimiter: str = ",",
+        state_path: Optional[str] = None,
+    ) -> ImportReport:
+        group_id = group_id.strip().upper()
+        if state_path is None:
+            state_path = path + ".import-state.json"
+
+        member_ids = self.user_group_repo.get_member_ids(group_id)
+        if not member_ids:
+            raise ValueError(f"В группе {group_id} нет участников.")
+
+        # Плательщика и участников разбивки можно указывать по id или по имени
+        names = self.user_repo.get_names(member_ids)
+        refs: dict[str, str] = {uid: uid for uid in member_ids}
+        for uid, name in names.items():
+            refs.setdefault(name.strip().lower(), uid)
+
+        rows_done, pending_through = (0, 0) if dry_run else self._load_state(state_path, group_id)
+        source_name = os.path.basename(path)
+        report = ImportReport()
+
+        chunk_ops: list[Operation] = []
+        chunk_rows: list[OperationRow] = []
+        last_flush = 0.0
+        written_through = rows_done
+
+        def flush(last_row_no: int) -> None:
+            nonlocal last_flush, written_through
+            if not chunk_ops:
+                return
+            ops, op_rows = chunk_ops, chunk_rows
+            if written_through < pending_through:
+                # Прошлый запуск мог записать эти строки и упасть до
+                # сохранения состояния — уже записанное не повторяем
+                ops, op_rows = self._drop_written(ops, op_rows)
+                report.rows_skipped += len(chunk_ops) - len(ops)
+
+            # Соблюдаем минимальный интервал между пакетными записями
+            wait = self.min_interval_seconds - (time.monotonic() - last_flush)
+            if last_flush and wait > 0:
+                time.sleep(wait)
+
+            self._save_state(state_path, group_id, written_through, pending_through=last_row_no)
+            self.expense_svc.operation_repo.create_batch(ops, op_rows)
+            last_flush = time.monotonic()
+
+            report.rows_imported += len(ops)
+            self._save_state(state_path, group_id, last_row_no)
+            written_through = last_row_no
+            chunk_ops.clear()
+            chunk_rows.clear()
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            header = {(name or "").strip().lower() for name in (reader.fieldnames or [])}
+            missing = [c for c in REQUIRED_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"В CSV нет колонок: {', '.join(missing)}.")
+
+            last_good_row_no = rows_done
+            for row_no, record in enumerate(reader, start=1):
+                report.rows_read += 1
+                if row_no <= rows_done:
+                    report.rows_skipped += 1
+                    continue
+
+                record = {(k or "").strip().lower(): (v or "").strip() for k, v in record.items()}
+                try:
+                    op, op_rows = self._build_operation(
+                        record, row_no, group_id, member_ids, refs, source_name
+                    )
+                except ImportRowError as e:
+                    report.add_error(f"Строка {row_no}: {e}")
+                    if dry_run:
+                        continue
+                    # Записываем всё корректное до этой строки и останавливаемся
+                    break
+
+                if dry_run:
+                    report.rows_imported += 1
+                    continue
+
+                chunk_ops.append(op)
+                chunk_rows.extend(op_rows)
+                last_good_row_no = row_no
+                if len(chunk_ops) >= self.chunk_size:
+                    flush(last_good_row_no)
+
+            if not dry_run:
+                flush(last_good_row_no)
+
+        return report
+
+    def _build_operation(
+        self,
+        record: dict[str, str],
+        row_no: int,
+        group_id: str,
+        member_ids: list[str],
+        refs: dict[str, str],
+        source_name: str,
+    ) -> tuple[Operation, list[OperationRow]]:
+        op_date = _parse_date(record.get("date", ""))
+        if op_date is None:
+            raise ImportRowError(f"не удалось понять дату '{record.get('date', '')}'.")
+
+        payer = refs.get(record.get("payer", "").lower())
+        if payer is None:
+            raise ImportRowError(f"плательщик '{record.get('payer', '')}' не участник группы.")
+
+        category = _CATEGORY_BY_LOWER.get(record.get("category", "").lower())
+        if category is None:
+            raise ImportRowError(f"неизвестная категория '{record.get('category', '')}'.")
+
+        amount_cents = parse_amount(record.get("amount", ""))
+        if amount_cents is None:
+            raise ImportRowError(f"не удалось понять сумму '{record.get('amount', '')}'.")
+
+        split = record.get("split", "")
+        if split.lower() in SPLIT_ALL_VALUES:
+            split_ids = member_ids
+        else:
+            split_ids = []
+            for ref in split.replace(",", ";").split(";"):
+                if not ref.strip():
+                    continue
+                uid = refs.get(ref.strip().lower())
+                if uid is None:
+                    raise ImportRowError(f"в разбивке '{ref.strip()}' не участник группы.")
+                # Повтор участника (по id и по имени) не даёт ему двойную долю
+                if uid not in split_ids:
+                    split_ids.append(uid)
+            if not split_ids:
+                raise ImportRowError(f"в разбивке '{split}' нет ни одного участника.")
+
+        # Детерминированный id: при повторном импорте той же строки
+        # получится та же операция, её легко найти и не спутать
+        op_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"import:{group_id}:{source_name}:{row_no}"))
+
+        return self.expense_svc.build_expense_for_all(
+            user_id=payer,
+            group_id=group_id,
+            category=category,
+            comment=record.get("comment", ""),
+            amount_cents=amount_cents,
+            member_ids=split_ids,
+            now=datetime.combine(op_date, datetime.min.time()),
+            op_id=op_id,
+        )
+
+    def _drop_written(
+        self,
+        ops: list[Operation],
+        op_rows: list[OperationRow],
+    ) -> tuple[list[Operation], list[OperationRow]]:
+        """
+        Убрать из пакета то, что уже есть в листах: операции и строки
+        operationsRows проверяются по отдельности (без GID листов
+        create_batch пишет их двумя запросами, и сбой мог быть между ними).
+        """
+        in_operations, in_rows = self.expense_svc.operation_repo.find_written([op.id for op in ops])
+        return (
+            [op for op in ops if op.id not in in_operations],
+            [r for r in op_rows if r.operation_id not in in_rows],
+        )
+
+    def _load_state(self, state_path: str, group_id: str) -> tuple[int, int]:
+        """
+        Номер последней записанной строки из прошлого запуска (0 — с начала)
+        и последняя строка пакета, запись которого могла не завершиться
+        (0 — такого нет).
+        """
+        if not os.path.exists(state_path):
+            return 0, 0
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("group_id") != group_id:
+            raise ValueError(
+                f"Файл состояния {state_path} относится к группе {state.get('group_id')}. "
+                "Удалите его, чтобы начать импорт заново."
+            )
+        return int(state.get("rows_done", 0)), int(state.get("pending_through", 0))
+
+    def _save_state(
+        self,
+        state_path: str,
+        group_id: str,
+        rows_done: int,
+        pending_through: int = 0,
+    ) -> None:
+        # Пишем во временный файл и атомарно подменяем,
+        # чтобы сбой посреди записи не испортил состояние
+        state = {"group_id": group_id, "rows_done": rows_done}
+        if pending_through:
+            state["pending_through"] = pending_through
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+
+def _parse_date(text: str) -> Optional[date]:
+    """
+    Дата в формате YYYY-MM-DD или DD.MM.YYYY.
+    """
+    text = text.strip()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, "%d.%m.%Y").date()
+    except ValueError:
+        return None
@@ -1,123 +1,126 @@
 # application/usecases/reports.py
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
 from enum import StrEnum
 from datetime import date, datetime
 from calendar import monthrange
 from decimal import Decimal, ROUND_HALF_UP
 
-from infrastructure.google_sheets.client import get_sheets_service
+from infrastructure.google_sheets.client import get_sheets_service, iter_values, read_values
+from infrastructure.google_sheets.balance_checkpoints import BalanceCheckpoint, BalanceCheckpointStore
 from config.settings import GOOGLE_SPREADSHEET_ID, SHEET_OPERATION_ROWS_RANGE
 
 from application.usecases.user_groups import UserGroupsService
+from common.logger import get_logger
+from common.money import format_money, to_cents
+from common.tracing import trace_methods
+from domain.repositories import IOperationArchive
+from domain.models.expenses import Operation
+from domain.services.balance_service import SettleTransfer, settle_up_plan
+from domain.services.expense_cube import ExpenseCube
 from infrastructure.google_sheets.user_repository import UserSheetRepository
 from infrastructure.google_sheets.group_repository import GroupSheetRepository
 from infrastructure.google_sheets.operation_repository import OperationSheetRepository
 
 
+logger = get_logger(__name__)
+
+
+# Отчёт "Затраты по участникам": сколько категорий показывать у каждого
+PERSON_TOP_CATEGORIES = 3
+# Отчёт "Динамика по месяцам": сколько последних месяцев показывать
+TREND_MONTHS = 6
+
+
+@trace_methods
 @dataclass
 class ReportService:
     """
     Сервис построения отчётов по данным Google Sheets.
 
-    Сейчас реализует один отчёт:
-    - баланс по группе на основе листа operationsRows.
+    - балансы — по листу operationsRows (с контрольной точкой);
+    - затраты по категориям — по листу operations;
+    - разрезы "по участникам", "по месяцам" и т.п. — по кубу расходов
+      (expense_cube), который дочитывает только новые операции.
     """
 
     user_groups_svc: UserGroupsService
     user_repo: UserSheetRepository
     group_repo: GroupSheetRepository
     operations_repo: OperationSheetRepository
+    # Архив закрытых периодов (None — архива нет, всё в листах)
+    archive: IOperationArchive | None = None
+    # Контрольная точка балансов (None — баланс всегда по всему листу)
+    checkpoints: BalanceCheckpointStore | None = None
+
+    # Куб расходов и до какой строки operations он досчитан
+    # (при каком поколении истории листа и дате архива)
+    _cube: ExpenseCube | None = field(default=None, init=False, repr=False)
+    _cube_row: int = field(default=0, init=False, repr=False)
+    _cube_generation: int = field(default=0, init=False, repr=False)
+    _cube_archived_through: Optional[str] = field(default=None, init=False, repr=False)
+    _cube_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
 
     def _get_group_members(self, group_id: str) -> List[str]:
         """
         Возвращает список user_id участников заданной группы
         по данным листа userGroups.
         """
-        # Используем уже существующий вспомогательный метод репозитория
-        values, _ = self.user_groups_svc.user_group_repo._read_all_rows()
-
-        member_ids: List[str] = []
-        for row in values:
-            if not row:
-                continue
-            row_user_id = row[0].strip()
-            row_group_id = row[1].strip().upper() if len(row) > 1 else ""
-            if row_group_id == group_id.strip().upper():
-                member_ids.append(row_user_id)
-        return member_ids
+        return self.user_groups_svc.user_group_repo.get_member_ids(group_id)
 
-    def get_group_balance(self, group_id: str) -> Tuple[str, Dict[str, float]]:
+    def get_group_balance(self, group_id: str) -> Tuple[str, Dict[str, int]]:
         """
         Рассчитать баланс по всем пользователям группы.
 
         Баланс пользователя считается по листу operationsRows:
         - debit-строки дают +amount;
-        - credit-строки дают -amount.
+        - credit-строки дают -amount;
+        - строки отменённых операций (Active = FALSE) не учитываются.
+
+        Если есть контрольная точка (checkpoints), читаются только
+        строки после неё.
 
         Возвращает:
         - group_name: строка с названием группы (если есть в Groups, иначе group_id);
-        - balances: словарь {user_id -> сумма}.
+        - balances: словарь {user_id -> сумма в копейках}.
         """
         # 1. Участники группы
         member_ids = self._get_group_members(group_id)
-        balances: Dict[str, float] = {uid: 0.0 for uid in member_ids}
+        balances: Dict[str, int] = {uid: 0 for uid in member_ids}
 
         if not member_ids:
             # Пустая группа — вернём пустой баланс
             group_name = group_id
             return group_name, balances
 
-        # 2. Читаем все строки из operationsRows
+        # 2. Строки operationsRows: если есть контрольная точка —
+        #    берём балансы из неё и дочитываем только строки после неё
         service = get_sheets_service()
-        result = (
-            service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range=SHEET_OPERATION_ROWS_RANGE,
+        checkpoint = self._usable_checkpoint()
+        if checkpoint is not None:
+            saved = checkpoint.balances.get(group_id.strip().upper(), {})
+            for uid in balances:
+                balances[uid] = saved.get(uid, 0)
+            values = (
+                row for _, row in iter_values(
+                    service, SHEET_OPERATION_ROWS_RANGE, start_row=checkpoint.row + 1
+                )
             )
-            .execute()
-        )
-        values = result.get("values", [])
-
-        # Порядок колонок operationsRows:
-        # A: Group
-        # B: Date
-        # C: Operation
-        # D: Person
-        # E: Category
-        # F: Type (debit/credit)
-        # G: Amount
-        # H: Active
+        else:
+            values = read_values(service, SHEET_OPERATION_ROWS_RANGE)
 
+        target_group = group_id.strip().upper()
         for row in values:
-            if len(row) < 7:
+            applied = _apply_balance_row(row)
+            if applied is None:
                 continue
-
-            row_group_id = row[0].strip().upper()
-            if row_group_id != group_id.strip().upper():
-                # Строка относится к другой группе
-                continue
-
-            person_id = row[3].strip()
-            if person_id not in balances:
-                # Пользователь не в текущей группе
+            row_group_id, person_id, amount = applied
+            if row_group_id != target_group or person_id not in balances:
+                # Строка другой группы или пользователь не в текущей группе
                 continue
-
-            row_type = row[5].strip().lower()  # "debit" или "credit"
-            amount_str = row[6].replace(",", ".").strip()
-
-            try:
-                amount = float(amount_str)
-            except ValueError:
-                continue
-
-            if row_type == "debit":
-                balances[person_id] += amount
-            elif row_type == "credit":
-                balances[person_id] -= amount
+            balances[person_id] += amount
 
         # 3. Имя группы из Groups (если есть)
         group_name = group_id
@@ -131,6 +134,90 @@ class ReportService:
 
         return group_name, balances
 
+    def advance_balance_checkpoint(self) -> Optional[BalanceCheckpoint]:
+        """
+        Продвинуть контрольную точку балансов до конца листа operationsRows.
+
+        Читаются только строки после текущей точки (или весь лист,
+        если точки нет). Вызывается фоновой задачей по расписанию.
+        """
+        if self.checkpoints is None:
+            return None
+
+        generation = self.checkpoints.generation()
+        checkpoint, last_row, balances = self._scan_all_balances()
+
+        if checkpoint is not None and last_row == checkpoint.row:
+            return checkpoint
+
+        new_checkpoint = BalanceCheckpoint(
+            row=last_row,
+            balances=balances,
+            archived_through=self._archived_through_iso(),
+        )
+        if not self.checkpoints.save(new_checkpoint, generation):
+            # Пока считали, строки до точки изменились — попробуем в следующий раз
+            return None
+        return new_checkpoint
+
+    def get_all_group_balances(self) -> Dict[str, Dict[str, int]]:
+        """
+        Балансы всех групп за один проход по operationsRows
+        (от контрольной точки, если она есть): {GROUP_ID -> {person_id -> копейки}}.
+
+        В отличие от get_group_balance, здесь есть все, у кого были
+        строки, а не только текущие участники группы.
+        """
+        _, _, balances = self._scan_all_balances()
+        return balances
+
+    def _scan_all_balances(
+        self,
+    ) -> Tuple[Optional[BalanceCheckpoint], int, Dict[str, Dict[str, int]]]:
+        """
+        Контрольная точка (или None), номер последней прочитанной строки
+        и балансы всех групп по неё включительно.
+        """
+        checkpoint = self._usable_checkpoint()
+        last_row = checkpoint.row if checkpoint is not None else 0
+        balances: Dict[str, Dict[str, int]] = {
+            group: dict(people) for group, people in (checkpoint.balances if checkpoint else {}).items()
+        }
+
+        service = get_sheets_service()
+        start_row = last_row + 1 if last_row else None
+        for row_no, row in iter_values(service, SHEET_OPERATION_ROWS_RANGE, start_row=start_row):
+            last_row = row_no
+            applied = _apply_balance_row(row)
+            if applied is None:
+                continue
+            row_group_id, person_id, amount = applied
+            group_balances = balances.setdefault(row_group_id, {})
+            group_balances[person_id] = group_balances.get(person_id, 0) + amount
+
+        return checkpoint, last_row, balances
+
+    def _usable_checkpoint(self) -> Optional[BalanceCheckpoint]:
+        """
+        Контрольная точка, если она есть и посчитана по текущему
+        состоянию листа (после неё не было архивации).
+        """
+        if self.checkpoints is None:
+            return None
+        checkpoint = self.checkpoints.get()
+        if checkpoint is None:
+            return None
+        if checkpoint.archived_through != self._archived_through_iso():
+            self.checkpoints.discard()
+            return None
+        return checkpoint
+
+    def _archived_through_iso(self) -> Optional[str]:
+        if self.archive is None:
+            return None
+        archived_through = self.archive.archived_through()
+        return archived_through.isoformat() if archived_through else None
+
     def format_balance_report(self, group_id: str) -> str:
         """
         Построить текст отчёта по группе с использованием имён пользователей.
@@ -145,14 +232,12 @@ class ReportService:
 
         lines: List[str] = [f"Группа: {group_name}"]
 
+        # Имена всех участников — одним чтением листа users
+        names = self.user_repo.get_names(list(balances))
         for user_id, balance in balances.items():
-            user_info = self.user_repo.get_by_id(user_id)
-            if user_info is not None and getattr(user_info, "name", None):
-                display_name = user_info.name
-            else:
-                display_name = f"Пользователь {user_id}"
+            display_name = names.get(user_id) or f"Пользователь {user_id}"
 
-            lines.append(f"{display_name}: {balance:.2f}")
+            lines.append(f"{display_name}: {format_money(balance)}")
 
         # Если в группе нет участников или нет строк, balances будет пустым
         if len(lines) == 1:
@@ -160,6 +245,38 @@ class ReportService:
 
         return "\n".join(lines)
     
+    def build_settle_report(
+        self, group_id: str
+    ) -> Tuple[str, List[SettleTransfer], Dict[str, str]]:
+        """
+        Отчёт "Как рассчитаться": кто кому сколько передаёт,
+        чтобы балансы всех участников группы стали нулевыми.
+
+        Возвращает текст отчёта, сам план и имена участников плана
+        (для кнопок быстрой передачи).
+        """
+        group_name, balances = self.get_group_balance(group_id)
+        plan = settle_up_plan(balances)
+
+        lines: List[str] = [f"Группа: {group_name}", "Как рассчитаться:"]
+        if not plan:
+            lines.append("Все в расчёте, передавать ничего не нужно.")
+            return "\n".join(lines), plan, {}
+
+        involved = sorted({t.from_user_id for t in plan} | {t.to_user_id for t in plan})
+        names = self.user_repo.get_names(involved)
+
+        def display_name(user_id: str) -> str:
+            return names.get(user_id) or f"Пользователь {user_id}"
+
+        for transfer in plan:
+            lines.append(
+                f"{display_name(transfer.from_user_id)} → {display_name(transfer.to_user_id)}: "
+                f"{format_money(transfer.amount_cents)}"
+            )
+
+        return "\n".join(lines), plan, names
+
     def format_category_expense_report(self, group_id: str, period_code: str) -> str:
         """
         Отчёт "Затраты по категориям" за выбранный период.
@@ -180,35 +297,44 @@ class ReportService:
             start_date=start_date,
             end_date=end_date,
         )
+
+        #    Закрытые периоды перенесены в архив — дочитываем их оттуда.
+        if self.archive is not None:
+            archived_through = self.archive.archived_through()
+            if archived_through is not None and start_date <= archived_through:
+                operations += self.archive.get_operations_for_group(
+                    group_id=group_id,
+                    start_date=start_date,
+                    end_date=min(end_date, archived_through),
+                )
         # Предполагаем, что каждая операция — объект/датакласс с полями:
         # - date (datetime.date)
         # - is_expense (bool)
         # - category (str)
-        # - amount (Decimal или float)
+        # - amount_cents (int, копейки)
 
-        # 2. Фильтруем только расходы.
+        # 2. Фильтруем только расходы (отменённые операции не учитываем).
         expense_ops = [
             op for op in operations
-            if op.is_expense
+            if op.is_expense and op.active
         ]
         
-        # ОТЛАДКА: вывести количество расходов
-        print(f"Expense operations: {len(expense_ops)}")
-        print("===============================")
+        logger.debug(
+            "Expense operations: %d", len(expense_ops), extra={"rate_limit_key": "category_report_expense_ops"}
+        )
 
         if not expense_ops:
             return "За выбранный период не найдено расходов."
 
         # 3. Группируем по категориям и считаем сумму.
         from collections import defaultdict
-        from decimal import Decimal, ROUND_HALF_UP
 
-        sum_by_category: dict[str, Decimal] = defaultdict(Decimal)
+        sum_by_category: dict[str, int] = defaultdict(int)
 
         for op in expense_ops:
             # Нормализуем категорию (пустое -> "Без категории")
             category = op.category or "Без категории"
-            sum_by_category[category] += Decimal(op.amount)
+            sum_by_category[category] += op.amount_cents
 
         total_amount = sum(sum_by_category.values())
 
@@ -239,10 +365,10 @@ class ReportService:
             # Перебираем месяцы в хронологическом порядке
             for (y, m) in sorted(ops_by_month.keys()):
                 month_ops = ops_by_month[(y, m)]
-                month_sum_by_cat: dict[str, Decimal] = defaultdict(Decimal)
+                month_sum_by_cat: dict[str, int] = defaultdict(int)
                 for op in month_ops:
                     category = op.category or "Без категории"
-                    month_sum_by_cat[category] += Decimal(op.amount)
+                    month_sum_by_cat[category] += op.amount_cents
 
                 month_total = sum(month_sum_by_cat.values())
                 lines.append("")  # пустая строка между месяцами
@@ -259,7 +385,214 @@ class ReportService:
             )
 
         return "\n".join(lines)
-    
+
+    # ---------- Куб расходов ----------
+
+    def expense_cube(self, group_id: str, **dice: Iterable[str]) -> ExpenseCube:
+        """
+        Срез куба расходов по группе group_id (копия, её можно менять).
+
+        dice — дополнительные ограничения измерений, например
+        expense_cube(group_id, month=["2025-01", "2025-02"], person=["123"]).
+        Дальше — roll_up / top_k / slice самого куба.
+        """
+        with self._cube_lock:
+            cube = self._refresh_cube()
+            return cube.dice(group=[group_id.strip().upper()], **dice)
+
+    def is_cube_warm(self) -> bool:
+        """
+        Куб расходов уже построен (отчёты по нему не читают весь лист).
+        Без _cube_lock: его держат на время чтения листа, а проверку
+        вызывают из цикла событий (/healthz).
+        """
+        return self._cube is not None
+
+    def _refresh_cube(self) -> ExpenseCube:
+        """
+        Дочитать в куб операции после последней учтённой строки.
+
+        Если с прошлого раза уже записанные операции менялись (отмена,
+        архивация), куб строится заново: из архива и всего листа.
+        Вызывается под _cube_lock.
+        """
+        generation = self.operations_repo.history_generation()
+        archived_through = self._archived_through_iso()
+        if (
+            self._cube is None
+            or generation != self._cube_generation
+            or archived_through != self._cube_archived_through
+        ):
+            self._cube = ExpenseCube()
+            self._cube_row = 0
+            self._cube_generation = generation
+            self._cube_archived_through = archived_through
+            if self.archive is not None and archived_through is not None:
+                for op in self.archive.iter_operations():
+                    _add_to_cube(self._cube, op)
+
+        start_row = self._cube_row + 1 if self._cube_row else None
+        for row_no, op in self.operations_repo.iter_all(start_row=start_row):
+            self._cube_row = row_no
+            _add_to_cube(self._cube, op)
+
+        return self._cube
+
+    def format_person_expense_report(self, group_id: str, period_code: str) -> str:
+        """
+        Отчёт "Затраты по участникам" за период: сколько заплатил
+        каждый участник и его крупнейшие категории.
+        """
+        start_date, end_date = _get_period_bounds(period_code)
+        cube = self.expense_cube(group_id, month=_months_in_period(start_date, end_date))
+
+        lines: List[str] = [
+            f"Затраты по участникам за период {start_date:%d.%m.%Y}–{end_date:%d.%m.%Y}:"
+        ]
+        people = cube.top_k("person", len(cube.cells))
+        if not people:
+            return "За выбранный период не найдено расходов."
+
+        names = self.user_repo.get_names([person_id for person_id, _ in people])
+        total = cube.total()
+        for person_id, cell in people:
+            display_name = names.get(person_id) or f"Пользователь {person_id}"
+            lines.append("")
+            lines.append(
+                f"{display_name}: {format_money(cell.sum_cents)} "
+                f"({_percent(cell.sum_cents, total.sum_cents)}%, расходов: {cell.count})"
+            )
+            person_cube = cube.slice("person", person_id)
+            for category, category_cell in person_cube.top_k("category", PERSON_TOP_CATEGORIES):
+                lines.append(f"  {category}: {format_money(category_cell.sum_cents)}")
+
+        lines.append("")
+        lines.append(f"ИТОГО: {format_money(total.sum_cents)} (расходов: {total.count})")
+        return "\n".join(lines)
+
+    def format_month_trend_report(self, group_id: str, today: date | None = None) -> str:
+        """
+        Отчёт "Динамика по месяцам": затраты группы за последние
+        TREND_MONTHS месяцев с изменением к предыдущему месяцу
+        и сравнение категорий текущего месяца с прошлым.
+        """
+        if today is None:
+            today = date.today()
+
+        months: List[str] = []
+        year, month = today.year, today.month
+        for _ in range(TREND_MONTHS):
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        months.reverse()
+
+        cube = self.expense_cube(group_id, month=months)
+        by_month = cube.roll_up("month")
+
+        lines: List[str] = [f"Затраты по месяцам (последние {TREND_MONTHS}):"]
+        previous: Optional[int] = None
+        for month_key in months:
+            total = by_month.get((month_key,))
+            total_cents = total.sum_cents if total else 0
+            change = f" ({_format_change(previous, total_cents)})" if previous is not None else ""
+            lines.append(f"{month_key[5:]}.{month_key[:4]}: {format_money(total_cents)}{change}")
+            previous = total_cents
+
+        # Категории: текущий месяц против прошлого
+        current_month, prev_month = months[-1], months[-2]
+        by_category = cube.roll_up("category", "month")
+        categories = sorted({category for category, _ in by_category})
+        if categories:
+            lines.append("")
+            lines.append("Категории, текущий месяц к прошлому:")
+            for category in categories:
+                current = by_category.get((category, current_month))
+                prev = by_category.get((category, prev_month))
+                current_cents = current.sum_cents if current else 0
+                prev_cents = prev.sum_cents if prev else 0
+                if not current_cents and not prev_cents:
+                    continue
+                lines.append(
+                    f"{category}: {format_money(prev_cents)} → {format_money(current_cents)} "
+                    f"({_format_change(prev_cents, current_cents)})"
+                )
+
+        return "\n".join(lines)
+
+
+def _add_to_cube(cube: ExpenseCube, op: Operation) -> None:
+    """
+    Учесть операцию в кубе: только активные расходы,
+    участник — тот, кто заплатил.
+    """
+    if not op.is_expense or not op.active:
+        return
+    cube.add(
+        group_id=op.group_id.strip().upper(),
+        person_id=op.person_id,
+        category=op.category or "Без категории",
+        month=f"{op.date:%Y-%m}",
+        amount_cents=op.amount_cents,
+    )
+
+
+def _months_in_period(start_date: date, end_date: date) -> List[str]:
+    """
+    Месяцы периода ("YYYY-MM") — значения измерения month куба.
+    """
+    months: List[str] = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _percent(part: int, total: int) -> Decimal:
+    if total == 0:
+        return Decimal("0")
+    return (Decimal(part) / Decimal(total) * 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _format_change(previous: int, current: int) -> str:
+    """
+    Изменение к предыдущему значению: "+12.50%", "-3.00%" или "—" (не с чем сравнить).
+    """
+    if previous == 0:
+        return "—"
+    change = _percent(current - previous, previous)
+    return f"+{change}%" if change > 0 else f"{change}%"
+
+
+def _apply_balance_row(row: list[str]) -> Optional[Tuple[str, str, int]]:
+    """
+    Вклад строки operationsRows в баланс: (GROUP_ID, person_id, копейки),
+    где debit даёт +amount, credit даёт -amount.
+    None — строку не учитываем (короткая, отменённая, без суммы).
+
+    Порядок колонок operationsRows:
+    A: Group, B: Date, C: Operation, D: Person, E: Category,
+    F: Type (debit/credit), G: Amount, H: Active
+    """
+    if len(row) < 7:
+        return None
+    if len(row) > 7 and row[7].strip().upper() == "FALSE":
+        # Строка отменённой операции
+        return None
+
+    row_type = row[5].strip().lower()  # "debit" или "credit"
+    try:
+        amount_cents = to_cents(row[6])
+    except ValueError:
+        return None
+
+    if row_type == "debit":
+        return row[0].strip().upper(), row[3].strip(), amount_cents
+    if row_type == "credit":
+        return row[0].strip().upper(), row[3].strip(), -amount_cents
+    return None
+
+
 class ReportPeriod(StrEnum):
     CURRENT_MONTH = "period:current_month"
     PREV_MONTH = "period:prev_month"
@@ -327,13 +660,13 @@ def _get_period_bounds(period_code: str, today: date | None = None) -> tuple[dat
     # На случай неизвестного кода — по умолчанию текущий месяц
     return month_start_end(year, month)
 
-def _format_category_lines(sum_by_category: dict[str, "Decimal"], total_amount: "Decimal") -> list[str]:
+def _format_category_lines(sum_by_category: dict[str, int], total_amount: int) -> list[str]:
     """
     Форматирует строки вида:
     <КАТЕГОРИЯ>: СУММА (XX.XX%)
-    Сортировка по убыванию суммы.
+    Сортировка по убыванию суммы. Суммы — в копейках;
+    Decimal нужен только для процентов, по одному на категорию.
     """
-    from decimal import Decimal, ROUND_HALF_UP
 
     # Сортируем категории по сумме по убыванию
     sorted_items = sorted(sum_by_category.items(), key=lambda kv: kv[1], reverse=True)
@@ -343,8 +676,10 @@ def _format_category_lines(sum_by_category: dict[str, "Decimal"], total_amount:
         if total_amount == 0:
             percent = Decimal("0")
         else:
-            percent = (amount / total_amount * 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            percent = (Decimal(amount) / Decimal(total_amount) * 100).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            )
 
-        lines.append(f"{category}: {amount:.2f} ({percent}%)")
+        lines.append(f"{category}: {format_money(amount)} ({percent}%)")
 
     return lines
\ No newline at end of file
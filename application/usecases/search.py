@@ -0,0 +1,44 @@
+# application/usecases/search.py
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from common.tracing import trace_methods
+from domain.models.expenses import Operation
+from domain.repositories import IOperationRepository, IUserRepository
+
+
+@dataclass
+class SearchPage:
+    """
+    Одна страница результатов поиска.
+
+    - total: сколько операций найдено всего;
+    - offset: номер первой операции страницы (с нуля);
+    - operations: операции страницы, от новых к старым;
+    - names: имена авторов операций страницы {user_id -> имя}.
+    """
+
+    total: int
+    offset: int
+    operations: List[Operation] = field(default_factory=list)
+    names: Dict[str, str] = field(default_factory=dict)
+
+
+@trace_methods
+@dataclass
+class OperationSearchService:
+    """
+    Поиск операций группы по словам из комментария и категории
+    (через поисковый индекс репозитория операций).
+    """
+
+    operation_repo: IOperationRepository
+    user_repo: IUserRepository
+
+    def find(self, group_id: str, query: str, offset: int, limit: int) -> SearchPage:
+        found = self.operation_repo.search(group_id, query)
+        offset = max(0, min(offset, len(found)))
+        operations = found[offset:offset + limit]
+        names = self.user_repo.get_names(sorted({op.person_id for op in operations}))
+        return SearchPage(total=len(found), offset=offset, operations=operations, names=names)
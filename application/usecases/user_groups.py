@@ -3,9 +3,11 @@
 from dataclasses import dataclass
 from typing import Optional
 
+from common.tracing import trace_methods
 from domain.models.groups import Group, UserGroupLink
 from domain.repositories import IGroupRepository, IUserGroupRepository, IUserRepository
 
+@trace_methods
 @dataclass
 class UserGroupsService:
     """
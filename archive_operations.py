@@ -0,0 +1,60 @@
+# archive_operations.py
+"""
+Архивация закрытых периодов: перенос старых строк operations /
+operationsRows в локальный архив (ARCHIVE_DIR) и замена их в листе
+operationsRows строками входящего остатка — по одной на участника группы.
+Балансы при этом не меняются, отчёт по категориям читает архив сам.
+
+Примеры запуска:
+    python archive_operations.py --period prev_year
+    python archive_operations.py --period prev_quarter
+    python archive_operations.py --through 2024-12-31
+
+Нужны GID листов в настройках: SHEET_ID_OPERATIONS, SHEET_ID_OPERATION_ROWS.
+"""
+
+import argparse
+from datetime import date
+
+from infrastructure.archive.operation_archive import OperationFileArchive
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+
+from application.usecases.archive import ArchiveService
+from application.usecases.reports import ReportPeriod, _get_period_bounds
+from config.settings import ARCHIVE_DIR
+
+
+PERIODS = {
+    "prev_quarter": ReportPeriod.PREV_QUARTER,
+    "prev_year": ReportPeriod.PREV_YEAR,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Архивация закрытых периодов")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--period", choices=sorted(PERIODS), help="архивировать по конец периода")
+    target.add_argument("--through", help="архивировать по дату YYYY-MM-DD (конец квартала)")
+    args = parser.parse_args()
+
+    if args.period:
+        _, cutoff = _get_period_bounds(PERIODS[args.period])
+    else:
+        cutoff = date.fromisoformat(args.through)
+
+    archive_service = ArchiveService(
+        operation_repo=OperationSheetRepository(),
+        operation_row_repo=OperationRowSheetRepository(),
+        archive=OperationFileArchive(ARCHIVE_DIR),
+    )
+    report = archive_service.archive_through(cutoff)
+
+    print(f"Архив по {report.archived_through:%d.%m.%Y}")
+    print(f"Операций перенесено: {report.operations_archived}")
+    print(f"Строк операций перенесено: {report.rows_archived}")
+    print(f"Строк входящего остатка записано: {report.opening_rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# bench.py
+"""
+Бенчмарки горячих путей бота (benchmarks/) с проверкой регрессий.
+
+Примеры запуска:
+    python bench.py                          # 1k / 100k / 1M строк, сравнить с baseline
+    python bench.py --sizes 1000,100000      # без набора на миллион строк
+    python bench.py -k balance               # только сценарии с "balance" в имени
+    python bench.py --update-baseline        # записать результаты как базовые
+
+Для каждого сценария сравнивается медиана времени с benchmarks/baseline.json.
+Если сценарий стал медленнее больше чем на --threshold (доля базовой
+медианы), скрипт завершается с кодом 1. Базовые числа зависят от машины:
+обновляйте baseline.json там же, где запускается проверка.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+# Допустимое замедление относительно базовой медианы (0.5 = на 50%):
+# меньшие колебания на общих машинах — обычный шум, а N+1 или
+# квадратичный проход по листу дают замедление в разы
+DEFAULT_THRESHOLD = 0.5
+
+
+def run_benchmarks(sizes: str, results_path: str, keyword: str | None) -> int:
+    args = [
+        "benchmarks",
+        "-q",
+        "-o", "python_files=bench_*.py",
+        "--bench-sizes", sizes,
+        "--benchmark-json", results_path,
+        "--benchmark-columns", "median,iqr,rounds",
+        "--benchmark-sort", "name",
+    ]
+    if keyword:
+        args += ["-k", keyword]
+    return pytest.main(args)
+
+
+def load_results(results_path: str) -> tuple[dict, dict]:
+    """
+    Результаты pytest-benchmark: {сценарий -> {"median", "rounds"}}
+    и описание машины.
+    """
+    with open(results_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    results = {
+        bench["name"]: {"median": bench["stats"]["median"], "rounds": bench["stats"]["rounds"]}
+        for bench in data.get("benchmarks", [])
+    }
+    info = data.get("machine_info", {})
+    machine = {
+        "node": info.get("node"),
+        "machine": info.get("machine"),
+        "cpu": info.get("cpu", {}).get("brand_raw"),
+        "python": info.get("python_version"),
+    }
+    return results, machine
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict, machine: dict) -> None:
+    """
+    Записать результаты в baseline (сценарии, которые сейчас не
+    запускались, остаются как были). Запись атомарная.
+    """
+    baseline = load_baseline(path)
+    scenarios = dict(baseline.get("benchmarks", {}))
+    scenarios.update(results)
+    baseline = {
+        "stat": "median",
+        "updated": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine,
+        "benchmarks": dict(sorted(scenarios.items())),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Печатает сравнение с baseline и возвращает имена сценариев,
+    которые замедлились больше допустимого.
+    """
+    saved = baseline.get("benchmarks", {})
+    regressions = []
+    print(f"\n{'сценарий':<62} {'база, мс':>12} {'сейчас, мс':>12} {'изм.':>8}")
+    for name, current in sorted(results.items()):
+        base = saved.get(name)
+        now_ms = current["median"] * 1000
+        if base is None:
+            print(f"{name:<62} {'—':>12} {now_ms:>12.3f} {'новый':>8}")
+            continue
+        change = current["median"] / base["median"] - 1
+        mark = ""
+        if change > threshold:
+            regressions.append(name)
+            mark = "  РЕГРЕССИЯ"
+        print(f"{name:<62} {base['median'] * 1000:>12.3f} {now_ms:>12.3f} {change:>+8.0%}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей и проверка регрессий")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="размеры наборов (строк operationsRows)")
+    parser.add_argument("-k", dest="keyword", help="выражение pytest -k для выбора сценариев")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="файл с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимое замедление (доля)")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты как базовые")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results_path = os.path.join(tmp_dir, "results.json")
+        exit_code = run_benchmarks(args.sizes, results_path, args.keyword)
+        if exit_code != 0 or not os.path.exists(results_path):
+            sys.exit(exit_code or 1)
+        results, machine = load_results(results_path)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results, machine)
+        print(f"Базовые результаты записаны в {args.baseline} ({len(results)} сценариев)")
+        return
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    if regressions:
+        print(f"\nЗамедление больше {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_hot_paths.py
+"""
+Горячие пути бота на наборах данных 1k / 100k / 1M строк operationsRows
+(эмулятор Sheets без задержек — меряется работа самого бота: разбор
+строк, фильтрация, агрегация, форматирование).
+
+Сценарий с записью (create_expense_for_all) — последним: он дописывает
+строки в набор, а pytest выполняет тесты одного набора в порядке файла.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from application.usecases.expenses import ExpenseService
+from application.usecases.reports import ReportPeriod, ReportService
+from application.usecases.user_groups import UserGroupsService
+from infrastructure.google_sheets.group_repository import GroupSheetRepository
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+from transport.telegram.expense_handlers import _person_selection_keyboard
+
+
+# Сколько раз меряется сценарий с записью
+WRITE_ROUNDS = 50
+
+
+@pytest.fixture
+def services(dataset):
+    """
+    Сервисы, собранные как в main.py, но без контрольной точки балансов:
+    баланс всегда считается по всему листу.
+    """
+    group_repo = GroupSheetRepository()
+    user_group_repo = UserGroupSheetRepository()
+    user_repo = UserSheetRepository()
+    operation_repo = OperationSheetRepository()
+    user_groups = UserGroupsService(group_repo=group_repo, user_group_repo=user_group_repo, user_repo=user_repo)
+    return SimpleNamespace(
+        user_groups=user_groups,
+        operations=operation_repo,
+        reports=ReportService(
+            user_groups_svc=user_groups,
+            user_repo=user_repo,
+            group_repo=group_repo,
+            operations_repo=operation_repo,
+        ),
+        expenses=ExpenseService(
+            operation_repo=operation_repo,
+            operation_row_repo=OperationRowSheetRepository(),
+            user_group_repo=user_group_repo,
+        ),
+    )
+
+
+def test_get_group_balance(benchmark, dataset, services):
+    group_name, balances = benchmark(services.reports.get_group_balance, dataset.group_id)
+
+    assert sorted(balances) == sorted(dataset.member_ids)
+    assert sum(balances.values()) == 0
+
+
+@pytest.mark.parametrize("period", list(ReportPeriod), ids=[p.name.lower() for p in ReportPeriod])
+def test_format_category_expense_report(benchmark, dataset, services, period):
+    text = benchmark(services.reports.format_category_expense_report, dataset.group_id, period.value)
+
+    assert text
+
+
+def test_get_operations_for_group(benchmark, dataset, services):
+    operations = benchmark(services.operations.get_operations_for_group, dataset.group_id)
+
+    assert operations and all(op.group_id == dataset.group_id for op in operations)
+
+
+def test_member_keyboard(benchmark, dataset, services):
+    """
+    /operation_for: участники группы, их имена и клавиатура выбора.
+    """
+
+    def build():
+        member_ids = services.user_groups.user_group_repo.get_member_ids(dataset.group_id)
+        names = services.user_groups.user_repo.get_names(member_ids)
+        return _person_selection_keyboard(member_ids, names)
+
+    keyboard = benchmark(build)
+
+    assert len(keyboard.inline_keyboard) == len(dataset.member_ids)
+
+
+def test_create_expense_for_all(benchmark, dataset, services):
+    # Число повторов фиксировано: каждый добавляет в набор операцию
+    op_id = benchmark.pedantic(
+        services.expenses.create_expense_for_all,
+        kwargs={
+            "user_id": dataset.member_ids[0],
+            "group_id": dataset.group_id,
+            "category": "Реклама",
+            "comment": "бенчмарк",
+            "amount_cents": 150_000,
+        },
+        rounds=WRITE_ROUNDS,
+    )
+
+    assert op_id
@@ -0,0 +1,55 @@
+# benchmarks/conftest.py
+"""
+Бенчмарки запускаются через bench.py: он передаёт --bench-sizes,
+сохраняет результаты pytest-benchmark и сравнивает их с baseline.json.
+"""
+
+import pytest
+
+from benchmarks.datasets import generate_dataset
+from infrastructure.google_sheets import client
+from infrastructure.google_sheets.emulator import SheetsEmulator
+from tests.conftest import reset_process_caches
+
+
+DEFAULT_SIZES = "1000,100000,1000000"
+
+
+def size_label(rows: int) -> str:
+    """
+    1000 -> "1k", 100000 -> "100k", 1000000 -> "1M".
+    """
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1000 and rows % 1000 == 0:
+        return f"{rows // 1000}k"
+    return str(rows)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-sizes",
+        default=DEFAULT_SIZES,
+        help="Размеры наборов данных (строк operationsRows) через запятую",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "dataset" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--bench-sizes").split(",") if size.strip()]
+        metafunc.parametrize("dataset", sizes, ids=[size_label(size) for size in sizes], indirect=True, scope="session")
+
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    """
+    Набор данных нужного размера в эмуляторе Sheets. Клиент переключается
+    на эмулятор так же, как бот при SHEETS_EMULATOR=true.
+    """
+    data = generate_dataset(request.param)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(client, "SHEETS_EMULATOR", True)
+        mp.setattr(client, "_emulator", SheetsEmulator(data.spreadsheet))
+        reset_process_caches()
+        yield data
+        reset_process_caches()
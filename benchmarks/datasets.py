@@ -0,0 +1,100 @@
+# benchmarks/datasets.py
+"""
+Сгенерированные данные для бенчмарков: таблица эмулятора Sheets
+с заданным числом строк operationsRows.
+
+На каждую затрату «за всех» приходится 1 + MEMBERS_PER_GROUP строк
+operationsRows (debit плательщика и credit каждого участника), поэтому
+операций примерно в MEMBERS_PER_GROUP + 1 раз меньше строк. Групп —
+одна на ROWS_PER_GROUP строк, операции распределены по ним по кругу;
+даты — равномерно за последние HISTORY_DAYS дней, чтобы у каждого
+ReportPeriod (текущий и прошлый месяц, квартал, год) были данные.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from common.money import split_cents
+from config.settings import SHEET_ID_USER_GROUPS
+from domain.models.expenses import CATEGORIES, Operation, OperationRow
+from infrastructure.google_sheets.emulator import EmulatorSpreadsheet
+from infrastructure.google_sheets.operation_repository import operation_to_values
+from infrastructure.google_sheets.operation_row_repository import operation_row_to_values
+
+
+MEMBERS_PER_GROUP = 5
+ROWS_PER_GROUP = 10_000
+HISTORY_DAYS = 730
+
+
+@dataclass
+class Dataset:
+    """
+    Таблица и группа, по которой меряются сценарии (самая первая,
+    в ней не меньше операций, чем в остальных).
+    """
+
+    rows: int
+    spreadsheet: EmulatorSpreadsheet
+    group_id: str
+    member_ids: List[str]
+
+
+def group_id_for(index: int) -> str:
+    return f"G{index:05d}"
+
+
+def generate_dataset(rows: int, seed: int = 1) -> Dataset:
+    """
+    Таблица эмулятора примерно с rows строками operationsRows.
+    Строки кладутся в листы напрямую (load_rows), минуя API, — так быстрее.
+    """
+    rnd = random.Random(seed)
+    groups = max(1, rows // ROWS_PER_GROUP)
+    members = {
+        group_id_for(g): [str(100_000 + g * MEMBERS_PER_GROUP + m) for m in range(MEMBERS_PER_GROUP)]
+        for g in range(groups)
+    }
+
+    spreadsheet = EmulatorSpreadsheet(sheet_ids={"userGroups": SHEET_ID_USER_GROUPS})
+    spreadsheet.load_rows("Groups", [["Id"]] + [[group_id] for group_id in members])
+    spreadsheet.load_rows("users", [["userId", "userName"]] + [
+        [uid, f"Участник {uid}"] for group_members in members.values() for uid in group_members
+    ])
+    spreadsheet.load_rows("userGroups", [["userId", "groupId"]] + [
+        [uid, group_id] for group_id, group_members in members.items() for uid in group_members
+    ])
+
+    operations_sheet: List[list] = [["Group", "Date", "Id"]]
+    rows_sheet: List[list] = [["Group", "Date", "Operation"]]
+    group_ids = list(members)
+    now = datetime.now().replace(microsecond=0)
+    operations = rows // (MEMBERS_PER_GROUP + 1)
+    for i in range(operations):
+        group_id = group_ids[i % groups]
+        group_members = members[group_id]
+        payer = rnd.choice(group_members)
+        op = Operation(
+            group_id=group_id,
+            date=now - timedelta(seconds=rnd.randrange(HISTORY_DAYS * 24 * 3600)),
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            operation_type="expense",
+            person_id=payer,
+            is_expense=True,
+            category=rnd.choice(CATEGORIES),
+            comment=f"затрата {i}",
+            amount_cents=rnd.randrange(100, 1_000_000),
+        )
+        operations_sheet.append(operation_to_values(op))
+        op_rows = [OperationRow(group_id, op.date, op.id, payer, op.category, "debit", op.amount_cents)]
+        for uid, share in split_cents(op.amount_cents, group_members).items():
+            op_rows.append(OperationRow(group_id, op.date, op.id, uid, op.category, "credit", share))
+        rows_sheet.extend(operation_row_to_values(row) for row in op_rows)
+
+    spreadsheet.load_rows("operations", operations_sheet)
+    spreadsheet.load_rows("operationsRows", rows_sheet)
+    first = group_ids[0]
+    return Dataset(rows=len(rows_sheet) - 1, spreadsheet=spreadsheet, group_id=first, member_ids=members[first])
@@ -0,0 +1,190 @@
+# common/logger.py
+"""
+Структурированное логирование бота.
+
+- Записи из кода (любого потока) попадают в QueueHandler: это только
+  положить запись в очередь. Форматирование и запись в stderr делает
+  QueueListener в своём потоке, цикл событий на вывод не ждёт.
+- Вывод — JSON по строке на запись (или обычный текст для отладки).
+- У каждого апдейта свой correlation id (UpdateCorrelationMiddleware
+  в transport/telegram/logging_middleware.py); он и ID трассы
+  (common/tracing.py) добавляются к каждой записи этого апдейта.
+- Уровни по модулям: LOG_MODULE_LEVELS="aiogram=WARNING,infrastructure=DEBUG".
+- Частые записи на горячем пути ограничиваются по ключу:
+      logger.debug("...", extra={"rate_limit_key": "expense_ops"})
+  пишет не чаще раза в LOG_RATE_LIMIT_SECONDS, а в следующую запись
+  с тем же ключом добавляет, сколько было пропущено (suppressed).
+
+Использование:
+    from common.logger import get_logger
+    logger = get_logger(__name__)
+    logger.info("Digests sent", extra={"period": "2025-01", "sent": 12})
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+from common.tracing import current_trace_id
+
+
+# Correlation id текущего апдейта ("-" вне апдейта)
+correlation_id: contextvars.ContextVar[str] = contextvars.ContextVar("correlation_id", default="-")
+
+# Атрибуты LogRecord, которые не относятся к extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "correlation_id",
+    "trace_id",
+    "rate_limit_key",
+}
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи correlation id и ID трассы. Стоит на QueueHandler,
+    т.е. выполняется в потоке, который пишет в лог (там контекст апдейта).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        record.trace_id = current_trace_id() or ""
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Записи с extra={"rate_limit_key": ключ} пропускаются не чаще раза
+    в interval_seconds на ключ. Следующая пропущенная запись получает
+    поле suppressed — сколько записей с этим ключом было отброшено.
+    Записи без ключа проходят всегда.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        # ключ -> [время последней записи, сколько пропущено с тех пор]
+        self._keys: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is not None and now - entry[0] < self.interval_seconds:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            self._keys[key] = [now, 0]
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна запись — одна строка JSON: время (UTC), уровень, логгер,
+    сообщение, correlation id, ID трассы, поля из extra и исключение.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        trace_id = getattr(record, "trace_id", "")
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не склеивает traceback с сообщением
+    (стандартный prepare() кладёт его в msg): traceback уходит
+    в exc_text и выводится отдельным полем exc.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Текстовый формат для локальной отладки (LOG_JSON=false)
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+
+
+def _parse_module_levels(spec: str) -> Dict[str, str]:
+    """
+    "aiogram=WARNING, infrastructure=DEBUG" -> {"aiogram": "WARNING", ...}
+    """
+    levels: Dict[str, str] = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(
+    level: str = "INFO",
+    module_levels: str = "",
+    json_output: bool = True,
+    rate_limit_seconds: float = 60.0,
+) -> logging.handlers.QueueListener:
+    """
+    Настраивает корневой логгер: QueueHandler -> очередь -> QueueListener
+    (свой поток) -> stderr. Возвращает запущенный listener; при остановке
+    процесса нужно вызвать listener.stop(), чтобы дописать очередь.
+    """
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(RateLimitFilter(rate_limit_seconds))
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in _parse_module_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
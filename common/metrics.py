@@ -0,0 +1,315 @@
+# common/metrics.py
+"""
+Метрики процесса в формате Prometheus (text exposition 0.0.4).
+
+Свой маленький реестр вместо prometheus_client: нужны только
+счётчики, гистограммы и значения, которые считаются при чтении
+(длины очередей и т.п.). Отдаёт их HTTP-сервер метрик
+(transport/http/metrics_server.py) по адресу /metrics.
+
+Все метрики процесса регистрируются в общем реестре metrics:
+    SHEETS_READS = metrics.counter("sheets_reads_total", "...", ("sheet",))
+    SHEETS_READS.inc(sheet="operations")
+"""
+
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from common.logger import get_logger
+from common.tracing import tracer
+
+
+# Границы корзин гистограмм по умолчанию: время в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Границы корзин для размеров (строк, байт)
+SIZE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelValues = Tuple[str, ...]
+
+logger = get_logger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Монотонно растущий счётчик с метками.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Гистограмма с метками: число наблюдений, сумма и накопленные корзины.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счётчики корзин..., +Inf], сумма
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        """
+        with HISTOGRAM.time(method="get"): ... — наблюдение длительности блока.
+        """
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                    )
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class CallbackMetric(_Metric):
+    """
+    Значения, которые считаются в момент чтения метрик:
+    func() -> {значения меток -> число} (или просто число без меток).
+    kind — "gauge" (длина очереди) или "counter" (счётчики чужого объекта).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], object],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.func = func
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        try:
+            values = self.func()
+        except Exception as e:
+            logger.warning("Metric %s failed: %r", self.name, e)
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if not isinstance(key, tuple):
+                key = (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса. Имя метрики регистрируется один раз:
+    повторная регистрация (например, register_* вызвали снова) заменяет
+    значения-функции и возвращает уже созданные счётчики и гистограммы.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help_text, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], object],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        with self._lock:
+            self._metrics[name] = CallbackMetric(name, help_text, func, labelnames, kind)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, name: str, factory: Callable[[], _Metric]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+
+# Общий реестр метрик процесса
+metrics = MetricsRegistry()
+
+REPOSITORY_CALLS = metrics.counter(
+    "repository_calls_total",
+    "Вызовы методов репозиториев",
+    ("repository", "method", "status"),
+)
+REPOSITORY_SECONDS = metrics.histogram(
+    "repository_call_seconds",
+    "Длительность вызовов методов репозиториев",
+    ("repository", "method"),
+)
+
+
+def instrument_methods(cls: type) -> type:
+    """
+    Декоратор класса репозитория: каждый публичный метод считает
+    вызовы (repository_calls_total) и время (repository_call_seconds)
+    и открывает span "<Класс>.<метод>" в текущей трассе.
+
+    У методов-генераторов (iter_*) время считается до конца перебора.
+    """
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(func):
+            continue
+        setattr(cls, name, _instrumented(cls.__name__, name, func))
+    return cls
+
+
+def _instrumented(repository: str, method: str, func: Callable) -> Callable:
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs) -> Iterable:
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                with tracer.span(f"{repository}.{method}"):
+                    yield from func(*args, **kwargs)
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                REPOSITORY_CALLS.inc(repository=repository, method=method, status=status)
+                REPOSITORY_SECONDS.observe(
+                    time.perf_counter() - started, repository=repository, method=method
+                )
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            with tracer.span(f"{repository}.{method}"):
+                return func(*args, **kwargs)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            REPOSITORY_CALLS.inc(repository=repository, method=method, status=status)
+            REPOSITORY_SECONDS.observe(time.perf_counter() - started, repository=repository, method=method)
+
+    return wrapper
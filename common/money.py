@@ -0,0 +1,81 @@
+# common/money.py
+"""
+Деньги внутри приложения — целые копейки (int).
+
+Переводы в/из рублей только на границах:
+- разбор ввода пользователя и ячеек таблицы — parse_money / to_cents;
+- запись в таблицу — cents_to_units (число в рублях);
+- показ пользователю — format_money.
+"""
+
+import math
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+CENTS_PER_UNIT = 100
+
+
+def parse_money(text: str) -> int | None:
+    """
+    Сумма из текста пользователя: "1500", "123,45", "1 500.50" -> копейки.
+    Лишние знаки после запятой округляются (половина — вверх).
+
+    Возвращает None, если это не число.
+    """
+    # Пробелы (в том числе неразрывные) — разделители разрядов
+    normalized = text.replace(" ", "").replace("\u00a0", "").replace(",", ".")
+    try:
+        value = Decimal(normalized)
+    except InvalidOperation:
+        return None
+    if not value.is_finite():
+        return None
+    return int((value * CENTS_PER_UNIT).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def to_cents(value) -> int:
+    """
+    Сумма из ячейки таблицы (число или строка в рублях) -> копейки.
+
+    Это горячий путь чтения листов, поэтому без Decimal: для сумм
+    с копейками точности float хватает с запасом. Старые строки
+    с дробными долями (например, 333.3333) округляются до копейки.
+    Бросает ValueError, если это не число (в том числе "inf" и "nan").
+    """
+    if isinstance(value, str):
+        value = value.replace(",", ".").strip()
+    units = float(value)
+    if not math.isfinite(units):
+        raise ValueError(f"Сумма {value!r} — не число.")
+    return round(units * CENTS_PER_UNIT)
+
+
+def cents_to_units(cents: int) -> float:
+    """
+    Копейки -> рубли для записи числом в ячейку таблицы.
+    """
+    return cents / CENTS_PER_UNIT
+
+
+def format_money(cents: int) -> str:
+    """
+    Копейки -> текст "1500.00" / "-12.30".
+    """
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{sign}{units}.{rest:02d}"
+
+
+def split_cents(total: int, member_ids: list[str]) -> dict[str, int]:
+    """
+    Разделить total копеек поровну между участниками.
+
+    Копейки остатка достаются по одной первым участникам в порядке
+    сортировки id — одинаково при каждом расчёте, и сумма долей
+    всегда равна total.
+    """
+    if not member_ids:
+        return {}
+    ordered = sorted(member_ids)
+    base, remainder = divmod(total, len(ordered))
+    return {uid: base + (1 if i < remainder else 0) for i, uid in enumerate(ordered)}
@@ -0,0 +1,346 @@
+# common/tracing.py
+"""
+Лёгкая трассировка апдейтов: от хэндлера до HTTP-запросов к Sheets.
+
+Один апдейт Telegram — одна трасса. Корневой span открывает
+middleware (transport/telegram/tracing_middleware.py), вложенные —
+методы сервисов и репозиториев (trace_methods / instrument_methods)
+и каждый HTTP-запрос к Sheets (infrastructure/google_sheets/client.py).
+
+Текущий span хранится в contextvars, поэтому вложенность сохраняется
+и в asyncio.to_thread (он копирует контекст в поток). Вне трассы
+(фоновые задачи, CLI) span() ничего не делает.
+
+Трасса выгружается целиком, когда закрывается корневой span, и только
+если апдейт был медленным (дольше slow_seconds), упал с ошибкой или
+попал в случайную выборку sample_rate. Выгрузка — в фоновом потоке,
+цикл событий на запись не ждёт.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+# common.logger сам импортирует этот модуль (ID трассы в логах),
+# поэтому логгер берём напрямую из logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """
+    Один участок работы: имя, время начала и конца (нс от эпохи),
+    атрибуты и статус ("ok" / "error").
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: str = ""
+
+    @property
+    def duration_seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_seconds * 1000, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class _Trace:
+    """
+    Закрытые span'ы одной трассы (их закрывают разные потоки).
+    """
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.has_error = False
+
+    def finish(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+            if span.status == "error":
+                self.has_error = True
+
+
+# (трасса, текущий span) — None вне трассы
+_current: contextvars.ContextVar[Optional[tuple[_Trace, Span]]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+def _restore(token: contextvars.Token, previous: Optional[tuple[_Trace, Span]]) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Генератор доперебирали в другом контексте (другом потоке)
+        _current.set(previous)
+
+
+class SpanExporter:
+    """
+    Выгрузка готовых трасс в фоновом потоке: export() только кладёт
+    трассу в очередь, _write() вызывается из потока-писателя.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.SimpleQueue[List[Span]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        self._queue.put(spans)
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self._write(spans)
+            except Exception as e:
+                logger.warning("Trace export failed: %r", e)
+
+    def _write(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+class JsonlSpanExporter(SpanExporter):
+    """
+    Span'ы в локальный файл JSON Lines: по строке на span.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        super().__init__()
+
+    def _write(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """
+    Трассы в коллектор OpenTelemetry по OTLP/HTTP в JSON
+    (POST на endpoint, обычно http://localhost:4318/v1/traces).
+    """
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        super().__init__()
+
+    def _payload(self, spans: List[Span]) -> dict:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+                ],
+                # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+                "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "common.tracing"}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+    def _write(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self._payload(spans), default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer:
+    """
+    Открывает span'ы и решает, выгружать ли трассу.
+
+    - slow_seconds: трассы дольше этого выгружаются всегда;
+    - sample_rate: доля быстрых трасс, которые тоже выгружаются (0..1);
+    - трассы с ошибкой выгружаются всегда.
+
+    Без exporter трассировка выключена: root_span и span ничего не делают.
+    """
+
+    def __init__(self) -> None:
+        self.exporter: Optional[SpanExporter] = None
+        self.slow_seconds = 1.0
+        self.sample_rate = 0.0
+
+    def configure(self, exporter: Optional[SpanExporter], slow_seconds: float, sample_rate: float) -> None:
+        self.exporter = exporter
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def root_span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Начать новую трассу (один апдейт). Выгружает её при выходе,
+        если она медленная, с ошибкой или попала в выборку.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        trace = _Trace(_new_id(16))
+        span = Span(name, trace.trace_id, _new_id(8), None, time.time_ns(), attributes=dict(attributes))
+        token = _current.set((trace, span))
+        try:
+            yield span
+        except BaseException as e:
+            span.status, span.error = "error", repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            trace.finish(span)
+            if self._should_export(trace, span):
+                with trace.lock:
+                    spans = sorted(trace.spans, key=lambda s: s.start_ns)
+                self.exporter.export(spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Вложенный span в текущей трассе. Вне трассы — ничего не делает
+        (yield None), так что вызывать можно откуда угодно.
+        """
+        current = _current.get()
+        if current is None:
+            yield None
+            return
+
+        trace, parent = current
+        span = Span(name, trace.trace_id, _new_id(8), parent.span_id, time.time_ns(), attributes=dict(attributes))
+        token = _current.set((trace, span))
+        try:
+            yield span
+        except BaseException as e:
+            span.status, span.error = "error", repr(e)
+            raise
+        finally:
+            _restore(token, current)
+            span.end_ns = time.time_ns()
+            trace.finish(span)
+
+    def _should_export(self, trace: _Trace, root: Span) -> bool:
+        if trace.has_error or root.duration_seconds >= self.slow_seconds:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+def current_trace_id() -> Optional[str]:
+    """
+    ID текущей трассы (None вне трассы).
+    """
+    current = _current.get()
+    return current[0].trace_id if current is not None else None
+
+
+# Общий трассировщик процесса; включается в main.py (tracer.configure)
+tracer = Tracer()
+
+
+def traced(name: str, func: Callable) -> Callable:
+    """
+    Обёртка функции в span с именем name. У генераторов span
+    длится до конца перебора.
+    """
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs) -> Iterable:
+            with tracer.span(name):
+                yield from func(*args, **kwargs)
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def trace_methods(cls: type) -> type:
+    """
+    Декоратор класса сервиса: каждый публичный метод — span
+    "<Класс>.<метод>" в текущей трассе.
+    """
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(func):
+            continue
+        setattr(cls, name, traced(f"{cls.__name__}.{name}", func))
+    return cls
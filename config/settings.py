@@ -20,4 +20,104 @@ SHEET_ID_USER_GROUPS = 1924028603
 
 # Диапазоны для операций
 SHEET_OPERATIONS_RANGE = "operations!A2:J"       # Date, Id, OperationType, Person, Category, Comment, Amount, Active
-SHEET_OPERATION_ROWS_RANGE = "operationsRows!A2:J"  # Date, Operation, Person, IsExpense, Category, Type, Amount, Active
\ No newline at end of file
+SHEET_OPERATION_ROWS_RANGE = "operationsRows!A2:J"  # Date, Operation, Person, IsExpense, Category, Type, Amount, Active
+
+# Планировщик апдейтов (transport/telegram/update_scheduler.py)
+# Сколько апдейтов разных пользователей обрабатываем одновременно
+UPDATE_MAX_CONCURRENCY = int(os.getenv("UPDATE_MAX_CONCURRENCY", "8"))
+# Сколько апдейтов одного пользователя может ждать в очереди,
+# лишние отбрасываются
+UPDATE_MAX_QUEUE_PER_USER = int(os.getenv("UPDATE_MAX_QUEUE_PER_USER", "5"))
+
+# Сколько секунд можно переиспользовать результат чтения диапазона Sheets
+# (одновременные одинаковые чтения объединяются всегда, 0 — без повторного
+# использования после завершения)
+SHEETS_READ_FRESHNESS_SECONDS = float(os.getenv("SHEETS_READ_FRESHNESS_SECONDS", "0"))
+
+# GID листов operations и operationsRows (sheetId) — для записи операций
+# вместе со строками одним spreadsheets.batchUpdate (appendCells).
+# Если не заданы, пакетная запись идёт двумя values.append.
+_sheet_id_operations = os.getenv("SHEET_ID_OPERATIONS")
+_sheet_id_operation_rows = os.getenv("SHEET_ID_OPERATION_ROWS")
+SHEET_ID_OPERATIONS = int(_sheet_id_operations) if _sheet_id_operations else None
+SHEET_ID_OPERATION_ROWS = int(_sheet_id_operation_rows) if _sheet_id_operation_rows else None
+
+# Импорт истории затрат из CSV (import_expenses.py)
+# Сколько операций записываем одним пакетным вызовом
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# Минимальная пауза между пакетами, секунд (квота Sheets — ~60 записей в минуту)
+IMPORT_MIN_INTERVAL_SECONDS = float(os.getenv("IMPORT_MIN_INTERVAL_SECONDS", "1.5"))
+
+# По сколько строк читать большие листы при потоковом чтении (выгрузки и т.п.)
+SHEETS_READ_CHUNK_ROWS = int(os.getenv("SHEETS_READ_CHUNK_ROWS", "5000"))
+
+# Выгрузка журнала /export: до скольких байт файл держится в памяти,
+# дальше SpooledTemporaryFile переносит его на диск
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# Архив закрытых периодов (archive_operations.py): каталог с CSV-файлами,
+# куда переносятся старые строки operations / operationsRows
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# Контрольная точка балансов (balance_checkpoints.py): файл и как часто
+# (секунд) фоновая задача продвигает её до конца листа operationsRows
+BALANCE_CHECKPOINT_FILE = os.getenv("BALANCE_CHECKPOINT_FILE", "balance_checkpoints.json")
+BALANCE_CHECKPOINT_INTERVAL_SECONDS = float(os.getenv("BALANCE_CHECKPOINT_INTERVAL_SECONDS", "600"))
+
+# Фоновые подгрузки диалога учёта операции (dialog_prefetch.py): сколько
+# секунд хранить их для брошенного диалога (его не завершили и не начали заново)
+DIALOG_PREFETCH_TTL_SECONDS = float(os.getenv("DIALOG_PREFETCH_TTL_SECONDS", "1800"))
+
+# Рассылка итогов месяца всем группам (transport/telegram/digests.py).
+# Включается явно; после DIGEST_HOUR (по локальному времени сервера)
+# первого дня месяца участникам уходят итоги прошлого месяца
+DIGEST_ENABLED = os.getenv("DIGEST_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", "10"))
+# Сколько сообщений в секунду отправляем (лимит Telegram на рассылку — ~30)
+DIGEST_MESSAGES_PER_SECOND = float(os.getenv("DIGEST_MESSAGES_PER_SECOND", "20"))
+# Файл с отметкой, за какой месяц и кому итоги уже отправлены
+DIGEST_STATE_FILE = os.getenv("DIGEST_STATE_FILE", "digest_state.json")
+
+# Идемпотентность записей (infrastructure/idempotency): журнал ключей
+# "сообщение Telegram -> id созданной операции" и сколько последних
+# ключей помнить. Повторная доставка того же сообщения не создаёт дубль
+IDEMPOTENCY_FILE = os.getenv("IDEMPOTENCY_FILE", "idempotency_keys.jsonl")
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# HTTP-сервер мониторинга (transport/http/metrics_server.py): /metrics
+# в формате Prometheus и /healthz. METRICS_PORT=0 — сервер не запускается
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8090"))
+
+# Трассировка апдейтов (common/tracing.py): куда выгружать трассы —
+# "jsonl" (локальный файл TRACING_FILE), "otlp" (коллектор OpenTelemetry
+# по OTLP/HTTP, TRACING_OTLP_ENDPOINT) или "" — выключено
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "").strip().lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Апдейты дольше стольких секунд выгружаются всегда (и упавшие тоже),
+# из остальных — случайная доля TRACING_SAMPLE_RATE (0..1)
+TRACING_SLOW_UPDATE_SECONDS = float(os.getenv("TRACING_SLOW_UPDATE_SECONDS", "1.0"))
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0"))
+
+# Логирование (common/logger.py): общий уровень, уровни по модулям
+# ("aiogram.event=WARNING,infrastructure=DEBUG"), JSON или текст,
+# и как часто (секунд) пропускать частые записи с одним rate_limit_key
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "aiogram.event=WARNING")
+LOG_JSON = os.getenv("LOG_JSON", "true").strip().lower() in ("1", "true", "yes")
+LOG_RATE_LIMIT_SECONDS = float(os.getenv("LOG_RATE_LIMIT_SECONDS", "60"))
+
+# Эмулятор Google Sheets (infrastructure/google_sheets/emulator.py) вместо
+# настоящей таблицы — для локального запуска бота без credentials.json.
+# Данные живут в памяти процесса; SHEETS_EMULATOR_SEED_FILE — JSON
+# с начальными листами. Задержка (постоянная и на КБ запроса/ответа)
+# и доля запросов, которые падают ошибками SHEETS_EMULATOR_ERROR_STATUSES
+SHEETS_EMULATOR = os.getenv("SHEETS_EMULATOR", "false").strip().lower() in ("1", "true", "yes")
+SHEETS_EMULATOR_SEED_FILE = os.getenv("SHEETS_EMULATOR_SEED_FILE", "")
+SHEETS_EMULATOR_LATENCY_SECONDS = float(os.getenv("SHEETS_EMULATOR_LATENCY_SECONDS", "0"))
+SHEETS_EMULATOR_SECONDS_PER_KB = float(os.getenv("SHEETS_EMULATOR_SECONDS_PER_KB", "0"))
+SHEETS_EMULATOR_ERROR_RATE = float(os.getenv("SHEETS_EMULATOR_ERROR_RATE", "0"))
+SHEETS_EMULATOR_ERROR_STATUSES = tuple(
+    int(status) for status in os.getenv("SHEETS_EMULATOR_ERROR_STATUSES", "429,500,503").split(",") if status.strip()
+)
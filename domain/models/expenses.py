@@ -1,11 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Literal
+from typing import List, Literal, Tuple
 
 
 OperationType = Literal["expense", "transfer"]
 RowType = Literal["debit", "credit"]
 
+# Список категорий затрат
+CATEGORIES = ["Реклама", "Релизы", "Контент", "Концерты", "Прочее"]
+
 
 @dataclass
 class Operation:
@@ -17,7 +20,7 @@ class Operation:
     is_expense: bool       # True, если это строка затрат
     category: str
     comment: str
-    amount: float
+    amount_cents: int      # сумма в копейках
     active: bool = True
 
 
@@ -29,5 +32,20 @@ class OperationRow:
     person_id: str
     category: str
     row_type: RowType      # "debit" или "credit"
-    amount: float
+    amount_cents: int      # сумма в копейках
     active: bool = True
+
+
+@dataclass
+class OperationPage:
+    """
+    Страница журнала операций группы.
+
+    - items: (номер строки хранилища, операция), от новых к старым;
+    - has_older / has_newer: есть ли операции раньше / позже страницы.
+    Номера строк — курсоры для следующей страницы.
+    """
+
+    items: List[Tuple[int, Operation]] = field(default_factory=list)
+    has_older: bool = False
+    has_newer: bool = False
@@ -1,12 +1,14 @@
 # domain/repositories.py
 
-from typing import Protocol, Optional
+from typing import Callable, Iterable, Iterator, Protocol, Optional, TypeVar
 from domain.models.groups import Group, UserGroupLink
 from domain.models.users import UserInfo
-from domain.models.expenses import Operation, OperationRow
+from domain.models.expenses import Operation, OperationPage, OperationRow
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import date
 
+T = TypeVar("T")
+
 class IUserRepository(Protocol):
     def get_by_id(self, user_id: str) -> Optional[UserInfo]:
         ...
@@ -14,6 +16,21 @@ class IUserRepository(Protocol):
     def create_if_not_exists(self, user_id: str, name: str) -> UserInfo:
         ...
 
+    def get_names(self, user_ids: list[str]) -> dict[str, str]:
+        """
+        Получить имена сразу нескольких пользователей за одно чтение.
+
+        Возвращает:
+        - словарь {user_id -> имя} только для найденных пользователей с именем.
+        """
+        ...
+
+    def get_all_names(self) -> dict[str, str]:
+        """
+        Имена всех пользователей за одно чтение: {user_id -> имя}.
+        """
+        ...
+
 class IGroupRepository(Protocol):
     """
     Интерфейс (контракт) для работы с таблицей Groups.
@@ -79,6 +96,20 @@ class IUserGroupRepository(Protocol):
         """
         ...
 
+    def get_member_ids(self, group_id: str) -> list[str]:
+        """
+        Получить список user_id всех участников группы
+        (сравнение group_id регистронезависимое).
+        """
+        ...
+
+    def get_all_members(self) -> dict[str, list[str]]:
+        """
+        Участники всех групп за одно чтение: {GROUP_ID -> [user_id]}
+        (group_id в верхнем регистре).
+        """
+        ...
+
 
 class IOperationRepository(Protocol):
     """
@@ -95,6 +126,24 @@ class IOperationRepository(Protocol):
         """
         ...
 
+    def create_batch(self, ops: list[Operation], rows: list[OperationRow]) -> None:
+        """
+        Сохранить сразу несколько операций вместе с их строками
+        operationsRows (одним обращением к хранилищу, если оно это умеет).
+
+        Параметры:
+        - ops: список объектов Operation;
+        - rows: все строки OperationRow этих операций.
+        """
+        ...
+
+    def find_written(self, operation_ids: list[str]) -> tuple[set[str], set[str]]:
+        """
+        Какие из операций уже записаны: (id, чья строка есть в operations,
+        id, чьи строки есть в operationsRows).
+        """
+        ...
+
     def get_operations_for_group(
         self,
         group_id: str,
@@ -114,6 +163,85 @@ class IOperationRepository(Protocol):
         """
         ...
 
+    def iter_operations_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[Operation]:
+        """
+        То же, что get_operations_for_group, но операции отдаются
+        по одной, без загрузки всего листа в память (для выгрузок).
+        """
+        ...
+
+    def iter_all(self, start_row: int | None = None) -> Iterator[tuple[int, Operation]]:
+        """
+        Все операции всех групп вместе с номерами строк хранилища,
+        начиная со строки start_row (None — с начала).
+        """
+        ...
+
+    def get_by_id(self, operation_id: str) -> Optional[Operation]:
+        """
+        Операция по id или None.
+        """
+        ...
+
+    def get_last_active_for_person(self, group_id: str, person_id: str) -> Optional[Operation]:
+        """
+        Последняя активная операция, зарегистрированная пользователем в группе.
+        """
+        ...
+
+    def get_page_for_group(
+        self,
+        group_id: str,
+        limit: int,
+        before_row: int | None = None,
+        after_row: int | None = None,
+    ) -> OperationPage:
+        """
+        Страница журнала группы по порядку записи: limit операций
+        до строки before_row (None — самые новые) или после after_row.
+        Читаются только строки страницы.
+        """
+        ...
+
+    def search(self, group_id: str, query: str) -> list[Operation]:
+        """
+        Полнотекстовый поиск: активные операции группы, в комментарии
+        или категории которых есть все слова запроса (по началу слова),
+        от новых к старым.
+        """
+        ...
+
+    def history_generation(self) -> int:
+        """
+        Счётчик изменений уже записанных операций (отмена, сжатие).
+        Пока он не изменился, новые операции только дописываются в конец.
+        """
+        ...
+
+    def set_active(self, operation_id: str, active: bool) -> bool:
+        """
+        Проставить флаг Active операции и всех её строк.
+        Возвращает False, если операция не найдена.
+        """
+        ...
+
+    def compact(
+        self,
+        op_row_numbers: list[int],
+        row_row_numbers: list[int],
+        opening_rows: list[OperationRow],
+    ) -> None:
+        """
+        Атомарно удалить строки операций и строк операций по номерам
+        (из iter_all) и дописать строки входящего остатка.
+        """
+        ...
+
 
 class IOperationRowRepository(Protocol):
     """
@@ -128,3 +256,92 @@ class IOperationRowRepository(Protocol):
         - rows: список объектов OperationRow.
         """
         ...
+
+    def iter_rows_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[OperationRow]:
+        """
+        Строки операций группы за период, по одной
+        (без загрузки всего листа в память).
+        """
+        ...
+
+    def iter_all(self, start_row: int | None = None) -> Iterator[tuple[int, OperationRow]]:
+        """
+        Все строки операций всех групп вместе с номерами строк
+        хранилища, начиная со строки start_row (None — с начала).
+        """
+        ...
+
+
+class IOperationArchive(Protocol):
+    """
+    Контракт архива операций закрытых периодов
+    (то, что перенесено из листов operations / operationsRows).
+    """
+
+    def archived_through(self) -> Optional[date]:
+        """
+        Дата, по которую (включительно) операции перенесены в архив, или None.
+        """
+        ...
+
+    def set_archived_through(self, day: date) -> None:
+        ...
+
+    def append_operations(self, ops: Iterable[Operation]) -> None:
+        ...
+
+    def append_rows(self, rows: Iterable[OperationRow]) -> None:
+        ...
+
+    def get_operations_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[Operation]:
+        """
+        Архивные операции группы за период (границы включительно).
+        """
+        ...
+
+    def iter_operations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[Operation]:
+        """
+        Архивные операции всех групп за период (границы включительно).
+        """
+        ...
+
+    def iter_rows(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        group_id: str | None = None,
+    ) -> Iterator[OperationRow]:
+        """
+        Архивные строки операций за период (границы включительно),
+        всех групп или только group_id.
+        """
+        ...
+
+
+class IIdempotencyStore(Protocol):
+    """
+    Контракт хранилища результатов по ключу идемпотентности
+    (повторный запрос с тем же ключом не выполняется заново).
+    """
+
+    def run_once(self, key: str, func: Callable[[], T]) -> T:
+        """
+        Если ключ уже встречался — вернуть сохранённый результат,
+        иначе выполнить func, запомнить и вернуть его результат.
+        Результат должен сериализоваться в JSON.
+        """
+        ...
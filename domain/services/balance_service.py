@@ -0,0 +1,56 @@
+# domain/services/balance_service.py
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class SettleTransfer:
+    """
+    Одна передача в плане взаиморасчёта: from_user_id переводит
+    to_user_id сумму amount_cents (в копейках).
+    """
+
+    from_user_id: str
+    to_user_id: str
+    amount_cents: int
+
+
+def settle_up_plan(balances: Dict[str, int]) -> List[SettleTransfer]:
+    """
+    План передач, после которых балансы всех участников станут нулевыми.
+
+    balances — балансы в копейках. Баланс > 0 — участнику должны
+    (он заплатил больше своей доли), баланс < 0 — должен он.
+    Жадно сводим самого крупного должника с самым крупным
+    кредитором (две кучи), пока кто-то из них не обнулится. Передач получается не больше n - 1, время O(n log n).
+
+    Если сумма балансов не ноль (например, в старых строках суммы
+    с долями копейки), остаток просто остаётся непогашенным.
+    """
+    # heapq — min-куча, поэтому храним суммы со знаком минус
+    creditors: list[tuple[int, str]] = []
+    debtors: list[tuple[int, str]] = []
+    for user_id, cents in balances.items():
+        if cents > 0:
+            creditors.append((-cents, user_id))
+        elif cents < 0:
+            debtors.append((cents, user_id))
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    plan: List[SettleTransfer] = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+
+        plan.append(SettleTransfer(from_user_id=debtor, to_user_id=creditor, amount_cents=amount))
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+
+    return plan
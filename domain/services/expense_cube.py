@@ -0,0 +1,115 @@
+# domain/services/expense_cube.py
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+
+# Измерения куба в порядке ключа ячейки
+DIMENSIONS = ("group", "person", "category", "month")
+
+CellKey = Tuple[str, str, str, str]
+
+
+@dataclass
+class CubeCell:
+    """
+    Меры одной ячейки куба: число расходов и их сумма в копейках.
+    """
+
+    count: int = 0
+    sum_cents: int = 0
+
+    def add(self, other: "CubeCell") -> None:
+        self.count += other.count
+        self.sum_cents += other.sum_cents
+
+
+class ExpenseCube:
+    """
+    Агрегаты расходов по измерениям группа × участник × категория × месяц.
+
+    Ячейка хранит число расходов и сумму (копейки), поэтому куб
+    пополняется по одной операции (add) без пересчёта всего остального.
+    Месяц — строка "YYYY-MM".
+
+    Запросы:
+    - slice  — зафиксировать одно значение измерения;
+    - dice   — оставить несколько значений одного или нескольких измерений;
+    - roll_up — свернуть куб до части измерений (остальные суммируются);
+    - top_k  — k крупнейших значений измерения по сумме.
+    slice и dice возвращают новый куб, исходный не меняется.
+    """
+
+    def __init__(self) -> None:
+        self.cells: Dict[CellKey, CubeCell] = {}
+
+    def add(
+        self,
+        group_id: str,
+        person_id: str,
+        category: str,
+        month: str,
+        amount_cents: int,
+        count: int = 1,
+    ) -> None:
+        key = (group_id, person_id, category, month)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = CubeCell()
+        cell.count += count
+        cell.sum_cents += amount_cents
+        if cell.count == 0 and cell.sum_cents == 0:
+            # Расход отменили — пустую ячейку не храним
+            del self.cells[key]
+
+    def dice(self, **values: Iterable[str]) -> "ExpenseCube":
+        """
+        Оставить только ячейки, где измерения принимают указанные значения:
+        cube.dice(person=["1", "2"], month=["2025-01", "2025-02"]).
+        """
+        positions = [(_dimension_index(dim), set(allowed)) for dim, allowed in values.items()]
+        result = ExpenseCube()
+        for key, cell in self.cells.items():
+            if all(key[i] in allowed for i, allowed in positions):
+                result.cells[key] = CubeCell(cell.count, cell.sum_cents)
+        return result
+
+    def slice(self, dimension: str, value: str) -> "ExpenseCube":
+        """
+        Зафиксировать одно значение измерения: cube.slice("group", "ABC").
+        """
+        return self.dice(**{dimension: [value]})
+
+    def roll_up(self, *dimensions: str) -> Dict[Tuple[str, ...], CubeCell]:
+        """
+        Свернуть куб до измерений dimensions:
+        cube.roll_up("person", "category") -> {(person, category) -> CubeCell}.
+        Без измерений — один итог под ключом ().
+        """
+        positions = [_dimension_index(dim) for dim in dimensions]
+        result: Dict[Tuple[str, ...], CubeCell] = {}
+        for key, cell in self.cells.items():
+            rolled_key = tuple(key[i] for i in positions)
+            total = result.get(rolled_key)
+            if total is None:
+                total = result[rolled_key] = CubeCell()
+            total.add(cell)
+        return result
+
+    def top_k(self, dimension: str, k: int) -> List[Tuple[str, CubeCell]]:
+        """
+        k значений измерения с наибольшей суммой (по убыванию).
+        """
+        totals = self.roll_up(dimension)
+        ranked = sorted(totals.items(), key=lambda kv: (-kv[1].sum_cents, kv[0]))
+        return [(key[0], cell) for key, cell in ranked[:k]]
+
+    def total(self) -> CubeCell:
+        return self.roll_up().get((), CubeCell())
+
+
+def _dimension_index(dimension: str) -> int:
+    try:
+        return DIMENSIONS.index(dimension)
+    except ValueError:
+        raise ValueError(f"Неизвестное измерение '{dimension}'. Доступны: {', '.join(DIMENSIONS)}.")
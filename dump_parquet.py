@@ -0,0 +1,52 @@
+# dump_parquet.py
+"""
+Снимок листов operations и operationsRows в Parquet для офлайн-анализа.
+
+Файлы раскладываются по group_id / year / month, их можно читать так:
+    import pandas as pd
+    df = pd.read_parquet("analytics/operationsRows")
+
+Примеры запуска:
+    python dump_parquet.py                 # дописать новые строки в ./analytics
+    python dump_parquet.py --out /data/ledger
+    python dump_parquet.py --full          # пересобрать выгрузку с нуля
+
+Повторный запуск читает только строки после последней выгруженной
+(отметка хранится в <out>/_watermark.json). После архивации
+(archive_operations.py) строки листов сдвигаются — тогда наборы
+выгружаются заново: операции закрытых периодов из архива (ARCHIVE_DIR),
+остальные из листов.
+"""
+
+import argparse
+
+from config.settings import ARCHIVE_DIR
+from infrastructure.archive.operation_archive import OperationFileArchive
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+
+from application.usecases.analytics_dump import AnalyticsDumpService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выгрузка операций в Parquet")
+    parser.add_argument("--out", default="analytics", help="каталог выгрузки")
+    parser.add_argument("--full", action="store_true", help="пересобрать выгрузку с нуля")
+    args = parser.parse_args()
+
+    dump_service = AnalyticsDumpService(
+        operation_repo=OperationSheetRepository(),
+        operation_row_repo=OperationRowSheetRepository(),
+        archive=OperationFileArchive(ARCHIVE_DIR),
+    )
+    report = dump_service.dump(args.out, full=args.full)
+
+    for name in report.rebuilt:
+        print(f"{name}: листы сжаты архивацией, набор выгружен заново")
+    for name, count in report.records.items():
+        print(f"{name}: записей {count}, файлов {report.files.get(name, 0)}, "
+              f"последняя строка {report.watermarks.get(name, 0)}")
+
+
+if __name__ == "__main__":
+    main()
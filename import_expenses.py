@@ -0,0 +1,81 @@
+# import_expenses.py
+"""
+Импорт истории затрат группы из CSV в Google Sheets.
+
+Формат CSV (первая строка — заголовок):
+    date,payer,category,comment,amount,split
+    2024-03-01,405145783,Реклама,таргет VK,1500,all
+    05.03.2024,Вася,Контент,фотосессия,3000,Вася;Петя
+
+- date: YYYY-MM-DD или DD.MM.YYYY;
+- payer: userId или имя участника группы;
+- category: одна из CATEGORIES;
+- split: пусто / all / все — поровну на всю группу,
+  иначе список участников через ';'.
+
+Примеры запуска:
+    python import_expenses.py history.csv --group F857LW --dry-run
+    python import_expenses.py history.csv --group F857LW
+
+Если импорт прервался (ошибка в строке, сбой сети, квота),
+исправьте причину и запустите ту же команду ещё раз —
+уже записанные строки будут пропущены.
+"""
+
+import argparse
+
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+
+from application.usecases.expenses import ExpenseService
+from application.usecases.imports import ExpenseImportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт истории затрат из CSV")
+    parser.add_argument("path", help="путь к CSV-файлу")
+    parser.add_argument("--group", required=True, help="ID группы")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить файл")
+    parser.add_argument("--delimiter", default=",", help="разделитель колонок CSV")
+    parser.add_argument("--chunk-size", type=int, default=None, help="операций в одном пакете")
+    args = parser.parse_args()
+
+    user_group_repo = UserGroupSheetRepository()
+    expense_service = ExpenseService(
+        operation_repo=OperationSheetRepository(),
+        operation_row_repo=OperationRowSheetRepository(),
+        user_group_repo=user_group_repo,
+    )
+    import_service = ExpenseImportService(
+        expense_svc=expense_service,
+        user_group_repo=user_group_repo,
+        user_repo=UserSheetRepository(),
+    )
+    if args.chunk_size:
+        import_service.chunk_size = args.chunk_size
+
+    report = import_service.import_csv(
+        path=args.path,
+        group_id=args.group,
+        dry_run=args.dry_run,
+        delimiter=args.delimiter,
+    )
+
+    print(f"Прочитано строк: {report.rows_read}")
+    print(f"Пропущено (импортированы ранее): {report.rows_skipped}")
+    if args.dry_run:
+        print(f"Корректных строк: {report.rows_imported}")
+    else:
+        print(f"Записано операций: {report.rows_imported}")
+    if report.error_count:
+        print(f"Ошибок: {report.error_count}")
+        for text in report.errors:
+            print(f"  {text}")
+        if not args.dry_run:
+            print("Импорт остановлен на первой ошибке. Исправьте строку и запустите снова.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# infrastructure/archive/operation_archive.py
+
+import csv
+import json
+import os
+from datetime import date
+from typing import Iterable, Iterator, Optional
+
+from common.metrics import instrument_methods
+from domain.models.expenses import Operation, OperationRow
+from domain.repositories import IOperationArchive
+from infrastructure.google_sheets.operation_repository import (
+    operation_to_values,
+    parse_operation_values,
+)
+from infrastructure.google_sheets.operation_row_repository import (
+    operation_row_to_values,
+    parse_operation_row_values,
+)
+
+
+# Файл с датой, по которую (включительно) операции перенесены в архив
+META_FILE = "_archive.json"
+
+
+@instrument_methods
+class OperationFileArchive(IOperationArchive):
+    """
+    Архив операций в локальных CSV-файлах.
+
+    Раскладка:
+        <base_dir>/operations/<год>.csv      — строки листа operations (A:J)
+        <base_dir>/operationsRows/<год>.csv  — строки листа operationsRows (A:H)
+        <base_dir>/_archive.json             — {"archived_through": "YYYY-MM-DD"}
+
+    Колонки те же, что в листах, поэтому строки разбираются
+    теми же функциями, что и строки Google Sheets.
+    Файлы только дописываются.
+    """
+
+    def __init__(self, base_dir: str) -> None:
+        self.base_dir = base_dir
+
+    def archived_through(self) -> Optional[date]:
+        path = os.path.join(self.base_dir, META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            value = json.load(f).get("archived_through")
+        return date.fromisoformat(value) if value else None
+
+    def set_archived_through(self, day: date) -> None:
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = os.path.join(self.base_dir, META_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"archived_through": day.isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    def append_operations(self, ops: Iterable[Operation]) -> None:
+        self._append("operations", ((op.date.year, operation_to_values(op)) for op in ops))
+
+    def append_rows(self, rows: Iterable[OperationRow]) -> None:
+        self._append("operationsRows", ((r.date.year, operation_row_to_values(r)) for r in rows))
+
+    def get_operations_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[Operation]:
+        """
+        Операции группы из архива за период (границы включительно).
+        """
+        return list(self.iter_operations(start_date, end_date, group_id=group_id))
+
+    def iter_operations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        group_id: str | None = None,
+    ) -> Iterator[Operation]:
+        """
+        Операции из архива за период (границы включительно),
+        всех групп или только group_id.
+
+        Читаются только файлы лет, которые пересекаются с периодом.
+        Если архивацию прерывали и запускали снова, одна операция
+        могла попасть в архив дважды — такие повторы отбрасываются по id.
+        """
+        seen_ids: set[str] = set()
+        for row in self._read("operations", start_date, end_date):
+            if len(row) < 10 or (group_id is not None and row[0] != group_id):
+                continue
+            op = parse_operation_values(row)
+            if op is None or op.id in seen_ids:
+                continue
+            op_date = op.date.date()
+            if start_date and op_date < start_date:
+                continue
+            if end_date and op_date > end_date:
+                continue
+            seen_ids.add(op.id)
+            yield op
+
+    def iter_rows(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        group_id: str | None = None,
+    ) -> Iterator[OperationRow]:
+        """
+        Строки операций (operationsRows) из архива за период
+        (границы включительно), всех групп или только group_id.
+
+        Повторы после прерванной архивации отбрасываются: у операции
+        одна строка каждого типа на участника.
+        """
+        seen: set[tuple[str, str, str]] = set()
+        for values in self._read("operationsRows", start_date, end_date):
+            if not values or (group_id is not None and values[0] != group_id):
+                continue
+            row = parse_operation_row_values(values)
+            if row is None:
+                continue
+            key = (row.operation_id, row.person_id, row.row_type)
+            if key in seen:
+                continue
+            row_date = row.date.date()
+            if start_date and row_date < start_date:
+                continue
+            if end_date and row_date > end_date:
+                continue
+            seen.add(key)
+            yield row
+
+    def _read(self, sheet: str, start_date: date | None, end_date: date | None) -> Iterator[list[str]]:
+        """
+        Строки файлов листа sheet за годы, пересекающиеся с периодом.
+        """
+        folder = os.path.join(self.base_dir, sheet)
+        if not os.path.isdir(folder):
+            return
+        for name in sorted(os.listdir(folder)):
+            year_str, ext = os.path.splitext(name)
+            if ext != ".csv" or not year_str.isdigit():
+                continue
+            year = int(year_str)
+            if (start_date and year < start_date.year) or (end_date and year > end_date.year):
+                continue
+            with open(os.path.join(folder, name), newline="", encoding="utf-8") as f:
+                yield from csv.reader(f)
+
+    def _append(self, sheet: str, records: Iterable[tuple[int, list]]) -> None:
+        folder = os.path.join(self.base_dir, sheet)
+        os.makedirs(folder, exist_ok=True)
+
+        files: dict[int, object] = {}
+        try:
+            for year, values in records:
+                f = files.get(year)
+                if f is None:
+                    f = open(os.path.join(folder, f"{year}.csv"), "a", newline="", encoding="utf-8")
+                    files[year] = f
+                csv.writer(f).writerow(values)
+        finally:
+            for f in files.values():
+                f.close()
@@ -0,0 +1,127 @@
+# infrastructure/google_sheets/balance_checkpoints.py
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from common.logger import get_logger
+from config.settings import BALANCE_CHECKPOINT_FILE
+
+
+logger = get_logger(__name__)
+
+
+# Единица сумм в файле; файлы с другой единицей не используются
+CHECKPOINT_UNIT = "cents"
+
+
+@dataclass(frozen=True)
+class BalanceCheckpoint:
+    """
+    Балансы всех групп по строку row листа operationsRows включительно.
+
+    - balances: {GROUP_ID -> {person_id -> баланс в копейках}};
+    - archived_through: дата архива (ISO) на момент расчёта — после новой
+      архивации строки листа сдвигаются, и контрольная точка не годится.
+    """
+
+    row: int
+    balances: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    archived_through: Optional[str] = None
+
+
+class BalanceCheckpointStore:
+    """
+    Контрольная точка балансов в локальном JSON-файле.
+
+    Балансы считаются как "точка + строки после неё", поэтому после
+    перезапуска бот не перечитывает весь лист operationsRows.
+
+    Точку нужно выбросить (discard), если изменились строки до неё:
+    отмена операции (флаг Active) или сжатие листа архивацией.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._checkpoint: Optional[BalanceCheckpoint] = None
+        # растёт при каждом discard(): точку, посчитанную до сброса, не сохраняем
+        self._generation = 0
+
+    def get(self) -> Optional[BalanceCheckpoint]:
+        with self._lock:
+            if not self._loaded:
+                self._checkpoint = self._read_file()
+                self._loaded = True
+            return self._checkpoint
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def save(self, checkpoint: BalanceCheckpoint, generation: int) -> bool:
+        """
+        Сохранить точку, посчитанную при поколении generation.
+        Если с тех пор точку сбрасывали — не сохраняем (False).
+        """
+        with self._lock:
+            if generation != self._generation:
+                return False
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "unit": CHECKPOINT_UNIT,
+                        "row": checkpoint.row,
+                        "balances": checkpoint.balances,
+                        "archived_through": checkpoint.archived_through,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.path)
+            self._checkpoint = checkpoint
+            self._loaded = True
+            return True
+
+    def discard(self, from_row: int | None = None) -> None:
+        """
+        Выбросить точку. from_row — изменилась только эта строка
+        и ниже: если точка посчитана до неё, она остаётся в силе.
+        """
+        with self._lock:
+            # Всегда, даже если сохранённая точка остаётся в силе: фоновая
+            # задача может прямо сейчас считать новую точку по строкам
+            # после неё, в том числе по изменившейся строке from_row
+            self._generation += 1
+            checkpoint = self._checkpoint if self._loaded else self._read_file()
+            if checkpoint is not None and from_row is not None and from_row > checkpoint.row:
+                return
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._checkpoint = None
+            self._loaded = True
+
+    def _read_file(self) -> Optional[BalanceCheckpoint]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("unit") != CHECKPOINT_UNIT:
+                # Точка в старом формате (суммы в рублях) — посчитаем заново
+                return None
+            return BalanceCheckpoint(
+                row=int(data["row"]),
+                balances=data.get("balances", {}),
+                archived_through=data.get("archived_through"),
+            )
+        except (ValueError, KeyError) as e:
+            logger.warning("Balance checkpoint ignored: %r", e)
+            return None
+
+
+# Общая на процесс контрольная точка балансов
+balance_checkpoints = BalanceCheckpointStore(BALANCE_CHECKPOINT_FILE)
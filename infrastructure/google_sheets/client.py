@@ -1,8 +1,33 @@
 # infrastructure/google_sheets/client.py
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
 from google.oauth2.service_account import Credentials
-from config.settings import GOOGLE_SPREADSHEET_ID
+import threading
+import time
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from common.metrics import SIZE_BUCKETS, metrics
+from common.tracing import tracer
+from config.settings import (
+    GOOGLE_SPREADSHEET_ID,
+    SHEET_ID_OPERATION_ROWS,
+    SHEET_ID_OPERATIONS,
+    SHEET_ID_USER_GROUPS,
+    SHEETS_EMULATOR,
+    SHEETS_EMULATOR_ERROR_RATE,
+    SHEETS_EMULATOR_ERROR_STATUSES,
+    SHEETS_EMULATOR_LATENCY_SECONDS,
+    SHEETS_EMULATOR_SECONDS_PER_KB,
+    SHEETS_EMULATOR_SEED_FILE,
+    SHEETS_READ_CHUNK_ROWS,
+    SHEETS_READ_FRESHNESS_SECONDS,
+)
+from infrastructure.google_sheets.emulator import EmulatorFaults, EmulatorSpreadsheet, SheetsEmulator
+from infrastructure.google_sheets.single_flight import SingleFlight
 
 # Область доступа: чтение и запись в Google Sheets
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
@@ -11,6 +36,67 @@ SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SERVICE_ACCOUNT_FILE = "credentials.json"
 
 
+def _request_ranges(uri: str) -> str:
+    """
+    Диапазоны запроса Sheets из URI: ".../values/<диапазон>" или
+    параметры ranges= у values.batchGet.
+    """
+    parts = urlsplit(uri)
+    ranges = parse_qs(parts.query).get("ranges", [])
+    if "/values/" in parts.path:
+        range_name = unquote(parts.path.split("/values/", 1)[1])
+        if range_name.endswith((":append", ":clear")):
+            range_name = range_name.rsplit(":", 1)[0]
+        ranges.insert(0, range_name)
+    return ",".join(ranges)
+
+
+class TracedHttpRequest(HttpRequest):
+    """
+    HTTP-запрос к Sheets, который открывает span "sheets <метод API>"
+    с диапазоном (sheets.range) и размером ответа в текущей трассе.
+    """
+
+    def execute(self, http=None, num_retries=0):
+        with tracer.span(f"sheets {self.methodId}") as span:
+            if span is not None:
+                span.set_attribute("http.method", self.method)
+                span.set_attribute("sheets.range", _request_ranges(self.uri))
+                if self.body:
+                    span.set_attribute("http.request_bytes", len(self.body))
+            return super().execute(http=http, num_retries=num_retries)
+
+
+# Эмулятор Sheets (SHEETS_EMULATOR): одна таблица на процесс,
+# общая для всех репозиториев
+_emulator: Optional[SheetsEmulator] = None
+_emulator_lock = threading.Lock()
+
+
+def _get_emulator() -> SheetsEmulator:
+    global _emulator
+    with _emulator_lock:
+        if _emulator is None:
+            sheet_ids = {"userGroups": SHEET_ID_USER_GROUPS}
+            if SHEET_ID_OPERATIONS is not None:
+                sheet_ids["operations"] = SHEET_ID_OPERATIONS
+            if SHEET_ID_OPERATION_ROWS is not None:
+                sheet_ids["operationsRows"] = SHEET_ID_OPERATION_ROWS
+            spreadsheet = EmulatorSpreadsheet(sheet_ids=sheet_ids)
+            if SHEETS_EMULATOR_SEED_FILE:
+                spreadsheet.load_json(SHEETS_EMULATOR_SEED_FILE)
+            _emulator = SheetsEmulator(
+                spreadsheet,
+                EmulatorFaults(
+                    latency_seconds=SHEETS_EMULATOR_LATENCY_SECONDS,
+                    seconds_per_kb=SHEETS_EMULATOR_SECONDS_PER_KB,
+                    error_rate=SHEETS_EMULATOR_ERROR_RATE,
+                    error_statuses=SHEETS_EMULATOR_ERROR_STATUSES,
+                ),
+            )
+        return _emulator
+
+
 def get_sheets_service():
     """
     Создаёт и возвращает клиент Google Sheets API.
@@ -18,11 +104,152 @@ def get_sheets_service():
     Требуется:
     - файл credentials.json в корне проекта;
     - таблица, доступ к которой выдан сервисному аккаунту.
+
+    Хэндлеры вызывают репозитории из потоков (asyncio.to_thread),
+    а httplib2.Http не потокобезопасен. Поэтому каждый запрос
+    получает собственное HTTP-соединение (requestBuilder).
+
+    При SHEETS_EMULATOR=true вместо Google возвращается эмулятор
+    таблицы в памяти процесса (emulator.py).
     """
+    if SHEETS_EMULATOR:
+        return _get_emulator()
+
     creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    service = build("sheets", "v4", credentials=creds)
+
+    def build_request(http, *args, **kwargs):
+        new_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        return TracedHttpRequest(new_http, *args, **kwargs)
+
+    authorized_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+    service = build(
+        "sheets",
+        "v4",
+        http=authorized_http,
+        requestBuilder=build_request,
+    )
     return service
 
 
 # ID таблицы будем использовать из настроек
 SPREADSHEET_ID = GOOGLE_SPREADSHEET_ID
+
+
+def ping_spreadsheet(service) -> None:
+    """
+    Самый лёгкий запрос к таблице (только её ID) — проверка, что Sheets
+    доступен и ключ сервисного аккаунта действует. Ошибка — исключением.
+    """
+    service.spreadsheets().get(spreadsheetId=SPREADSHEET_ID, fields="spreadsheetId").execute()
+
+
+# Общий для всех репозиториев слой объединения одинаковых чтений
+sheet_reads = SingleFlight(freshness_seconds=SHEETS_READ_FRESHNESS_SECONDS)
+
+# Метрики реальных чтений Sheets (после single-flight слоя)
+SHEETS_READ_SECONDS = metrics.histogram(
+    "sheets_read_seconds", "Длительность values.get", ("sheet",)
+)
+SHEETS_READ_ROWS = metrics.histogram(
+    "sheets_read_rows", "Строк прочитано за один values.get", ("sheet",), SIZE_BUCKETS
+)
+SHEETS_READ_BYTES = metrics.histogram(
+    "sheets_read_bytes", "Байт (UTF-8 значений ячеек) прочитано за один values.get", ("sheet",), SIZE_BUCKETS
+)
+metrics.callback(
+    "sheets_read_cache_total",
+    "Чтения через single-flight слой: hit — сохранённый результат, "
+    "joined — присоединились к идущему чтению, miss — реальное чтение",
+    lambda: {(result,): count for result, count in sheet_reads.stats().items()},
+    ("result",),
+    kind="counter",
+)
+
+
+def _sheet_name(range_name: str) -> str:
+    """
+    Имя листа из A1-диапазона: "userGroups!A2:B" -> "userGroups".
+    """
+    return range_name.split("!", 1)[0]
+
+
+def read_values(service, range_name: str) -> list[list[str]]:
+    """
+    values.get по диапазону range_name через single-flight слой.
+
+    Одновременные запросы одного диапазона выполняют одно реальное
+    чтение и получают один и тот же список строк — менять его нельзя.
+    """
+
+    sheet = _sheet_name(range_name)
+
+    def fetch() -> list[list[str]]:
+        started = time.perf_counter()
+        result = (
+            service.spreadsheets()
+            .values()
+            .get(
+                spreadsheetId=SPREADSHEET_ID,
+                range=range_name,
+            )
+            .execute()
+        )
+        values = result.get("values", [])
+        SHEETS_READ_SECONDS.observe(time.perf_counter() - started, sheet=sheet)
+        SHEETS_READ_ROWS.observe(len(values), sheet=sheet)
+        SHEETS_READ_BYTES.observe(
+            sum(len(str(cell).encode("utf-8")) for row in values for cell in row), sheet=sheet
+        )
+        return values
+
+    return sheet_reads.do(range_name, fetch, tag=sheet)
+
+
+def parse_a1_range(range_name: str) -> tuple[str, str, int, str]:
+    """
+    Разбирает диапазон вида "operations!A2:J" на части:
+    (лист, первая колонка, первая строка, последняя колонка) —
+    ("operations", "A", 2, "J"). Если номер строки не указан, это 1.
+    """
+    sheet, cells = range_name.split("!", 1)
+    start_cell, _, end_cell = cells.partition(":")
+    first_col = "".join(ch for ch in start_cell if ch.isalpha())
+    start_row_str = "".join(ch for ch in start_cell if ch.isdigit())
+    last_col = "".join(ch for ch in end_cell if ch.isalpha()) or first_col
+    return sheet, first_col, int(start_row_str) if start_row_str else 1, last_col
+
+
+def iter_values(
+    service,
+    range_name: str,
+    chunk_rows: int = SHEETS_READ_CHUNK_ROWS,
+    start_row: int | None = None,
+) -> Iterator[tuple[int, list[str]]]:
+    """
+    Читает открытый снизу диапазон ("operations!A2:J") порциями
+    по chunk_rows строк и отдаёт пары (номер строки в листе, строка).
+    start_row — начать не с первой строки диапазона, а с этой.
+
+    В памяти держится только одна порция. Чтение заканчивается на
+    первой неполной порции (Sheets не возвращает пустые строки в конце).
+    """
+    sheet, first_col, row_no, last_col = parse_a1_range(range_name)
+    if start_row is not None:
+        row_no = max(row_no, start_row)
+
+    while True:
+        window = f"{sheet}!{first_col}{row_no}:{last_col}{row_no + chunk_rows - 1}"
+        values = read_values(service, window)
+        for offset, row in enumerate(values):
+            yield row_no + offset, row
+        if len(values) < chunk_rows:
+            return
+        row_no += chunk_rows
+
+
+def invalidate_reads(range_name: str) -> None:
+    """
+    Вызывается после любой записи в лист: сбрасывает сохранённые
+    и идущие чтения этого листа.
+    """
+    sheet_reads.invalidate(_sheet_name(range_name))
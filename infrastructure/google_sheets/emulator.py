@@ -0,0 +1,354 @@
+# infrastructure/google_sheets/emulator.py
+"""
+Эмулятор Google Sheets в памяти процесса — то подмножество API v4,
+которым пользуются репозитории:
+
+- spreadsheets().values().get / append / update / batchGet / batchUpdate;
+- spreadsheets().batchUpdate с appendCells и deleteDimension;
+- spreadsheets().get (проверка доступности в /healthz).
+
+Как и настоящий Sheets (valueRenderOption=FORMATTED_VALUE), значения
+возвращаются строками, пустые ячейки и строки в конце диапазона
+отбрасываются.
+
+Чтобы поведение было похоже на сеть, EmulatorFaults добавляет к каждому
+запросу задержку (постоянную и пропорциональную размеру запроса и ответа)
+и с заданной вероятностью отвечает ошибкой 429/5xx — тем же HttpError,
+что и googleapiclient. execute(num_retries=N) повторяет такой запрос
+до N раз, как настоящий клиент.
+
+Бот переключается на эмулятор настройкой SHEETS_EMULATOR (см.
+client.get_sheets_service); тесты и бенчмарки создают SheetsEmulator
+напрямую.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+_CELL_RE = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _column_index(letters: str) -> int:
+    """
+    "A" -> 0, "J" -> 9, "AA" -> 26.
+    """
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def parse_range(range_name: str) -> Tuple[str, int, Optional[int], int, Optional[int]]:
+    """
+    "operations!A2:J" -> (лист, первая строка, последняя строка или None,
+    первая колонка, последняя колонка или None); строки с 1, колонки с 0.
+    """
+    sheet, _, cells = range_name.partition("!")
+    start, _, end = cells.partition(":")
+    start_col, start_row = _CELL_RE.match(start.upper()).groups()
+    end_col, end_row = _CELL_RE.match(end.upper()).groups() if end else (start_col, start_row)
+    return (
+        sheet,
+        int(start_row) if start_row else 1,
+        int(end_row) if end_row else None,
+        _column_index(start_col) if start_col else 0,
+        _column_index(end_col) if end_col else None,
+    )
+
+
+def _formatted(value: Any) -> str:
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _trim(rows: List[List[str]]) -> List[List[str]]:
+    """
+    Убрать пустые ячейки в конце строк и пустые строки в конце
+    (rows — уже копии строк листа, меняются на месте).
+    """
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class EmulatorSpreadsheet:
+    """
+    Листы таблицы: имя -> строки (список списков значений).
+    sheet_ids — GID листов для spreadsheets.batchUpdate.
+
+    Значения хранятся уже отформатированными строками (как их вернёт
+    FORMATTED_VALUE) — чтение большого листа только копирует строки.
+
+    Репозитории обращаются к таблице из потоков (asyncio.to_thread),
+    поэтому каждая операция выполняется под замком.
+    """
+
+    def __init__(self, sheet_ids: Optional[Dict[str, int]] = None) -> None:
+        self.sheets: Dict[str, List[List[Any]]] = {}
+        self.sheet_ids: Dict[int, str] = {gid: name for name, gid in (sheet_ids or {}).items()}
+        self.lock = threading.RLock()
+
+    def rows(self, sheet: str) -> List[List[Any]]:
+        return self.sheets.setdefault(sheet, [])
+
+    def read(self, range_name: str) -> List[List[str]]:
+        sheet, first_row, last_row, first_col, last_col = parse_range(range_name)
+        with self.lock:
+            rows = self.rows(sheet)
+            end = len(rows) if last_row is None else min(last_row, len(rows))
+            selected = rows[first_row - 1:end]
+            stop = None if last_col is None else last_col + 1
+            return _trim([row[first_col:stop] for row in selected])
+
+    def write(self, range_name: str, values: List[List[Any]]) -> int:
+        sheet, first_row, _, first_col, _ = parse_range(range_name)
+        with self.lock:
+            return self._write(sheet, first_row, first_col, values)
+
+    def _write(self, sheet: str, first_row: int, first_col: int, values: List[List[Any]]) -> int:
+        rows = self.rows(sheet)
+        for offset, new_row in enumerate(values):
+            index = first_row - 1 + offset
+            while len(rows) <= index:
+                rows.append([])
+            row = rows[index]
+            while len(row) < first_col + len(new_row):
+                row.append("")
+            row[first_col:first_col + len(new_row)] = [_formatted(v) for v in new_row]
+        return len(values)
+
+    def append(self, range_name: str, values: List[List[Any]]) -> int:
+        sheet, first_row, _, first_col, _ = parse_range(range_name)
+        with self.lock:
+            rows = self.rows(sheet)
+            # Новые строки — после последней непустой строки листа
+            last = len(rows)
+            while last > 0 and not any(v != "" for v in rows[last - 1]):
+                last -= 1
+            return self._write(sheet, max(last + 1, first_row), first_col, values)
+
+    def delete_rows(self, sheet_id: int, start_index: int, end_index: int) -> None:
+        with self.lock:
+            del self.rows(self.sheet_name(sheet_id))[start_index:end_index]
+
+    def sheet_name(self, sheet_id: int) -> str:
+        return self.sheet_ids[sheet_id]
+
+    def load_json(self, path: str) -> None:
+        """
+        Заполнить листы из JSON-файла вида {"users": [["1", "Аня"], ...], ...}
+        (строки — с первой строки листа, включая заголовок, если он нужен).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for sheet, rows in data.items():
+            self.load_rows(sheet, rows)
+
+    def load_rows(self, sheet: str, rows: List[List[Any]]) -> None:
+        """
+        Заменить содержимое листа строками rows (с первой строки листа).
+        """
+        with self.lock:
+            self.sheets[sheet] = [[_formatted(v) for v in row] for row in rows]
+
+
+@dataclass
+class EmulatorFaults:
+    """
+    Сетевое поведение эмулятора:
+    - latency_seconds — задержка каждого запроса;
+    - seconds_per_kb — дополнительная задержка на каждый КБ запроса
+      и ответа (большие чтения и пакетные записи медленнее);
+    - error_rate — доля запросов (0..1), которые падают ошибкой;
+    - error_statuses — HTTP-статусы таких ошибок (выбирается случайно).
+    """
+
+    latency_seconds: float = 0.0
+    seconds_per_kb: float = 0.0
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (429, 500, 503)
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def delay(self, payload_bytes: int) -> float:
+        return self.latency_seconds + self.seconds_per_kb * payload_bytes / 1024
+
+    def payload_size(self, value: Any) -> int:
+        """
+        Размер запроса/ответа в байтах JSON — только если от него
+        зависит задержка (сериализация большого ответа не бесплатна).
+        """
+        if not value or self.seconds_per_kb <= 0:
+            return 0
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def pick_error(self) -> Optional[int]:
+        """
+        HTTP-статус ошибки для очередного запроса или None.
+        """
+        if self.error_rate <= 0 or not self.error_statuses:
+            return None
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice(self.error_statuses)
+
+
+class _Request:
+    """
+    Запрос эмулятора — как googleapiclient.http.HttpRequest: выполняется
+    только в execute().
+    """
+
+    def __init__(self, emulator: "SheetsEmulator", uri: str, body: Any, func, *args) -> None:
+        self._emulator = emulator
+        self.uri = uri
+        self._body = body
+        self._func = func
+        self._args = args
+
+    def execute(self, http=None, num_retries: int = 0) -> dict:
+        faults = self._emulator.faults
+        request_bytes = faults.payload_size(self._body)
+        for attempt in range(num_retries + 1):
+            status = faults.pick_error()
+            if status is None:
+                break
+            if attempt == num_retries:
+                time.sleep(faults.delay(request_bytes))
+                raise _http_error(status, self.uri)
+            # Как googleapiclient: пауза перед повтором растёт экспоненциально
+            time.sleep(faults.delay(request_bytes) + 0.01 * 2 ** attempt)
+
+        result = self._func(*self._args)
+        delay = faults.delay(request_bytes + faults.payload_size(result))
+        if delay > 0:
+            time.sleep(delay)
+        return result
+
+
+def _http_error(status: int, uri: str) -> HttpError:
+    reasons = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}
+    content = json.dumps(
+        {"error": {"code": status, "message": "Injected by Sheets emulator", "status": reasons.get(status, "UNKNOWN")}}
+    ).encode("utf-8")
+    return HttpError(httplib2.Response({"status": status}), content, uri=uri)
+
+
+class _Values:
+    def __init__(self, emulator: "SheetsEmulator") -> None:
+        self.emulator = emulator
+        self.spreadsheet = emulator.spreadsheet
+
+    def _request(self, uri: str, body: Any, func, *args) -> _Request:
+        return _Request(self.emulator, f"emulator://sheets/v4/values/{uri}", body, func, *args)
+
+    def get(self, spreadsheetId=None, range=None, **kwargs) -> _Request:
+        return self._request(range, None, self._get, range)
+
+    def batchGet(self, spreadsheetId=None, ranges=(), **kwargs) -> _Request:
+        return self._request(":batchGet", None, self._batch_get, list(ranges))
+
+    def append(self, spreadsheetId=None, range=None, valueInputOption=None, body=None, **kwargs) -> _Request:
+        return self._request(f"{range}:append", body, self._append, range, body)
+
+    def update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None, **kwargs) -> _Request:
+        return self._request(range, body, self._update, range, body)
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs) -> _Request:
+        return self._request(":batchUpdate", body, self._batch_update, body)
+
+    def _get(self, range_name: str) -> dict:
+        result = {"range": range_name, "majorDimension": "ROWS"}
+        values = self.spreadsheet.read(range_name)
+        if values:
+            result["values"] = values
+        return result
+
+    def _batch_get(self, ranges: List[str]) -> dict:
+        return {"valueRanges": [self._get(range_name) for range_name in ranges]}
+
+    def _append(self, range_name: str, body: dict) -> dict:
+        rows = self.spreadsheet.append(range_name, body.get("values", []))
+        return {"updates": {"updatedRows": rows}}
+
+    def _update(self, range_name: str, body: dict) -> dict:
+        return {"updatedRows": self.spreadsheet.write(range_name, body.get("values", []))}
+
+    def _batch_update(self, body: dict) -> dict:
+        total = 0
+        for item in body.get("data", []):
+            total += self.spreadsheet.write(item["range"], item.get("values", []))
+        return {"totalUpdatedRows": total}
+
+
+class _Spreadsheets:
+    def __init__(self, emulator: "SheetsEmulator") -> None:
+        self.emulator = emulator
+        self.spreadsheet = emulator.spreadsheet
+
+    def values(self) -> _Values:
+        return _Values(self.emulator)
+
+    def get(self, spreadsheetId=None, **kwargs) -> _Request:
+        return _Request(self.emulator, "emulator://sheets/v4", None, lambda: {"spreadsheetId": spreadsheetId})
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs) -> _Request:
+        return _Request(self.emulator, "emulator://sheets/v4:batchUpdate", body, self._batch_update, body)
+
+    def _batch_update(self, body: dict) -> dict:
+        replies = []
+        with self.spreadsheet.lock:
+            for request in body.get("requests", []):
+                if "appendCells" in request:
+                    spec = request["appendCells"]
+                    values = [
+                        [
+                            next(iter(cell.get("userEnteredValue", {"stringValue": ""}).values()))
+                            for cell in row.get("values", [])
+                        ]
+                        for row in spec.get("rows", [])
+                    ]
+                    self.spreadsheet.append(f"{self.spreadsheet.sheet_name(spec['sheetId'])}!A1", values)
+                elif "deleteDimension" in request:
+                    spec = request["deleteDimension"]["range"]
+                    self.spreadsheet.delete_rows(spec["sheetId"], spec["startIndex"], spec["endIndex"])
+                else:
+                    raise NotImplementedError(f"Unsupported batchUpdate request: {sorted(request)}")
+                replies.append({})
+        return {"replies": replies}
+
+
+class SheetsEmulator:
+    """
+    Замена результата get_sheets_service(): service.spreadsheets()...
+    """
+
+    def __init__(
+        self,
+        spreadsheet: Optional[EmulatorSpreadsheet] = None,
+        faults: Optional[EmulatorFaults] = None,
+    ) -> None:
+        self.spreadsheet = spreadsheet or EmulatorSpreadsheet()
+        self.faults = faults or EmulatorFaults()
+
+    def spreadsheets(self) -> _Spreadsheets:
+        return _Spreadsheets(self)
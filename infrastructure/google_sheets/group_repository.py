@@ -2,12 +2,20 @@
 
 from typing import List
 from googleapiclient.discovery import Resource
+from common.metrics import instrument_methods
 from domain.models.groups import Group
 from domain.repositories import IGroupRepository
-from infrastructure.google_sheets.client import get_sheets_service, SPREADSHEET_ID
+from infrastructure.google_sheets.client import (
+    get_sheets_service,
+    invalidate_reads,
+    read_values,
+    SPREADSHEET_ID,
+)
+from infrastructure.google_sheets.locks import sheet_write_locks
 from config.settings import SHEET_GROUPS_RANGE
 
 
+@instrument_methods
 class GroupSheetRepository(IGroupRepository):
     """
     Реализация репозитория групп поверх листа Groups.
@@ -24,16 +32,7 @@ class GroupSheetRepository(IGroupRepository):
         Считывает все значения из диапазона SHEET_GROUPS_RANGE и
         возвращает список строковых id.
         """
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_GROUPS_RANGE,
-            )
-            .execute()
-        )
-        values = result.get("values", [])
+        values = read_values(self.service, SHEET_GROUPS_RANGE)
         # values — список списков, каждая внутренняя ячейка — одна строка
         group_ids = [row[0] for row in values if row]  # row[0] — значение в колонке A
         return group_ids
@@ -51,19 +50,27 @@ class GroupSheetRepository(IGroupRepository):
     def create(self, group_id: str) -> Group:
         """
         Добавляет новую строку в лист Groups с указанным group_id.
+
+        Создание одной и той же группы сериализуется по group_id:
+        если группа уже появилась, пока мы ждали замок, строку не дублируем.
         """
         body = {"values": [[group_id]]}  # одна строка, одна колонка
 
-        (
-            self.service.spreadsheets()
-            .values()
-            .append(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_GROUPS_RANGE,
-                valueInputOption="RAW",
-                body=body,
+        with sheet_write_locks.hold(("Groups", "group", group_id.strip().upper())):
+            if self.exists(group_id):
+                return Group(id=group_id)
+
+            (
+                self.service.spreadsheets()
+                .values()
+                .append(
+                    spreadsheetId=SPREADSHEET_ID,
+                    range=SHEET_GROUPS_RANGE,
+                    valueInputOption="RAW",
+                    body=body,
+                )
+                .execute()
             )
-            .execute()
-        )
+            invalidate_reads(SHEET_GROUPS_RANGE)
 
         return Group(id=group_id)
@@ -0,0 +1,77 @@
+# infrastructure/google_sheets/locks.py
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List
+
+from common.metrics import metrics
+
+
+class KeyedLock:
+    """
+    Набор замков, выдаваемых по ключу.
+
+    Нужен, чтобы сериализовать только конфликтующие записи в Google Sheets:
+    - записи с одинаковым ключом (один пользователь, одна группа)
+      выполняются по очереди;
+    - записи с разными ключами идут параллельно.
+
+    Репозитории вызываются из потоков (asyncio.to_thread),
+    поэтому замки потоковые, а не asyncio.Lock.
+    Замок удаляется, как только его никто не держит и не ждёт.
+    """
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        # ключ -> [замок, сколько потоков его держат или ждут]
+        self._locks: Dict[Hashable, List] = {}
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+
+        lock: threading.Lock = entry[0]
+        lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        """
+        Сколько ключей сейчас заняты (удобно для диагностики).
+        """
+        with self._guard:
+            return len(self._locks)
+
+    def thread_count(self) -> int:
+        """
+        Сколько потоков сейчас держат или ждут замки.
+        """
+        with self._guard:
+            return sum(entry[1] for entry in self._locks.values())
+
+
+# Общий набор замков для всех репозиториев Google Sheets.
+# Ключи — кортежи (лист, область, id), например:
+# - ("userGroups", "user", "123")  — записи одного пользователя;
+# - ("userGroups", "rows")         — записи по номеру строки
+#   (update по индексу и deleteDimension, который сдвигает строки);
+# - ("Groups", "group", "A9F3Z1")  — создание одной группы.
+# Порядок захвата: сначала ключ пользователя/группы, затем ключ "rows".
+sheet_write_locks = KeyedLock()
+
+metrics.callback("sheet_write_locks_keys", "Занятые ключи замков записи в Sheets", lambda: len(sheet_write_locks))
+metrics.callback(
+    "sheet_write_locks_threads",
+    "Потоки, которые держат или ждут замки записи в Sheets",
+    sheet_write_locks.thread_count,
+)
@@ -0,0 +1,128 @@
+# infrastructure/google_sheets/operation_index.py
+
+import threading
+from typing import Callable, Dict, Hashable, Iterable, List, Set
+
+from common.metrics import metrics
+from config.settings import SHEET_OPERATIONS_RANGE, SHEET_OPERATION_ROWS_RANGE
+from infrastructure.google_sheets.client import iter_values, parse_a1_range
+
+
+class SheetRowIndex:
+    """
+    Индекс "ключ -> номера строк листа" (например, id операции -> строка).
+
+    Строится одним чтением узкого диапазона (только нужные колонки),
+    дальше дочитывает только новые строки: листы operations и
+    operationsRows растут дописыванием в конец, и уже записанные строки
+    своих номеров не меняют.
+
+    keys(row) возвращает ключи, под которыми строку можно найти
+    (например, ("id", op_id) и ("person", group_id, person_id)).
+    Номера строк по ключу хранятся по возрастанию.
+
+    Если строки в листе сдвинулись (удаление, архивация), индекс
+    нужно сбросить через reset() — он перестроится при следующем запросе.
+    """
+
+    def __init__(self, range_name: str, keys: Callable[[list[str]], List[Hashable]]) -> None:
+        self.range_name = range_name
+        self.keys = keys
+        self._lock = threading.Lock()
+        self._rows: Dict[Hashable, List[int]] = {}
+        # последняя прочитанная строка листа (0 — ещё ничего не читали)
+        self._last_row = 0
+        # сколько поисков обошлись без чтения листа / дочитывали лист
+        self._stats: Dict[str, int] = {"hit": 0, "catch_up": 0}
+
+    # stats и is_warm вызываются из цикла событий (/metrics, /healthz),
+    # поэтому без _lock: его держат на время чтения листа. Копия словаря
+    # и чтение одного атрибута атомарны под GIL.
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def is_warm(self) -> bool:
+        """
+        Индекс уже построен (хотя бы раз читал лист).
+        """
+        return self._last_row > 0
+
+    def lookup(self, service, key: Hashable, refresh: bool = False) -> List[int]:
+        """
+        Номера строк по ключу.
+
+        Если ключа нет (или refresh=True), сначала дочитываются строки,
+        появившиеся после последнего чтения.
+        """
+        with self._lock:
+            if refresh or key not in self._rows:
+                self._stats["catch_up"] += 1
+                self._catch_up(service)
+            else:
+                self._stats["hit"] += 1
+            return list(self._rows.get(key, []))
+
+    def present(self, service, keys: Iterable[Hashable]) -> Set[Hashable]:
+        """
+        Какие из ключей есть в листе: новые строки дочитываются
+        один раз на все ключи (а не на каждый отсутствующий, как в lookup).
+        """
+        with self._lock:
+            self._stats["catch_up"] += 1
+            self._catch_up(service)
+            return {key for key in keys if key in self._rows}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows = {}
+            self._last_row = 0
+
+    def _catch_up(self, service) -> None:
+        start_row = self._last_row + 1 if self._last_row else None
+        for row_no, row in iter_values(service, self.range_name, start_row=start_row):
+            self._last_row = row_no
+            for key in self.keys(row):
+                self._rows.setdefault(key, []).append(row_no)
+
+
+def _narrow_range(range_name: str, last_col: str) -> str:
+    """
+    Тот же диапазон, но только до колонки last_col: "operations!A2:J" -> "operations!A2:E".
+    """
+    sheet, first_col, start_row, _ = parse_a1_range(range_name)
+    return f"{sheet}!{first_col}{start_row}:{last_col}"
+
+
+def _operation_keys(row: list[str]) -> List[Hashable]:
+    # A: Group, B: Date, C: Id, D: OperationType, E: Person
+    if len(row) < 3 or not row[2]:
+        return []
+    keys: List[Hashable] = [("id", row[2]), ("group", row[0].strip().upper())]
+    if len(row) >= 5:
+        keys.append(("person", row[0].strip().upper(), row[4].strip()))
+    return keys
+
+
+def _operation_row_keys(row: list[str]) -> List[Hashable]:
+    # A: Group, B: Date, C: Operation
+    if len(row) < 3 or not row[2]:
+        return []
+    return [row[2]]
+
+
+# Общие на процесс индексы листов операций
+operations_index = SheetRowIndex(_narrow_range(SHEET_OPERATIONS_RANGE, "E"), _operation_keys)
+operation_rows_index = SheetRowIndex(_narrow_range(SHEET_OPERATION_ROWS_RANGE, "C"), _operation_row_keys)
+
+metrics.callback(
+    "row_index_lookups_total",
+    "Поиски в индексах строк: hit — без чтения листа, catch_up — с дочитыванием",
+    lambda: {
+        (name, result): count
+        for name, index in (("operations", operations_index), ("operationsRows", operation_rows_index))
+        for result, count in index.stats().items()
+    },
+    ("index", "result"),
+    kind="counter",
+)
@@ -1,31 +1,127 @@
+import threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from datetime import date
+from typing import Iterable, Iterator, Optional
 from googleapiclient.discovery import Resource
 
-from domain.models.expenses import Operation
+from common.logger import get_logger
+from common.metrics import instrument_methods
+from common.money import cents_to_units, to_cents
+from domain.models.expenses import Operation, OperationPage, OperationRow
 from domain.repositories import IOperationRepository
-from infrastructure.google_sheets.client import get_sheets_service, SPREADSHEET_ID
-from config.settings import SHEET_OPERATIONS_RANGE
+from infrastructure.google_sheets.client import (
+    get_sheets_service,
+    invalidate_reads,
+    iter_values,
+    parse_a1_range,
+    read_values,
+    SPREADSHEET_ID,
+)
+from infrastructure.google_sheets.balance_checkpoints import balance_checkpoints
+from infrastructure.google_sheets.operation_index import operation_rows_index, operations_index
+from infrastructure.google_sheets.operation_search_index import OperationSearchIndex
+from infrastructure.google_sheets.operation_row_repository import operation_row_to_values
+from config.settings import (
+    SHEET_OPERATIONS_RANGE,
+    SHEET_OPERATION_ROWS_RANGE,
+    SHEET_ID_OPERATIONS,
+    SHEET_ID_OPERATION_ROWS,
+)
 
 
+logger = get_logger(__name__)
+
+
+# Поколение истории листа operations: растёт, когда меняются уже
+# записанные строки (отмена операции, сжатие архивацией). Агрегаты,
+# которые дочитывают лист от последней прочитанной строки (куб расходов),
+# при смене поколения пересчитываются заново.
+_history_generation = 0
+_history_lock = threading.Lock()
+
+
+def _bump_history_generation() -> None:
+    global _history_generation
+    with _history_lock:
+        _history_generation += 1
+
+
+def operation_to_values(op: Operation) -> list:
+    """
+    Строка листа operations для объекта Operation (порядок колонок A:J).
+    """
+    return [
+        op.group_id,            # Group
+        op.date.isoformat(),    # Date
+        op.id,                  # Id
+        op.operation_type,      # OperationType
+        op.person_id,           # Person
+        "TRUE" if op.is_expense else "FALSE",    # IsExpense
+        op.category,            # Category
+        op.comment,             # Comment
+        cents_to_units(op.amount_cents),  # Amount (в рублях)
+        "TRUE" if op.active else "FALSE",  # Active
+    ]
+
+
+def _append_cells_request(sheet_id: int, rows: list[list]) -> dict:
+    """
+    Запрос appendCells для spreadsheets.batchUpdate.
+    Строки пишутся как при valueInputOption="RAW": числа — числами,
+    всё остальное — строками.
+    """
+    def cell(value) -> dict:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return {"userEnteredValue": {"numberValue": value}}
+        return {"userEnteredValue": {"stringValue": str(value)}}
+
+    return {
+        "appendCells": {
+            "sheetId": sheet_id,
+            "rows": [{"values": [cell(v) for v in row]} for row in rows],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+def _delete_rows_requests(sheet_id: int, row_numbers: list[int]) -> list[dict]:
+    """
+    Запросы deleteDimension для строк листа (номера с 1).
+
+    Подряд идущие строки удаляются одним запросом; запросы идут
+    снизу вверх, чтобы удаление не сдвигало ещё не удалённые строки.
+    """
+    runs: list[tuple[int, int]] = []
+    for n in sorted(set(row_numbers)):
+        if runs and runs[-1][1] == n - 1:
+            runs[-1] = (runs[-1][0], n)
+        else:
+            runs.append((n, n))
+
+    return [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "dimension": "ROWS",
+                    "startIndex": first - 1,
+                    "endIndex": last,
+                }
+            }
+        }
+        for first, last in reversed(runs)
+    ]
+
+
+@instrument_methods
 class OperationSheetRepository(IOperationRepository):
     def __init__(self) -> None:
         self.service: Resource = get_sheets_service()
 
     def create(self, op: Operation) -> None:
         body = {
-            "values": [[
-                op.group_id,            # Group
-                op.date.isoformat(),    # Date
-                op.id,                  # Id
-                op.operation_type,      # OperationType
-                op.person_id,           # Person
-                "TRUE" if op.is_expense else "FALSE",    # IsExpense
-                op.category,            # Category
-                op.comment,             # Comment
-                op.amount,              # Amount
-                "TRUE" if op.active else "FALSE",  # Active
-            ]]
+            "values": [operation_to_values(op)]
         }
 
         (
@@ -39,6 +135,57 @@ class OperationSheetRepository(IOperationRepository):
             )
             .execute()
         )
+        invalidate_reads(SHEET_OPERATIONS_RANGE)
+        operation_search_index.add(op)
+
+    def create_batch(self, ops: list[Operation], rows: list[OperationRow]) -> None:
+        """
+        Сохранить несколько операций и их строки operationsRows
+        одним запросом spreadsheets.batchUpdate (appendCells в оба листа).
+
+        Если GID листов не заданы в настройках, пишем двумя
+        values.append — по одному на лист.
+        """
+        if not ops and not rows:
+            return
+
+        op_values = [operation_to_values(op) for op in ops]
+        row_values = [operation_row_to_values(r) for r in rows]
+
+        if SHEET_ID_OPERATIONS is None or SHEET_ID_OPERATION_ROWS is None:
+            for range_name, values in (
+                (SHEET_OPERATIONS_RANGE, op_values),
+                (SHEET_OPERATION_ROWS_RANGE, row_values),
+            ):
+                if not values:
+                    continue
+                (
+                    self.service.spreadsheets()
+                    .values()
+                    .append(
+                        spreadsheetId=SPREADSHEET_ID,
+                        range=range_name,
+                        valueInputOption="RAW",
+                        body={"values": values},
+                    )
+                    .execute()
+                )
+        else:
+            requests = []
+            if op_values:
+                requests.append(_append_cells_request(SHEET_ID_OPERATIONS, op_values))
+            if row_values:
+                requests.append(_append_cells_request(SHEET_ID_OPERATION_ROWS, row_values))
+
+            self.service.spreadsheets().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID,
+                body={"requests": requests},
+            ).execute()
+
+        invalidate_reads(SHEET_OPERATIONS_RANGE)
+        invalidate_reads(SHEET_OPERATION_ROWS_RANGE)
+        for op in ops:
+            operation_search_index.add(op)
 
     def get_operations_for_group(
         self,
@@ -49,86 +196,352 @@ class OperationSheetRepository(IOperationRepository):
         """
         Читает операции группы из Google Sheets и фильтрует по периоду.
         """
-        # 1. Читаем все строки из листа operations
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_OPERATIONS_RANGE,
+        # Читаем все строки из листа operations
+        rows = read_values(self.service, SHEET_OPERATIONS_RANGE)
+        return list(_filter_group_operations(rows, group_id, start_date, end_date))
+
+    def iter_operations_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[Operation]:
+        """
+        То же, что get_operations_for_group, но лист читается порциями
+        и операции отдаются по одной — память не зависит от размера листа.
+        """
+        rows = (row for _, row in iter_values(self.service, SHEET_OPERATIONS_RANGE))
+        yield from _filter_group_operations(rows, group_id, start_date, end_date)
+
+    def iter_all(self, start_row: int | None = None) -> Iterator[tuple[int, Operation]]:
+        """
+        Все операции всех групп с номерами строк листа, порциями.
+        start_row — начать с этой строки (например, продолжить выгрузку).
+        """
+        for row_no, row in iter_values(self.service, SHEET_OPERATIONS_RANGE, start_row=start_row):
+            op = parse_operation_values(row)
+            if op is not None:
+                yield row_no, op
+
+    def find_written(self, operation_ids: list[str]) -> tuple[set[str], set[str]]:
+        """
+        Какие из операций уже записаны: (id, чья строка есть в operations,
+        id, чьи строки есть в operationsRows). Индексы обоих листов
+        дочитываются по одному разу на весь список.
+        """
+        in_operations = operations_index.present(self.service, [("id", op_id) for op_id in operation_ids])
+        in_rows = operation_rows_index.present(self.service, operation_ids)
+        return {key[1] for key in in_operations}, set(in_rows)
+
+    def get_by_id(self, operation_id: str) -> Optional[Operation]:
+        """
+        Операция по id: номер строки берётся из индекса,
+        читается только эта строка листа.
+        """
+        for attempt in range(2):
+            row_numbers = operations_index.lookup(self.service, ("id", operation_id))
+            if not row_numbers:
+                return None
+            op = self._read_operation_at(row_numbers[-1])
+            if op is not None and op.id == operation_id:
+                return op
+            # Строки листа сдвинулись (например, их удалили вручную) — перестраиваем индекс
+            operations_index.reset()
+            operation_rows_index.reset()
+        return None
+
+    def get_last_active_for_person(self, group_id: str, person_id: str) -> Optional[Operation]:
+        """
+        Последняя активная операция, которую пользователь person_id
+        зарегистрировал в группе group_id.
+        """
+        group = group_id.strip().upper()
+        key = ("person", group, person_id)
+
+        for attempt in range(2):
+            row_numbers = operations_index.lookup(self.service, key, refresh=True)
+            for row_no in reversed(row_numbers):
+                op = self._read_operation_at(row_no)
+                if op is None or op.group_id.strip().upper() != group or op.person_id.strip() != person_id:
+                    # Листы сжали архивацией из другого процесса — номера строк устарели
+                    break
+                if op.active:
+                    return op
+            else:
+                return None
+            operations_index.reset()
+            operation_rows_index.reset()
+        raise RuntimeError(f"Не удалось найти операции пользователя {person_id}: листы меняются.")
+
+    def get_page_for_group(
+        self,
+        group_id: str,
+        limit: int,
+        before_row: int | None = None,
+        after_row: int | None = None,
+    ) -> OperationPage:
+        """
+        Страница журнала группы по порядку записи: limit операций
+        строго до строки before_row (None — самые новые) или, если задан
+        after_row, сразу после неё.
+
+        Номера строк группы берутся из индекса, читаются только
+        строки страницы — одним values.batchGet.
+        """
+        group = group_id.strip().upper()
+        sheet = parse_a1_range(SHEET_OPERATIONS_RANGE)[0]
+
+        for attempt in range(2):
+            row_numbers = operations_index.lookup(self.service, ("group", group), refresh=True)
+            if after_row is not None:
+                start = bisect_right(row_numbers, after_row)
+                page_rows = row_numbers[start:start + limit]
+            else:
+                end = bisect_left(row_numbers, before_row) if before_row is not None else len(row_numbers)
+                page_rows = row_numbers[max(0, end - limit):end]
+            if not page_rows:
+                return OperationPage(
+                    has_older=bool(row_numbers) and after_row is not None and row_numbers[0] <= after_row,
+                    has_newer=bool(row_numbers) and before_row is not None and row_numbers[-1] >= before_row,
+                )
+
+            result = (
+                self.service.spreadsheets()
+                .values()
+                .batchGet(
+                    spreadsheetId=SPREADSHEET_ID,
+                    ranges=[f"{sheet}!A{n}:J{n}" for n in page_rows],
+                )
+                .execute()
             )
-            .execute()
+            operations = [
+                parse_operation_values((vr.get("values") or [[]])[0])
+                for vr in result.get("valueRanges", [])
+            ]
+            if len(operations) == len(page_rows) and all(
+                op is not None and op.group_id.strip().upper() == group for op in operations
+            ):
+                break
+            # Листы сжали архивацией из другого процесса — номера строк устарели
+            operations_index.reset()
+            operation_rows_index.reset()
+        else:
+            raise RuntimeError(f"Не удалось прочитать журнал группы {group_id}: листы меняются.")
+
+        return OperationPage(
+            items=list(reversed(list(zip(page_rows, operations)))),
+            has_older=row_numbers[0] < page_rows[0],
+            has_newer=row_numbers[-1] > page_rows[-1],
         )
-        
-        rows = result.get("values", [])
-        
-        operations: list[Operation] = []
-
-        skipped_date = 0
-        
-        for i, row in enumerate(rows):  # <- ДОБАВИТЬ enumerate для i
-           
-            # Если строка пустая или слишком короткая — пропускаем
-            if len(row) < 10:
-                continue
-            
-            # Распаковываем колонки
-            row_group_id = row[0]
-            row_date_str = row[1]
-            row_id = row[2]
-            row_op_type = row[3]
-            row_person_id = row[4]
-            row_is_expense_str = row[5]
-            row_category = row[6]
-            row_comment = row[7]
-            row_amount_str = row[8]
-            row_active_str = row[9]
-            
-            # 2. Фильтруем по group_id
-            if row_group_id != group_id:
-                continue
-            
-            # 3. Парсим дату
-            try:
-                row_date = datetime.fromisoformat(row_date_str).date()
-            except (ValueError, AttributeError) as e:
-                print(f"Failed to parse date '{row_date_str}': {e}")
-                continue
-            
-            # 4. Фильтруем по периоду
-            if start_date and row_date < start_date:
-                skipped_date += 1
-                continue
-            if end_date and row_date > end_date:
-                skipped_date += 1
-                continue
-            
-            # 5. Парсим is_expense
-            is_expense = row_is_expense_str.upper() == "TRUE"
-            
-            # 6. Парсим amount (сумму)
-            try:
-                amount = float(row_amount_str)
-            except (ValueError, TypeError):
-                amount = 0.0
-            
-            # 7. Парсим active
-            active = row_active_str.upper() == "TRUE"
-            
-            # 8. Собираем объект Operation
-            op = Operation(
-                group_id=row_group_id,
-                date=datetime.combine(row_date, datetime.min.time()),
-                id=row_id,
-                operation_type=row_op_type,
-                person_id=row_person_id,
-                is_expense=is_expense,
-                category=row_category,
-                comment=row_comment,
-                amount=amount,
-                active=active,
+
+    def search(self, group_id: str, query: str) -> list[Operation]:
+        """
+        Активные операции группы, в комментарии или категории которых
+        есть все слова запроса (по началу слова), от новых к старым.
+        """
+        return operation_search_index.search(self.service, group_id, query)
+
+    def history_generation(self) -> int:
+        """
+        Поколение истории листа (см. _history_generation).
+        """
+        return _history_generation
+
+    def set_active(self, operation_id: str, active: bool) -> bool:
+        """
+        Проставить флаг Active операции и всех её строк operationsRows
+        одним запросом values.batchUpdate. Строки ищутся по индексу.
+
+        Возвращает False, если операция не найдена.
+        """
+        ops_sheet = parse_a1_range(SHEET_OPERATIONS_RANGE)[0]
+        rows_sheet = parse_a1_range(SHEET_OPERATION_ROWS_RANGE)[0]
+
+        for attempt in range(2):
+            op_row_numbers = operations_index.lookup(self.service, ("id", operation_id))
+            if not op_row_numbers:
+                return False
+            row_row_numbers = operation_rows_index.lookup(self.service, operation_id)
+
+            # Сверяем id в найденных строках: листы могли сжать
+            # архивацией из другого процесса, и номера строк устарели
+            ranges = [f"{ops_sheet}!C{n}" for n in op_row_numbers] + [
+                f"{rows_sheet}!C{n}" for n in row_row_numbers
+            ]
+            result = (
+                self.service.spreadsheets()
+                .values()
+                .batchGet(spreadsheetId=SPREADSHEET_ID, ranges=ranges)
+                .execute()
             )
-            
-            operations.append(op)
-        
-        return operations
+            found_ids = [
+                (vr.get("values") or [[""]])[0][0] for vr in result.get("valueRanges", [])
+            ]
+            if all(found_id == operation_id for found_id in found_ids):
+                break
+            operations_index.reset()
+            operation_rows_index.reset()
+        else:
+            raise RuntimeError(f"Не удалось найти строки операции {operation_id}: листы меняются.")
+
+        flag = "TRUE" if active else "FALSE"
+        # Active: колонка J в operations и колонка H в operationsRows
+        data = [
+            {"range": f"{ops_sheet}!J{n}", "values": [[flag]]} for n in op_row_numbers
+        ] + [
+            {"range": f"{rows_sheet}!H{n}", "values": [[flag]]} for n in row_row_numbers
+        ]
+
+        self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=SPREADSHEET_ID,
+            body={"valueInputOption": "RAW", "data": data},
+        ).execute()
+
+        # Баланс, посчитанный до этих строк, больше не верен
+        if row_row_numbers:
+            balance_checkpoints.discard(from_row=min(row_row_numbers))
+        _bump_history_generation()
+        operation_search_index.set_active(operation_id, active)
+
+        invalidate_reads(SHEET_OPERATIONS_RANGE)
+        invalidate_reads(SHEET_OPERATION_ROWS_RANGE)
+        return True
+
+    def compact(
+        self,
+        op_row_numbers: list[int],
+        row_row_numbers: list[int],
+        opening_rows: list[OperationRow],
+    ) -> None:
+        """
+        Удалить из листов operations и operationsRows строки с указанными
+        номерами и дописать в operationsRows строки входящего остатка —
+        одним spreadsheets.batchUpdate, т.е. атомарно.
+
+        Строки, дописанные в конец листов во время архивации, не страдают:
+        номера строк выше них при дописывании не меняются.
+        """
+        if SHEET_ID_OPERATIONS is None or SHEET_ID_OPERATION_ROWS is None:
+            raise RuntimeError(
+                "Для архивации нужны SHEET_ID_OPERATIONS и SHEET_ID_OPERATION_ROWS (GID листов)."
+            )
+
+        requests = _delete_rows_requests(SHEET_ID_OPERATIONS, op_row_numbers)
+        requests += _delete_rows_requests(SHEET_ID_OPERATION_ROWS, row_row_numbers)
+        if opening_rows:
+            requests.append(
+                _append_cells_request(
+                    SHEET_ID_OPERATION_ROWS,
+                    [operation_row_to_values(r) for r in opening_rows],
+                )
+            )
+        if not requests:
+            return
+
+        self.service.spreadsheets().batchUpdate(
+            spreadsheetId=SPREADSHEET_ID,
+            body={"requests": requests},
+        ).execute()
+
+        # Номера строк сдвинулись
+        operations_index.reset()
+        operation_rows_index.reset()
+        balance_checkpoints.discard()
+        _bump_history_generation()
+        operation_search_index.reset()
+        invalidate_reads(SHEET_OPERATIONS_RANGE)
+        invalidate_reads(SHEET_OPERATION_ROWS_RANGE)
+
+    def _read_operation_at(self, row_no: int) -> Optional[Operation]:
+        sheet = parse_a1_range(SHEET_OPERATIONS_RANGE)[0]
+        values = read_values(self.service, f"{sheet}!A{row_no}:J{row_no}")
+        return parse_operation_values(values[0]) if values else None
+
+
+def parse_operation_values(row: list[str]) -> Optional[Operation]:
+    """
+    Объект Operation из строки листа operations
+    (None, если строка короткая или дата не разбирается).
+    """
+    # Если строка пустая или слишком короткая — пропускаем
+    if len(row) < 10:
+        return None
+
+    # Распаковываем колонки
+    row_group_id = row[0]
+    row_date_str = row[1]
+    row_id = row[2]
+    row_op_type = row[3]
+    row_person_id = row[4]
+    row_is_expense_str = row[5]
+    row_category = row[6]
+    row_comment = row[7]
+    row_amount_str = row[8]
+    row_active_str = row[9]
+
+    # 1. Парсим дату
+    try:
+        row_date = datetime.fromisoformat(row_date_str).date()
+    except (ValueError, AttributeError) as e:
+        logger.warning(
+            "Failed to parse date %r: %s", row_date_str, e, extra={"rate_limit_key": "operations_bad_date"}
+        )
+        return None
+
+    # 2. Парсим is_expense
+    is_expense = row_is_expense_str.upper() == "TRUE"
+
+    # 3. Парсим amount (сумму) в копейки
+    try:
+        amount_cents = to_cents(row_amount_str)
+    except (ValueError, TypeError):
+        amount_cents = 0
+
+    # 4. Парсим active
+    active = row_active_str.upper() == "TRUE"
+
+    # 5. Собираем объект Operation
+    return Operation(
+        group_id=row_group_id,
+        date=datetime.combine(row_date, datetime.min.time()),
+        id=row_id,
+        operation_type=row_op_type,
+        person_id=row_person_id,
+        is_expense=is_expense,
+        category=row_category,
+        comment=row_comment,
+        amount_cents=amount_cents,
+        active=active,
+    )
+
+
+def _filter_group_operations(
+    rows: Iterable[list[str]],
+    group_id: str,
+    start_date: date | None,
+    end_date: date | None,
+) -> Iterator[Operation]:
+    """
+    Разбирает строки листа operations и отдаёт операции группы за период.
+    """
+    for row in rows:
+        # Фильтруем по group_id до разбора остальных колонок
+        if len(row) < 10 or row[0] != group_id:
+            continue
+
+        op = parse_operation_values(row)
+        if op is None:
+            continue
+
+        # Фильтруем по периоду
+        row_date = op.date.date()
+        if start_date and row_date < start_date:
+            continue
+        if end_date and row_date > end_date:
+            continue
+
+        yield op
+
+
+# Общий на процесс поисковый индекс по комментариям и категориям операций
+operation_search_index = OperationSearchIndex(SHEET_OPERATIONS_RANGE, parse_operation_values)
@@ -1,11 +1,63 @@
+from datetime import date, datetime
+from typing import Iterator, Optional
+
 from googleapiclient.discovery import Resource
 
+from common.metrics import instrument_methods
+from common.money import cents_to_units, to_cents
 from domain.models.expenses import OperationRow
 from domain.repositories import IOperationRowRepository
-from infrastructure.google_sheets.client import get_sheets_service, SPREADSHEET_ID
+from infrastructure.google_sheets.client import (
+    get_sheets_service,
+    invalidate_reads,
+    iter_values,
+    SPREADSHEET_ID,
+)
 from config.settings import SHEET_OPERATION_ROWS_RANGE
 
 
+def operation_row_to_values(r: OperationRow) -> list:
+    """
+    Строка листа operationsRows для объекта OperationRow (порядок колонок A:H).
+    """
+    return [
+        r.group_id,                        # Group 
+        r.date.isoformat(),                 # Date
+        r.operation_id,                     # Operation
+        r.person_id,                        # Person
+        r.category,                         # Category
+        r.row_type,                         # type: debit/credit
+        cents_to_units(r.amount_cents),     # Amount (в рублях)
+        "TRUE" if r.active else "FALSE",    # Active
+    ]
+
+
+def parse_operation_row_values(row: list[str]) -> Optional[OperationRow]:
+    """
+    Объект OperationRow из строки листа operationsRows
+    (None, если строка короткая или дата/сумма не разбираются).
+    """
+    if len(row) < 7:
+        return None
+    try:
+        row_date = datetime.fromisoformat(row[1].strip())
+        amount_cents = to_cents(row[6])
+    except ValueError:
+        return None
+    active = row[7].strip().upper() != "FALSE" if len(row) > 7 else True
+    return OperationRow(
+        group_id=row[0].strip(),
+        date=row_date,
+        operation_id=row[2].strip(),
+        person_id=row[3].strip(),
+        category=row[4].strip(),
+        row_type=row[5].strip().lower(),
+        amount_cents=amount_cents,
+        active=active,
+    )
+
+
+@instrument_methods
 class OperationRowSheetRepository(IOperationRowRepository):
     def __init__(self) -> None:
         self.service: Resource = get_sheets_service()
@@ -14,18 +66,7 @@ class OperationRowSheetRepository(IOperationRowRepository):
         if not rows:
             return
 
-        values = []
-        for r in rows:
-            values.append([
-                r.group_id,                        # Group 
-                r.date.isoformat(),                 # Date
-                r.operation_id,                     # Operation
-                r.person_id,                        # Person
-                r.category,                         # Category
-                r.row_type,                         # type: debit/credit
-                r.amount,                           # Amount
-                "TRUE" if r.active else "FALSE",    # Active
-            ])
+        values = [operation_row_to_values(r) for r in rows]
 
         body = {"values": values}
 
@@ -40,3 +81,38 @@ class OperationRowSheetRepository(IOperationRowRepository):
             )
             .execute()
         )
+        invalidate_reads(SHEET_OPERATION_ROWS_RANGE)
+
+    def iter_rows_for_group(
+        self,
+        group_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[OperationRow]:
+        """
+        Строки operationsRows группы за период (границы включительно).
+        Лист читается порциями, строки отдаются по одной.
+        """
+        target = group_id.strip().upper()
+        for _, values in iter_values(self.service, SHEET_OPERATION_ROWS_RANGE):
+            if not values or values[0].strip().upper() != target:
+                continue
+            row = parse_operation_row_values(values)
+            if row is None:
+                continue
+            row_date = row.date.date()
+            if start_date and row_date < start_date:
+                continue
+            if end_date and row_date > end_date:
+                continue
+            yield row
+
+    def iter_all(self, start_row: int | None = None) -> Iterator[tuple[int, OperationRow]]:
+        """
+        Все строки операций всех групп с номерами строк листа, порциями.
+        start_row — начать с этой строки (например, продолжить выгрузку).
+        """
+        for row_no, values in iter_values(self.service, SHEET_OPERATION_ROWS_RANGE, start_row=start_row):
+            row = parse_operation_row_values(values)
+            if row is not None:
+                yield row_no, row
@@ -0,0 +1,163 @@
+# infrastructure/google_sheets/operation_search_index.py
+
+import re
+import threading
+from dataclasses import replace
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional
+
+from domain.models.expenses import Operation
+from infrastructure.google_sheets.client import iter_values
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Слова текста для поиска: в нижнем регистре, "ё" -> "е"
+    (в комментариях пишут и "счёт", и "счет").
+    """
+    return _WORD_RE.findall(text.casefold().replace("ё", "е"))
+
+
+class OperationSearchIndex:
+    """
+    Полнотекстовый (обратный) индекс по комментариям и категориям операций.
+
+    Для каждой группы: слово -> id операций, где оно встречается,
+    плюс отсортированный список слов — по нему ищутся слова с заданным
+    началом (поиск по префиксу: "студ" находит "студия", "студию").
+
+    Строится одним чтением листа operations при первом поиске, дальше
+    дочитывает только новые строки (как SheetRowIndex). Операции,
+    записанные этим процессом, добавляются сразу (add), отмена
+    меняет флаг (set_active). После сжатия листа — reset().
+
+    Лист могут сжать и из другого процесса (archive_operations.py):
+    тогда номера строк сдвигаются и дочитывание "после последней
+    строки" пропустило бы новые операции. Поэтому дочитывание начинается
+    с последней учтённой строки: если в ней уже другая операция (или
+    строки нет), индекс строится заново.
+
+    parse(row) разбирает строку листа в Operation (None — строку пропускаем).
+    """
+
+    def __init__(self, range_name: str, parse: Callable[[list[str]], Optional[Operation]]) -> None:
+        self.range_name = range_name
+        self.parse = parse
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # id операции -> операция
+        self._operations: Dict[str, Operation] = {}
+        # id операции -> порядковый номер добавления в индекс (порядок
+        # записи): сортировка операций одного дня не зависит от порядка set
+        self._positions: Dict[str, int] = {}
+        # GROUP_ID -> слово -> id операций
+        self._postings: Dict[str, Dict[str, set[str]]] = {}
+        # GROUP_ID -> отсортированные слова группы (для поиска по префиксу)
+        self._words: Dict[str, List[str]] = {}
+        # последняя прочитанная строка листа (0 — ещё ничего не читали)
+        # и id операции в ней — по нему видно, что строки сдвинулись
+        self._last_row = 0
+        self._last_id: Optional[str] = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def is_warm(self) -> bool:
+        """
+        Индекс уже построен (хотя бы раз читал лист).
+        Без _lock: его держат на время чтения листа, а проверку
+        вызывают из цикла событий (/healthz).
+        """
+        return self._last_row > 0
+
+    def add(self, op: Operation) -> None:
+        with self._lock:
+            self._add(op)
+
+    def set_active(self, operation_id: str, active: bool) -> None:
+        with self._lock:
+            op = self._operations.get(operation_id)
+            if op is not None:
+                op.active = active
+
+    def search(self, service, group_id: str, query: str) -> List[Operation]:
+        """
+        Активные операции группы, где есть все слова запроса
+        (каждое — как начало слова), от новых к старым.
+        """
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+        group = group_id.strip().upper()
+
+        with self._lock:
+            self._catch_up(service)
+
+            postings = self._postings.get(group, {})
+            words = self._words.get(group, [])
+            found: set[str] | None = None
+            for prefix in query_words:
+                matched: set[str] = set()
+                i = bisect_left(words, prefix)
+                while i < len(words) and words[i].startswith(prefix):
+                    matched |= postings[words[i]]
+                    i += 1
+                found = matched if found is None else found & matched
+                if not found:
+                    return []
+
+            results = [
+                (self._operations[op_id], self._positions[op_id])
+                for op_id in found
+                if self._operations[op_id].active
+            ]
+
+        # Дата — с точностью до дня; внутри дня новее та, что записана позже
+        results.sort(key=lambda item: (item[0].date, item[1]), reverse=True)
+        return [op for op, _ in results]
+
+    def _add(self, op: Operation) -> None:
+        if op.id in self._operations:
+            # Уже в индексе (записана этим процессом и потом дочитана из листа)
+            self._operations[op.id].active = op.active
+            return
+        # Копия: вызывающий код может дальше менять свой объект
+        self._operations[op.id] = replace(op)
+        self._positions[op.id] = len(self._positions)
+
+        group = op.group_id.strip().upper()
+        postings = self._postings.setdefault(group, {})
+        words = self._words.setdefault(group, [])
+        for word in set(tokenize(f"{op.comment} {op.category}")):
+            ids = postings.get(word)
+            if ids is None:
+                ids = postings[word] = set()
+                insort(words, word)
+            ids.add(op.id)
+
+    def _catch_up(self, service) -> None:
+        rows = iter_values(service, self.range_name, start_row=self._last_row or None)
+        if self._last_row:
+            first = next(rows, None)
+            if first is None or first[0] != self._last_row or self._row_id(first[1]) != self._last_id:
+                # Строки сдвинулись (лист сжали в другом процессе) — строим заново
+                rows.close()
+                self._reset()
+                rows = iter_values(service, self.range_name)
+
+        for row_no, row in rows:
+            op = self.parse(row)
+            self._last_row = row_no
+            self._last_id = op.id if op is not None else None
+            if op is not None:
+                self._add(op)
+
+    def _row_id(self, row: list[str]) -> Optional[str]:
+        op = self.parse(row)
+        return op.id if op is not None else None
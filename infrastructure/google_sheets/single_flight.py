@@ -0,0 +1,109 @@
+# infrastructure/google_sheets/single_flight.py
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных чтений ("single flight").
+
+    Если несколько потоков одновременно просят один и тот же ключ
+    (например, диапазон "userGroups!A2:B"), реальный запрос выполняет
+    только первый из них, а остальные ждут и получают тот же результат.
+
+    Дополнительно результат можно переиспользовать в течение
+    freshness_seconds после загрузки (0 — не переиспользовать).
+
+    Каждый ключ относится к "тегу" (для Sheets — имя листа).
+    invalidate(tag) после записи в лист:
+    - выбрасывает сохранённые результаты этого листа;
+    - отвязывает уже идущие чтения, чтобы новые вызовы не получили
+      данные, прочитанные до записи.
+    """
+
+    def __init__(self, freshness_seconds: float = 0.0) -> None:
+        self.freshness_seconds = freshness_seconds
+        self._lock = threading.Lock()
+        # ключ -> (тег, Future идущего чтения)
+        self._in_flight: Dict[str, Tuple[str, Future]] = {}
+        # ключ -> (тег, время загрузки, результат)
+        self._fresh: Dict[str, Tuple[str, float, Any]] = {}
+        # тег -> номер "поколения", растёт при каждой записи
+        self._generations: Dict[str, int] = {}
+        # сколько вызовов взяли сохранённый результат / присоединились
+        # к идущему чтению / выполнили чтение сами
+        self._stats: Dict[str, int] = {"hit": 0, "joined": 0, "miss": 0}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Счётчики вызовов do(): hit, joined, miss.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def do(self, key: str, fn: Callable[[], T], tag: str = "") -> T:
+        """
+        Выполнить fn() для ключа key или присоединиться к уже идущему вызову.
+
+        Результат общий для всех ожидающих — менять его нельзя.
+        """
+        with self._lock:
+            if self.freshness_seconds > 0:
+                cached = self._fresh.get(key)
+                if cached is not None and time.monotonic() - cached[1] <= self.freshness_seconds:
+                    self._stats["hit"] += 1
+                    return cached[2]
+
+            entry = self._in_flight.get(key)
+            is_leader = entry is None
+            self._stats["miss" if is_leader else "joined"] += 1
+            if is_leader:
+                future: Future = Future()
+                self._in_flight[key] = (tag, future)
+                generation = self._generations.get(tag, 0)
+            else:
+                future = entry[1]
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._forget_in_flight(key, future)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._forget_in_flight(key, future)
+            # Сохраняем, только если за время чтения в лист никто не писал
+            if self.freshness_seconds > 0 and self._generations.get(tag, 0) == generation:
+                self._fresh[key] = (tag, time.monotonic(), result)
+
+        future.set_result(result)
+        return result
+
+    def invalidate(self, tag: str) -> None:
+        """
+        Забыть всё, что прочитано (или читается сейчас) по тегу tag.
+        """
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in [k for k, v in self._fresh.items() if v[0] == tag]:
+                del self._fresh[key]
+            for key in [k for k, v in self._in_flight.items() if v[0] == tag]:
+                # Ждущие этого чтения получат его результат,
+                # а новые вызовы начнут свежее чтение
+                del self._in_flight[key]
+
+    def _forget_in_flight(self, key: str, future: Future) -> None:
+        # Чтение могли уже отвязать через invalidate() — тогда не трогаем
+        entry = self._in_flight.get(key)
+        if entry is not None and entry[1] is future:
+            del self._in_flight[key]
@@ -1,15 +1,23 @@
 # infrastructure/google_sheets/user_group_repository.py
 
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
 from googleapiclient.discovery import Resource
 
+from common.metrics import instrument_methods
 from domain.models.groups import UserGroupLink
 from domain.repositories import IUserGroupRepository
-from infrastructure.google_sheets.client import get_sheets_service, SPREADSHEET_ID
+from infrastructure.google_sheets.client import (
+    get_sheets_service,
+    invalidate_reads,
+    read_values,
+    SPREADSHEET_ID,
+)
+from infrastructure.google_sheets.locks import sheet_write_locks
 from config.settings import SHEET_USER_GROUPS_RANGE, SHEET_ID_USER_GROUPS
 
 
+@instrument_methods
 class UserGroupSheetRepository(IUserGroupRepository):
     """
     Репозиторий связки пользователь -> группа
@@ -42,16 +50,7 @@ class UserGroupSheetRepository(IUserGroupRepository):
                 start_row_str += ch
         start_row_index = int(start_row_str) if start_row_str else 1
 
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_USER_GROUPS_RANGE,
-            )
-            .execute()
-        )
-        values = result.get("values", [])
+        values = read_values(self.service, SHEET_USER_GROUPS_RANGE)
         return values, start_row_index
 
     def get_by_user_id(self, user_id: str) -> Optional[UserGroupLink]:
@@ -72,16 +71,14 @@ class UserGroupSheetRepository(IUserGroupRepository):
 
         return None
 
-    def upsert(self, user_id: str, group_id: str) -> UserGroupLink:
+    def _find_row_index(self, user_id: str) -> Optional[int]:
         """
-        Обновляет запись для userId, если она есть,
-        иначе добавляет новую строку.
+        Перечитывает лист и возвращает абсолютный номер строки с userId
+        (или None, если такой строки нет).
         """
         values, start_row_index = self._read_all_rows()
 
-        row_index = None
         current_row_offset = 0
-
         for row in values:
             current_row_offset += 1
             if not row:
@@ -90,14 +87,82 @@ class UserGroupSheetRepository(IUserGroupRepository):
             if not row_user_id:
                 continue
             if row_user_id == str(user_id):
-                row_index = start_row_index + current_row_offset - 1
-                break
+                return start_row_index + current_row_offset - 1
 
-        norm_group_id = group_id.strip().upper()
+        return None
+
+    def get_member_ids(self, group_id: str) -> List[str]:
+        """
+        Возвращает список user_id участников группы group_id.
+        """
+        values, _ = self._read_all_rows()
+        target = str(group_id).strip().upper()
+
+        member_ids: List[str] = []
+        for row in values:
+            if not row:
+                continue
+            row_user_id = row[0].strip()
+            row_group_id = row[1].strip().upper() if len(row) > 1 else ""
+            if row_user_id and row_group_id == target:
+                member_ids.append(row_user_id)
+        return member_ids
+
+    def get_all_members(self) -> Dict[str, List[str]]:
+        """
+        Участники всех групп за одно чтение листа: {GROUP_ID -> [user_id]}.
+        """
+        values, _ = self._read_all_rows()
+
+        members: Dict[str, List[str]] = {}
+        for row in values:
+            if not row:
+                continue
+            row_user_id = row[0].strip()
+            row_group_id = row[1].strip().upper() if len(row) > 1 else ""
+            if row_user_id and row_group_id:
+                members.setdefault(row_group_id, []).append(row_user_id)
+        return members
 
-        if row_index is None:
-            body = {"values": [[str(user_id), norm_group_id]]}
+    def upsert(self, user_id: str, group_id: str) -> UserGroupLink:
+        """
+        Обновляет запись для userId, если она есть,
+        иначе добавляет новую строку.
 
+        Записи одного пользователя идут строго по очереди, иначе
+        два одновременных upsert оба не находят строку и добавляют дубль.
+        Обновление по номеру строки дополнительно берёт замок "rows":
+        параллельный deleteDimension сдвигает номера строк.
+        """
+        norm_group_id = group_id.strip().upper()
+        body = {"values": [[str(user_id), norm_group_id]]}
+
+        with sheet_write_locks.hold(("userGroups", "user", str(user_id))):
+            row_index = self._find_row_index(user_id)
+
+            if row_index is not None:
+                with sheet_write_locks.hold(("userGroups", "rows")):
+                    # Номер мог сдвинуться, пока мы ждали замок — перечитываем
+                    row_index = self._find_row_index(user_id)
+                    if row_index is not None:
+                        update_range = f"userGroups!A{row_index}:B{row_index}"
+
+                        (
+                            self.service.spreadsheets()
+                            .values()
+                            .update(
+                                spreadsheetId=SPREADSHEET_ID,
+                                range=update_range,
+                                valueInputOption="RAW",
+                                body=body,
+                            )
+                            .execute()
+                        )
+                        invalidate_reads(SHEET_USER_GROUPS_RANGE)
+                        return UserGroupLink(user_id=str(user_id), group_id=norm_group_id)
+
+            # Дописывание в конец листа не зависит от номеров строк,
+            # поэтому идёт параллельно с записями других пользователей
             (
                 self.service.spreadsheets()
                 .values()
@@ -109,21 +174,7 @@ class UserGroupSheetRepository(IUserGroupRepository):
                 )
                 .execute()
             )
-        else:
-            update_range = f"userGroups!A{row_index}:B{row_index}"
-            body = {"values": [[str(user_id), norm_group_id]]}
-
-            (
-                self.service.spreadsheets()
-                .values()
-                .update(
-                    spreadsheetId=SPREADSHEET_ID,
-                    range=update_range,
-                    valueInputOption="RAW",
-                    body=body,
-                )
-                .execute()
-            )
+            invalidate_reads(SHEET_USER_GROUPS_RANGE)
 
         return UserGroupLink(user_id=str(user_id), group_id=norm_group_id)
 
@@ -131,40 +182,32 @@ class UserGroupSheetRepository(IUserGroupRepository):
         """
         Удаляет строку с userId из листа userGroups, если она есть,
         удаляя строку со сдвигом вверх.
-        """
-        values, start_row_index = self._read_all_rows()
-
-        row_index = None
-        current_row_offset = 0
 
-        for row in values:
-            current_row_offset += 1
-            if not row:
-                continue
-            row_user_id = row[0].strip()
-            if not row_user_id:
-                continue
-            if row_user_id == str(user_id):
-                row_index = start_row_index + current_row_offset - 1
-                break
-
-        if row_index is None:
-            return
-
-        requests = [
-            {
-                "deleteDimension": {
-                    "range": {
-                        "sheetId": SHEET_ID_USER_GROUPS,
-                        "dimension": "ROWS",
-                        "startIndex": row_index - 1,
-                        "endIndex": row_index,
+        Поиск строки и удаление выполняются под замком "rows",
+        чтобы никто не записал по устаревшему номеру строки.
+        """
+        with sheet_write_locks.hold(("userGroups", "user", str(user_id))):
+            with sheet_write_locks.hold(("userGroups", "rows")):
+                row_index = self._find_row_index(user_id)
+
+                if row_index is None:
+                    return
+
+                requests = [
+                    {
+                        "deleteDimension": {
+                            "range": {
+                                "sheetId": SHEET_ID_USER_GROUPS,
+                                "dimension": "ROWS",
+                                "startIndex": row_index - 1,
+                                "endIndex": row_index,
+                            }
+                        }
                     }
-                }
-            }
-        ]
-
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=SPREADSHEET_ID,
-            body={"requests": requests},
-        ).execute()
+                ]
+
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=SPREADSHEET_ID,
+                    body={"requests": requests},
+                ).execute()
+                invalidate_reads(SHEET_USER_GROUPS_RANGE)
@@ -1,12 +1,20 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from googleapiclient.discovery import Resource
 
+from common.metrics import instrument_methods
 from domain.models.users import UserInfo
 from domain.repositories import IUserRepository
-from infrastructure.google_sheets.client import get_sheets_service, SPREADSHEET_ID
+from infrastructure.google_sheets.client import (
+    get_sheets_service,
+    invalidate_reads,
+    read_values,
+    SPREADSHEET_ID,
+)
+from infrastructure.google_sheets.locks import sheet_write_locks
 from config.settings import SHEET_USERS_RANGE
 
 
+@instrument_methods
 class UserSheetRepository(IUserRepository):
     """
     Репозиторий для листа users.
@@ -29,16 +37,7 @@ class UserSheetRepository(IUserRepository):
                 start_row_str += ch
         start_row_index = int(start_row_str) if start_row_str else 1
 
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_USERS_RANGE,
-            )
-            .execute()
-        )
-        values = result.get("values", [])
+        values = read_values(self.service, SHEET_USERS_RANGE)
         return values, start_row_index
 
     def get_by_id(self, user_id: str) -> Optional[UserInfo]:
@@ -56,27 +55,67 @@ class UserSheetRepository(IUserRepository):
 
         return None
 
+    def get_names(self, user_ids: List[str]) -> Dict[str, str]:
+        """
+        Имена нескольких пользователей за одно чтение листа users
+        (вместо отдельного get_by_id на каждого).
+        """
+        wanted = {str(uid) for uid in user_ids}
+        values, _ = self._read_all_rows()
+
+        names: Dict[str, str] = {}
+        for row in values:
+            if not row:
+                continue
+            row_user_id = row[0].strip()
+            if row_user_id not in wanted:
+                continue
+            name = row[1].strip() if len(row) > 1 else ""
+            if name:
+                names[row_user_id] = name
+        return names
+
+    def get_all_names(self) -> Dict[str, str]:
+        """
+        Имена всех пользователей за одно чтение листа users.
+        """
+        values, _ = self._read_all_rows()
+
+        names: Dict[str, str] = {}
+        for row in values:
+            if not row:
+                continue
+            row_user_id = row[0].strip()
+            name = row[1].strip() if len(row) > 1 else ""
+            if row_user_id and name:
+                names[row_user_id] = name
+        return names
+
     def create_if_not_exists(self, user_id: str, name: str) -> UserInfo:
-        existing = self.get_by_id(user_id)
-        if existing is not None:
-            return existing
-
-        body = {
-            "values": [
-                [str(user_id), name]
-            ]
-        }
-
-        (
-            self.service.spreadsheets()
-            .values()
-            .append(
-                spreadsheetId=SPREADSHEET_ID,
-                range=SHEET_USERS_RANGE,
-                valueInputOption="RAW",
-                body=body,
+        # Проверка и дописывание под замком пользователя:
+        # иначе два одновременных вызова добавят две одинаковые строки
+        with sheet_write_locks.hold(("users", "user", str(user_id))):
+            existing = self.get_by_id(user_id)
+            if existing is not None:
+                return existing
+
+            body = {
+                "values": [
+                    [str(user_id), name]
+                ]
+            }
+
+            (
+                self.service.spreadsheets()
+                .values()
+                .append(
+                    spreadsheetId=SPREADSHEET_ID,
+                    range=SHEET_USERS_RANGE,
+                    valueInputOption="RAW",
+                    body=body,
+                )
+                .execute()
             )
-            .execute()
-        )
+            invalidate_reads(SHEET_USERS_RANGE)
 
         return UserInfo(user_id=str(user_id), name=name)
@@ -0,0 +1,105 @@
+# infrastructure/idempotency/idempotency_store.py
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, TypeVar
+
+from common.logger import get_logger
+from domain.repositories import IIdempotencyStore
+from infrastructure.google_sheets.locks import KeyedLock
+
+
+logger = get_logger(__name__)
+
+
+T = TypeVar("T")
+
+# Значение "ключа нет" (None — допустимый результат)
+_MISSING = object()
+
+
+class IdempotencyStore(IIdempotencyStore):
+    """
+    Результаты уже выполненных записей по ключу идемпотентности
+    (например, "msg:<chat_id>:<message_id>" -> id созданной операции).
+
+    - В памяти — LRU на max_keys последних ключей.
+    - На диске — журнал JSON Lines: каждая новая запись дописывается
+      строкой {"k": ключ, "v": результат}. Когда строк становится вдвое
+      больше max_keys, журнал переписывается (только живые ключи).
+
+    Одинаковые ключи выполняются по очереди: второй вызов ждёт первый
+    и получает его результат. Если func упала, ключ не запоминается.
+    Если процесс упал между записью в Sheets и записью в журнал,
+    повтор всё же создаст дубль — это окно в одну строку журнала.
+    """
+
+    def __init__(self, path: str, max_keys: int) -> None:
+        self.path = path
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLock()
+        self._loaded = False
+        self._results: OrderedDict[str, Any] = OrderedDict()
+        # сколько строк сейчас в журнале
+        self._journal_lines = 0
+
+    def run_once(self, key: str, func: Callable[[], T]) -> T:
+        with self._key_locks.hold(key):
+            found = self._get(key)
+            if found is not _MISSING:
+                logger.info("Idempotent replay", extra={"idempotency_key": key})
+                return found
+            result = func()
+            self._put(key, result)
+            return result
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._results:
+                return _MISSING
+            self._results.move_to_end(key)
+            return self._results[key]
+
+    def _put(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._remember(key, result)
+            if self._journal_lines + 1 > 2 * self.max_keys:
+                self._rewrite_journal()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"k": key, "v": result}, ensure_ascii=False) + "\n")
+                self._journal_lines += 1
+
+    def _remember(self, key: str, result: Any) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_keys:
+            self._results.popitem(last=False)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._journal_lines += 1
+                try:
+                    record = json.loads(line)
+                    self._remember(record["k"], record["v"])
+                except (ValueError, KeyError, TypeError):
+                    # Недописанная строка (процесс упал посреди записи)
+                    continue
+
+    def _rewrite_journal(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, result in self._results.items():
+                f.write(json.dumps({"k": key, "v": result}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._journal_lines = len(self._results)
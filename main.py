@@ -9,8 +9,34 @@ from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config.settings import TELEGRAM_BOT_TOKEN
+from config.settings import (
+    ARCHIVE_DIR,
+    BALANCE_CHECKPOINT_INTERVAL_SECONDS,
+    DIGEST_ENABLED,
+    DIGEST_HOUR,
+    DIGEST_MESSAGES_PER_SECOND,
+    DIGEST_STATE_FILE,
+    IDEMPOTENCY_FILE,
+    IDEMPOTENCY_MAX_KEYS,
+    METRICS_HOST,
+    METRICS_PORT,
+    LOG_JSON,
+    LOG_LEVEL,
+    LOG_MODULE_LEVELS,
+    LOG_RATE_LIMIT_SECONDS,
+    TELEGRAM_BOT_TOKEN,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_SAMPLE_RATE,
+    TRACING_SLOW_UPDATE_SECONDS,
+    UPDATE_MAX_CONCURRENCY,
+    UPDATE_MAX_QUEUE_PER_USER,
+)
 from application.usecases.reports import ReportService
+from common.logger import get_logger, setup_logging
+from common.metrics import metrics
+from common.tracing import JsonlSpanExporter, OtlpHttpSpanExporter, SpanExporter, tracer
 from infrastructure.google_sheets.group_repository import GroupSheetRepository
 from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
 from infrastructure.google_sheets.user_repository import UserSheetRepository
@@ -20,10 +46,57 @@ from transport.telegram.registration_handlers import register_registration_handl
 
 from infrastructure.google_sheets.operation_repository import OperationSheetRepository
 from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.archive.operation_archive import OperationFileArchive
+from infrastructure.google_sheets.balance_checkpoints import balance_checkpoints
+from infrastructure.google_sheets.operation_index import operation_rows_index, operations_index
+from infrastructure.google_sheets.operation_repository import operation_search_index
+from infrastructure.idempotency.idempotency_store import IdempotencyStore
 from transport.telegram.expense_handlers import register_expense_handlers
+from transport.telegram.export_handlers import register_export_handlers
+from transport.telegram.search_handlers import register_search_handlers
+from transport.telegram.history_handlers import register_history_handlers
+from transport.telegram.update_scheduler import UserUpdateScheduler
+from transport.telegram.handler_metrics import HandlerMetricsMiddleware, register_known_commands
+from transport.telegram.tracing_middleware import UpdateTracingMiddleware
+from transport.telegram.logging_middleware import UpdateCorrelationMiddleware
+from transport.http.metrics_server import MetricsServer
 from application.usecases.expenses import ExpenseService
+from application.usecases.exports import LedgerExportService
+from application.usecases.search import OperationSearchService
+from application.usecases.history import OperationHistoryService
+from application.usecases.digests import DigestService
+from transport.telegram.digests import DigestSender
+from transport.telegram.rate_limiter import AsyncRateLimiter
 
 
+logger = get_logger(__name__)
+
+
+async def advance_balance_checkpoints(report_service: ReportService) -> None:
+    """
+    Фоновая задача: раз в BALANCE_CHECKPOINT_INTERVAL_SECONDS продвигает
+    контрольную точку балансов, чтобы отчёты дочитывали немного строк.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(report_service.advance_balance_checkpoint)
+        except Exception as e:
+            logger.warning("Balance checkpoint update failed: %r", e)
+        await asyncio.sleep(BALANCE_CHECKPOINT_INTERVAL_SECONDS)
+
+
+def make_span_exporter() -> SpanExporter | None:
+    """
+    Выгрузка трасс по настройке TRACING_EXPORTER (None — трассировка выключена).
+    """
+    if TRACING_EXPORTER == "jsonl":
+        return JsonlSpanExporter(TRACING_FILE)
+    if TRACING_EXPORTER == "otlp":
+        return OtlpHttpSpanExporter(TRACING_OTLP_ENDPOINT, service_name="cost-bot")
+    if TRACING_EXPORTER:
+        logger.warning("Unknown TRACING_EXPORTER=%r, tracing disabled", TRACING_EXPORTER)
+    return None
+
 
 async def main():
     # 1. Создаём Bot и Dispatcher 
@@ -37,13 +110,57 @@ async def main():
             BotCommand(command="start", description="Начать работу / выбрать группу"),
             BotCommand(command="operation", description="Учесть затрату или передачу"),
             BotCommand(command="operation_for", description="Учесть операцию за другого"), 
+            BotCommand(command="e", description="Быстрый ввод затрат: /e 1500 Реклама ..."),
+            BotCommand(command="undo", description="Отменить свою последнюю операцию"),
+            BotCommand(command="cancel", description="Отменить операцию по ID: /cancel ID"),
             BotCommand(command="report", description="Показать отчёты"),
+            BotCommand(command="export", description="Выгрузить журнал группы: /export [csv|xlsx|json]"),
+            BotCommand(command="find", description="Найти операции по комментарию: /find СЛОВА"),
+            BotCommand(command="history", description="Журнал операций группы"),
             # можно добавить и другие команды
         ]
     )
 
-    dp = Dispatcher(storage=MemoryStorage())
+    storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
+
+    # Correlation id апдейта для всех записей лога
+    dp.update.outer_middleware(UpdateCorrelationMiddleware())
+
+    # Трасса на каждый апдейт (включая ожидание в очереди пользователя)
+    tracer.configure(
+        make_span_exporter(),
+        slow_seconds=TRACING_SLOW_UPDATE_SECONDS,
+        sample_rate=TRACING_SAMPLE_RATE,
+    )
+    dp.update.outer_middleware(UpdateTracingMiddleware())
+
+    # Апдейты одного пользователя — по очереди, разных — параллельно
+    update_scheduler = UserUpdateScheduler(
+        max_concurrency=UPDATE_MAX_CONCURRENCY,
+        max_queue_per_user=UPDATE_MAX_QUEUE_PER_USER,
+    )
+    dp.update.outer_middleware(update_scheduler)
+
+    # Время хэндлеров — в метрики
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
 
+    metrics.callback(
+        "update_queue_depth",
+        "Апдейты, которые ждут или обрабатываются (все пользователи)",
+        lambda: sum(update_scheduler.queue_sizes().values()),
+    )
+    metrics.callback(
+        "update_queue_users",
+        "Пользователи с необработанными апдейтами",
+        lambda: len(update_scheduler.queue_sizes()),
+    )
+    metrics.callback(
+        "fsm_active_dialogs",
+        "Диалоги в FSM, которые сейчас в каком-либо состоянии",
+        lambda: sum(1 for record in list(storage.storage.values()) if record.state is not None),
+    )
 
     # 2. Инициализируем репозитории и сервис работы с группами
     group_repo = GroupSheetRepository()
@@ -61,23 +178,101 @@ async def main():
         operation_repo=operation_repo,
         operation_row_repo=operation_row_repo,
         user_group_repo=user_group_repo,
+        idempotency=IdempotencyStore(IDEMPOTENCY_FILE, IDEMPOTENCY_MAX_KEYS),
     )
 
+    archive = OperationFileArchive(ARCHIVE_DIR)
     report_service = ReportService(
         user_groups_svc=user_groups_service,
         user_repo=user_repo,
         group_repo=group_repo,
         operations_repo=operation_repo,
+        archive=archive,
+        checkpoints=balance_checkpoints,
+    )
+
+    export_service = LedgerExportService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        archive=archive,
     )
 
     # 3. Регистрируем хэндлеры, передавая внутрь сервис
     register_registration_handlers(dp, user_groups_service)
     register_expense_handlers(dp, user_groups_service, expense_service, report_service)
+    register_export_handlers(dp, user_groups_service, export_service)
+    register_search_handlers(
+        dp,
+        user_groups_service,
+        OperationSearchService(operation_repo=operation_repo, user_repo=user_repo),
+    )
+    register_history_handlers(
+        dp,
+        user_groups_service,
+        OperationHistoryService(operation_repo=operation_repo, user_repo=user_repo),
+    )
+    # Метки метрик хэндлеров — только для зарегистрированных команд
+    register_known_commands(dp)
+
+    # Фоновое продвижение контрольной точки балансов
+    checkpoint_task = asyncio.create_task(advance_balance_checkpoints(report_service))
+
+    # Рассылка итогов месяца (если включена)
+    digest_task = None
+    if DIGEST_ENABLED:
+        digest_sender = DigestSender(
+            bot=bot,
+            digest_svc=DigestService(
+                report_svc=report_service,
+                operation_repo=operation_repo,
+                user_group_repo=user_group_repo,
+                user_repo=user_repo,
+                archive=archive,
+            ),
+            limiter=AsyncRateLimiter(DIGEST_MESSAGES_PER_SECOND),
+            state_file=DIGEST_STATE_FILE,
+            send_hour=DIGEST_HOUR,
+        )
+        digest_task = asyncio.create_task(digest_sender.run_forever())
+
+    # HTTP-сервер мониторинга: /metrics и /healthz
+    metrics_server = None
+    if METRICS_PORT:
+        metrics_server = MetricsServer(
+            host=METRICS_HOST,
+            port=METRICS_PORT,
+            sheets_service=operation_repo.service,
+            warm_checks={
+                "operations_index": operations_index.is_warm,
+                "operation_rows_index": operation_rows_index.is_warm,
+                "search_index": operation_search_index.is_warm,
+                "balance_checkpoint": lambda: balance_checkpoints.get() is not None,
+                "expense_cube": report_service.is_cube_warm,
+            },
+        )
+        await metrics_server.start()
 
     # 4. Запускаем бота в режиме long polling
-    print("Bot started")
-    await dp.start_polling(bot)
+    logger.info("Bot started")
+    try:
+        await dp.start_polling(bot)
+    finally:
+        checkpoint_task.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        if digest_task is not None:
+            digest_task.cancel()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Логи пишет отдельный поток (QueueListener); stop() дописывает очередь
+    log_listener = setup_logging(
+        level=LOG_LEVEL,
+        module_levels=LOG_MODULE_LEVELS,
+        json_output=LOG_JSON,
+        rate_limit_seconds=LOG_RATE_LIMIT_SECONDS,
+    )
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
@@ -0,0 +1,148 @@
+# tests/conftest.py
+
+import sys
+
+import pytest
+
+from application.usecases.expenses import ExpenseService
+from application.usecases.reports import ReportService
+from application.usecases.user_groups import UserGroupsService
+from config.settings import (
+    SHEET_GROUPS_RANGE,
+    SHEET_ID_USER_GROUPS,
+    SHEET_OPERATION_ROWS_RANGE,
+    SHEET_OPERATIONS_RANGE,
+    SHEET_USER_GROUPS_RANGE,
+    SHEET_USERS_RANGE,
+)
+from infrastructure.google_sheets import client
+from infrastructure.google_sheets.balance_checkpoints import balance_checkpoints
+from infrastructure.google_sheets.emulator import EmulatorSpreadsheet, SheetsEmulator
+from infrastructure.google_sheets.group_repository import GroupSheetRepository
+from infrastructure.google_sheets.operation_index import operation_rows_index, operations_index
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository, operation_search_index
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+from infrastructure.idempotency.idempotency_store import IdempotencyStore
+from transport.telegram.expense_handlers import register_expense_handlers
+from transport.telegram.registration_handlers import register_registration_handlers
+from tests.sheets_budget import SheetsCallRecorder
+from tests.telegram_fakes import BotHarness
+
+
+ALL_RANGES = (
+    SHEET_GROUPS_RANGE,
+    SHEET_USER_GROUPS_RANGE,
+    SHEET_USERS_RANGE,
+    SHEET_OPERATIONS_RANGE,
+    SHEET_OPERATION_ROWS_RANGE,
+)
+
+# Группа и участники фикстуры bot
+GROUP_ID = "G00001"
+MEMBERS = [101, 102, 103, 104, 105]
+# Операций в таблице до начала сценария
+SEED_OPERATIONS = 40
+
+
+class SheetsFixture:
+    """
+    Таблица эмулятора Sheets и журнал запросов к ней.
+    """
+
+    def __init__(self) -> None:
+        self.spreadsheet = EmulatorSpreadsheet(sheet_ids={"userGroups": SHEET_ID_USER_GROUPS})
+        self.recorder = SheetsCallRecorder()
+        self.service = self.recorder.wrap(SheetsEmulator(self.spreadsheet))
+
+    def put_rows(self, range_name: str, rows: list[list]) -> None:
+        """
+        Заполнить лист строками (с первой строки диапазона), минуя журнал.
+        """
+        self.spreadsheet.write(range_name, rows)
+
+    def budget(self, **limits):
+        return self.recorder.budget(**limits)
+
+
+def reset_process_caches() -> None:
+    """
+    Сбросить кэши процесса над Sheets: single-flight чтения и индексы строк.
+    """
+    for range_name in ALL_RANGES:
+        client.invalidate_reads(range_name)
+    operations_index.reset()
+    operation_rows_index.reset()
+    operation_search_index.reset()
+
+
+@pytest.fixture
+def sheets(monkeypatch, tmp_path) -> SheetsFixture:
+    """
+    Все репозитории и сервисы получают эмулятор таблицы вместо Google
+    Sheets: get_sheets_service подменяется во всех модулях, которые
+    его импортировали. Кэши процесса (single-flight, индексы строк,
+    поисковый индекс, контрольная точка балансов) сбрасываются.
+    """
+    fixture = SheetsFixture()
+    original = client.get_sheets_service
+    for module in list(sys.modules.values()):
+        if getattr(module, "get_sheets_service", None) is original:
+            monkeypatch.setattr(module, "get_sheets_service", lambda: fixture.service)
+
+    monkeypatch.setattr(balance_checkpoints, "path", str(tmp_path / "balance_checkpoints.json"))
+    monkeypatch.setattr(balance_checkpoints, "_loaded", False)
+    monkeypatch.setattr(balance_checkpoints, "_checkpoint", None)
+    reset_process_caches()
+    yield fixture
+    reset_process_caches()
+
+
+@pytest.fixture
+def bot(sheets, tmp_path):
+    """
+    Бот со всеми хэндлерами учёта поверх эмулятора таблицы: группа
+    GROUP_ID из MEMBERS и SEED_OPERATIONS затрат в ней.
+    """
+    sheets.put_rows(SHEET_GROUPS_RANGE, [[GROUP_ID], ["OTHER1"]])
+    sheets.put_rows(SHEET_USERS_RANGE, [[str(uid), f"User{uid}"] for uid in MEMBERS])
+    sheets.put_rows(SHEET_USER_GROUPS_RANGE, [[str(uid), GROUP_ID] for uid in MEMBERS])
+
+    group_repo = GroupSheetRepository()
+    user_group_repo = UserGroupSheetRepository()
+    user_repo = UserSheetRepository()
+    user_groups_service = UserGroupsService(
+        group_repo=group_repo,
+        user_group_repo=user_group_repo,
+        user_repo=user_repo,
+    )
+    operation_repo = OperationSheetRepository()
+    expense_service = ExpenseService(
+        operation_repo=operation_repo,
+        operation_row_repo=OperationRowSheetRepository(),
+        user_group_repo=user_group_repo,
+        idempotency=IdempotencyStore(str(tmp_path / "idempotency.jsonl"), 1000),
+    )
+    report_service = ReportService(
+        user_groups_svc=user_groups_service,
+        user_repo=user_repo,
+        group_repo=group_repo,
+        operations_repo=operation_repo,
+        checkpoints=balance_checkpoints,
+    )
+
+    for i in range(SEED_OPERATIONS):
+        expense_service.create_expense_for_all(
+            user_id=str(MEMBERS[i % len(MEMBERS)]),
+            group_id=GROUP_ID,
+            category="Реклама",
+            comment=f"seed {i}",
+            amount_cents=100_00 + i,
+        )
+
+    harness = BotHarness()
+    register_registration_handlers(harness.dp, user_groups_service)
+    register_expense_handlers(harness.dp, user_groups_service, expense_service, report_service)
+    sheets.recorder.reset()
+    return harness
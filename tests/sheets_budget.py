@@ -0,0 +1,225 @@
+# tests/sheets_budget.py
+"""
+Бюджет обращений к Google Sheets в тестах — аналог assertNumQueries
+из Django.
+
+SheetsCallRecorder оборачивает клиент Sheets (настоящий или фейковый)
+и записывает каждый выполненный запрос: метод API, диапазоны и сколько
+строк прочитано или записано. Тест ограничивает сверху число вызовов
+и прочитанных строк для сценария:
+
+    with sheets.budget(max_calls=4, max_rows=50):
+        run(flow...)
+
+При превышении тест падает со списком всех вызовов сценария — сразу
+видно, что клавиатура вдруг стала вызывать get_by_id на каждого участника.
+"""
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+# Методы, которые читают данные (остальные — записи)
+READ_METHODS = {"values.get", "values.batchGet", "get"}
+
+
+@dataclass(frozen=True)
+class SheetsCall:
+    """
+    Один выполненный запрос к Sheets.
+
+    - method: "values.get", "values.append", "values.update",
+      "values.batchGet", "values.batchUpdate", "batchUpdate", "get";
+    - ranges: диапазоны запроса (для batchUpdate — листы/запросы);
+    - rows: строк прочитано (чтения) или записано (записи).
+    """
+
+    method: str
+    ranges: Tuple[str, ...]
+    rows: int
+
+    @property
+    def is_read(self) -> bool:
+        return self.method in READ_METHODS
+
+    def __str__(self) -> str:
+        return f"{self.method} {', '.join(self.ranges)} ({self.rows} rows)"
+
+
+def _rows_read(method: str, result: dict) -> int:
+    if method == "values.get":
+        return len(result.get("values", []))
+    if method == "values.batchGet":
+        return sum(len(vr.get("values", [])) for vr in result.get("valueRanges", []))
+    return 0
+
+
+def _rows_written(method: str, kwargs: dict) -> Tuple[Tuple[str, ...], int]:
+    body = kwargs.get("body") or {}
+    if method in ("values.append", "values.update"):
+        return (kwargs.get("range", ""),), len(body.get("values", []))
+    if method == "values.batchUpdate":
+        data = body.get("data", [])
+        return tuple(item["range"] for item in data), sum(len(item.get("values", [])) for item in data)
+    if method == "batchUpdate":
+        ranges, rows = [], 0
+        for request in body.get("requests", []):
+            kind = next(iter(request))
+            spec = request[kind]
+            sheet_id = spec.get("sheetId", spec.get("range", {}).get("sheetId"))
+            ranges.append(f"{kind}:{sheet_id}")
+            if kind == "appendCells":
+                rows += len(spec.get("rows", []))
+            elif kind == "deleteDimension":
+                rows += spec["range"]["endIndex"] - spec["range"]["startIndex"]
+        return tuple(ranges), rows
+    return (), 0
+
+
+class _RecordedRequest:
+    def __init__(self, recorder: "SheetsCallRecorder", method: str, request: Any, kwargs: dict) -> None:
+        self._recorder = recorder
+        self._method = method
+        self._request = request
+        self._kwargs = kwargs
+
+    def execute(self, *args, **kwargs) -> dict:
+        result = self._request.execute(*args, **kwargs)
+        method, call_kwargs = self._method, self._kwargs
+        if method in READ_METHODS:
+            ranges = tuple(call_kwargs.get("ranges") or [call_kwargs.get("range", "")])
+            self._recorder.record(SheetsCall(method, ranges, _rows_read(method, result)))
+        else:
+            ranges, rows = _rows_written(method, call_kwargs)
+            self._recorder.record(SheetsCall(method, ranges, rows))
+        return result
+
+
+class _RecordedResource:
+    """
+    Обёртка ресурса клиента (spreadsheets() / values()): методы API
+    возвращают запросы, которые записывают себя при execute().
+    """
+
+    def __init__(self, recorder: "SheetsCallRecorder", resource: Any, prefix: str) -> None:
+        self._recorder = recorder
+        self._resource = resource
+        self._prefix = prefix
+
+    def values(self) -> "_RecordedResource":
+        return _RecordedResource(self._recorder, self._resource.values(), "values.")
+
+    def __getattr__(self, name: str):
+        method = getattr(self._resource, name)
+
+        def call(**kwargs) -> _RecordedRequest:
+            return _RecordedRequest(self._recorder, self._prefix + name, method(**kwargs), kwargs)
+
+        return call
+
+
+class RecordingSheetsService:
+    """
+    Клиент Sheets, который записывает все запросы в recorder.
+    """
+
+    def __init__(self, recorder: "SheetsCallRecorder", service: Any) -> None:
+        self._recorder = recorder
+        self._service = service
+
+    def spreadsheets(self) -> _RecordedResource:
+        return _RecordedResource(self._recorder, self._service.spreadsheets(), "")
+
+
+class SheetsCallRecorder:
+    """
+    Журнал запросов к Sheets. wrap(service) — клиент, который пишет
+    в этот журнал; budget(...) — проверка бюджета для блока кода.
+    Репозитории вызываются из потоков, поэтому запись под замком.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls: List[SheetsCall] = []
+
+    def wrap(self, service: Any) -> RecordingSheetsService:
+        return RecordingSheetsService(self, service)
+
+    def record(self, call: SheetsCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def snapshot(self) -> List[SheetsCall]:
+        with self._lock:
+            return list(self.calls)
+
+    @contextmanager
+    def budget(
+        self,
+        max_calls: Optional[int] = None,
+        max_reads: Optional[int] = None,
+        max_writes: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        max_calls_per_range: Optional[int] = None,
+    ) -> Iterator[List[SheetsCall]]:
+        """
+        Проверяет, что код внутри блока уложился в бюджет:
+        - max_calls / max_reads / max_writes — число запросов;
+        - max_rows — строк прочитано всего;
+        - max_calls_per_range — сколько раз читается один диапазон.
+
+        Отдаёт список вызовов блока (заполняется по ходу).
+        """
+        start = len(self.snapshot())
+        calls: List[SheetsCall] = []
+        yield calls
+        calls.extend(self.snapshot()[start:])
+        assert_budget(
+            calls,
+            max_calls=max_calls,
+            max_reads=max_reads,
+            max_writes=max_writes,
+            max_rows=max_rows,
+            max_calls_per_range=max_calls_per_range,
+        )
+
+
+def assert_budget(
+    calls: List[SheetsCall],
+    max_calls: Optional[int] = None,
+    max_reads: Optional[int] = None,
+    max_writes: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    max_calls_per_range: Optional[int] = None,
+) -> None:
+    reads = [call for call in calls if call.is_read]
+    problems = []
+    if max_calls is not None and len(calls) > max_calls:
+        problems.append(f"{len(calls)} calls > {max_calls}")
+    if max_reads is not None and len(reads) > max_reads:
+        problems.append(f"{len(reads)} reads > {max_reads}")
+    if max_writes is not None and len(calls) - len(reads) > max_writes:
+        problems.append(f"{len(calls) - len(reads)} writes > {max_writes}")
+    rows_read = sum(call.rows for call in reads)
+    if max_rows is not None and rows_read > max_rows:
+        problems.append(f"{rows_read} rows read > {max_rows}")
+    if max_calls_per_range is not None:
+        per_range: dict = {}
+        for call in reads:
+            for range_name in call.ranges:
+                per_range[range_name] = per_range.get(range_name, 0) + 1
+        for range_name, count in sorted(per_range.items()):
+            if count > max_calls_per_range:
+                problems.append(f"{range_name} read {count} times > {max_calls_per_range}")
+
+    if problems:
+        listing = "\n".join(f"  {i}. {call}" for i, call in enumerate(calls, start=1))
+        raise AssertionError(
+            "Sheets budget exceeded: " + "; ".join(problems) + f"\nCalls ({len(calls)}):\n{listing}"
+        )
@@ -0,0 +1,157 @@
+# tests/telegram_fakes.py
+"""
+Прогон хэндлеров aiogram без Telegram: FakeSession отвечает на вызовы
+Bot API вместо сети, BotHarness подаёт апдейты в Dispatcher так же,
+как это делает polling, и ждёт фоновые задачи (отчёты, подгрузки).
+
+Бот, как в main.py, отправляет сообщения в режиме HTML, и FakeSession,
+как Telegram, отвечает TelegramBadRequest на текст с неэкранированными
+"<" и "&" или неподдерживаемыми тегами, на текст длиннее 4096 символов
+и на правку удалённого сообщения (deleted_message_ids).
+"""
+
+import asyncio
+import itertools
+import re
+from datetime import datetime
+from typing import Any, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import Default, DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import EditMessageText
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from transport.telegram.report_jobs import TELEGRAM_TEXT_LIMIT
+
+
+# Теги, которые Telegram понимает в parse_mode=HTML
+_HTML_TAG_RE = re.compile(
+    r"</?(b|strong|i|em|u|ins|s|strike|del|span|tg-spoiler|a|code|pre|blockquote|tg-emoji)(\s[^<>]*)?>"
+)
+_HTML_ENTITY_RE = re.compile(r"&(lt|gt|amp|quot|#\d+|#x[0-9a-fA-F]+);")
+
+
+def html_error(text: str) -> Optional[str]:
+    """
+    Почему Telegram не разберёт text в режиме HTML (None — разберёт).
+    """
+    rest = _HTML_ENTITY_RE.sub("", _HTML_TAG_RE.sub("", text))
+    if "<" in rest:
+        return "Bad Request: can't parse entities: unsupported start tag"
+    if "&" in rest:
+        return "Bad Request: can't parse entities: unsupported entity"
+    return None
+
+
+class FakeSession(BaseSession):
+    """
+    Сессия Bot API, которая ничего не отправляет: запоминает вызовы
+    и возвращает правдоподобный результат (Message для отправки
+    и правки сообщений, True для остальных).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: List[Any] = []
+        # сообщения, которые пользователь удалил (их правка — ошибка)
+        self.deleted_message_ids: set[int] = set()
+        self._message_ids = itertools.count(10_000)
+
+    async def make_request(self, bot: Bot, method: Any, timeout: Optional[int] = None) -> Any:
+        parse_mode = getattr(method, "parse_mode", None)
+        if isinstance(parse_mode, Default):
+            parse_mode = bot.default[parse_mode.name]
+        text = getattr(method, "text", None)
+        if parse_mode == ParseMode.HTML and text:
+            error = html_error(text)
+            if error is not None:
+                raise TelegramBadRequest(method=method, message=error)
+        if text and len(text) > TELEGRAM_TEXT_LIMIT:
+            raise TelegramBadRequest(method=method, message="Bad Request: message is too long")
+        if isinstance(method, EditMessageText) and method.message_id in self.deleted_message_ids:
+            raise TelegramBadRequest(method=method, message="Bad Request: message to edit not found")
+        self.requests.append(method)
+        if method.__returning__ is Message:
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=getattr(method, "message_id", None) or next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+                text=getattr(method, "text", None),
+            ).as_(bot)
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+    def texts(self) -> List[str]:
+        """
+        Тексты всех отправленных и отредактированных сообщений.
+        """
+        return [method.text for method in self.requests if getattr(method, "text", None)]
+
+
+class BotHarness:
+    """
+    Bot + Dispatcher с FakeSession. Хэндлеры регистрируются так же,
+    как в main.py (register_*_handlers(harness.dp, ...)).
+    """
+
+    def __init__(self) -> None:
+        self.session = FakeSession()
+        self.bot = Bot(
+            token="42:TEST",
+            session=self.session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        )
+        self.dp = Dispatcher(storage=MemoryStorage())
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> User:
+        return User(id=user_id, is_bot=False, first_name=f"User{user_id}")
+
+    def _message(self, user_id: int, text: str) -> Message:
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=user_id, type="private"),
+            from_user=self._user(user_id),
+            text=text,
+        )
+
+    async def send(self, user_id: int, text: str) -> None:
+        """
+        Пользователь пишет сообщение (или команду) боту.
+        """
+        await self._feed(Update(update_id=next(self._update_ids), message=self._message(user_id, text)))
+
+    async def press(self, user_id: int, data: str) -> None:
+        """
+        Пользователь нажимает inline-кнопку с callback_data=data.
+        """
+        callback = CallbackQuery(
+            id=str(next(self._update_ids)),
+            from_user=self._user(user_id),
+            chat_instance="test",
+            message=self._message(user_id, "…"),
+            data=data,
+        )
+        await self._feed(Update(update_id=next(self._update_ids), callback_query=callback))
+
+    async def _feed(self, update: Update) -> None:
+        await self.dp.feed_update(self.bot, update)
+        # Фоновые задачи хэндлеров (отчёты, подгрузки) — до конца
+        while True:
+            pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
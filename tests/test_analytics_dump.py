@@ -0,0 +1,134 @@
+# tests/test_analytics_dump.py
+
+from datetime import date, datetime
+
+import pytest
+
+from application.usecases.analytics_dump import AnalyticsDumpService
+from application.usecases.archive import ArchiveService
+from application.usecases.expenses import ExpenseService
+from config.settings import SHEET_OPERATIONS_RANGE
+from domain.models.expenses import Operation
+from infrastructure.archive.operation_archive import OperationFileArchive
+from infrastructure.google_sheets import operation_repository
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository, operation_to_values
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def make_operation(op_id: str, day: date) -> Operation:
+    return Operation(
+        group_id="G1",
+        date=datetime(day.year, day.month, day.day),
+        id=op_id,
+        operation_type="expense",
+        person_id="A",
+        is_expense=True,
+        category="Прочее",
+        comment=op_id,
+        amount_cents=100,
+    )
+
+
+def dumped_ids(out_dir) -> list[str]:
+    return sorted(pq.read_table(str(out_dir / "operations")).column("id").to_pylist())
+
+
+def test_dump_after_compaction_does_not_skip_new_rows(sheets, tmp_path):
+    sheets.put_rows(
+        SHEET_OPERATIONS_RANGE,
+        [
+            operation_to_values(make_operation("old1", date(2024, 1, 10))),
+            operation_to_values(make_operation("old2", date(2024, 2, 10))),
+            operation_to_values(make_operation("kept", date(2025, 5, 10))),
+        ],
+    )
+    operation_repo = OperationSheetRepository()
+    archive = OperationFileArchive(str(tmp_path / "archive"))
+    service = AnalyticsDumpService(
+        operation_repo=operation_repo,
+        operation_row_repo=OperationRowSheetRepository(),
+        archive=archive,
+    )
+    out_dir = tmp_path / "analytics"
+
+    first = service.dump(str(out_dir))
+    assert first.records["operations"] == 3
+    assert first.watermarks["operations"] == 4
+
+    # Архивация из другого процесса: две старые строки ушли из листа
+    del sheets.spreadsheet.rows("operations")[1:3]
+    archive.set_archived_through(date(2024, 12, 31))
+    operation_repo.create(make_operation("new", date(2025, 6, 1)))
+
+    second = service.dump(str(out_dir))
+
+    assert second.rebuilt == ["operations"]
+    assert dumped_ids(out_dir) == ["kept", "new"]
+    assert second.watermarks["operations"] == 3
+
+    third = service.dump(str(out_dir))
+    assert third.rebuilt == []
+    assert third.records["operations"] == 0
+
+
+def test_dump_after_archival_keeps_archived_operations(sheets, tmp_path, monkeypatch):
+    """
+    После архивации в листах остался только хвост: старые операции
+    и их строки попадают в выгрузку из архива, строки входящего
+    остатка — нет (иначе суммы архивных периодов учтутся дважды).
+    """
+    monkeypatch.setattr(operation_repository, "SHEET_ID_OPERATIONS", 11)
+    monkeypatch.setattr(operation_repository, "SHEET_ID_OPERATION_ROWS", 12)
+    sheets.spreadsheet.sheet_ids.update({11: "operations", 12: "operationsRows"})
+    # Заголовки листов: appendCells пишет после последней непустой строки
+    sheets.spreadsheet.load_rows("operations", [["Group", "Date", "Id"]])
+    sheets.spreadsheet.load_rows("operationsRows", [["Group", "Date", "Operation"]])
+
+    operation_repo = OperationSheetRepository()
+    operation_row_repo = OperationRowSheetRepository()
+    expense_service = ExpenseService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        user_group_repo=None,
+    )
+
+    def add_expense(op_id: str, day: date) -> None:
+        op, rows = expense_service.build_expense_for_all(
+            "A", "G1", "Прочее", op_id, 100_00, ["A", "B"], datetime(day.year, day.month, day.day), op_id=op_id
+        )
+        operation_repo.create_batch([op], rows)
+
+    add_expense("old1", date(2024, 3, 10))
+    add_expense("old2", date(2024, 11, 10))
+    add_expense("kept", date(2025, 2, 10))
+
+    archive = OperationFileArchive(str(tmp_path / "archive"))
+    service = AnalyticsDumpService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        archive=archive,
+    )
+    out_dir = tmp_path / "analytics"
+    service.dump(str(out_dir))
+
+    ArchiveService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        archive=archive,
+    ).archive_through(date(2024, 12, 31), today=date(2025, 3, 1))
+    add_expense("new", date(2025, 3, 1))
+
+    report = service.dump(str(out_dir))
+
+    assert report.rebuilt == ["operations", "operationsRows"]
+    assert dumped_ids(out_dir) == ["kept", "new", "old1", "old2"]
+    rows = pq.read_table(str(out_dir / "operationsRows"))
+    assert sorted(set(rows.column("operation_id").to_pylist())) == ["kept", "new", "old1", "old2"]
+    assert rows.num_rows == 4 * 3
+
+    # Выгрузка с нуля при уже существующем архиве — то же самое
+    service.dump(str(out_dir), full=True)
+    assert dumped_ids(out_dir) == ["kept", "new", "old1", "old2"]
+    assert pq.read_table(str(out_dir / "operationsRows")).num_rows == 4 * 3
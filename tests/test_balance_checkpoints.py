@@ -0,0 +1,79 @@
+# tests/test_balance_checkpoints.py
+
+import pytest
+
+from application.usecases import reports
+from application.usecases.expenses import ExpenseService
+from application.usecases.reports import ReportService
+from application.usecases.user_groups import UserGroupsService
+from config.settings import SHEET_GROUPS_RANGE, SHEET_USER_GROUPS_RANGE, SHEET_USERS_RANGE
+from infrastructure.google_sheets.balance_checkpoints import balance_checkpoints
+from infrastructure.google_sheets.group_repository import GroupSheetRepository
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+
+
+GROUP_ID = "G1"
+
+
+@pytest.fixture
+def services(sheets):
+    sheets.put_rows(SHEET_GROUPS_RANGE, [[GROUP_ID]])
+    sheets.put_rows(SHEET_USERS_RANGE, [["1", "Alice"], ["2", "Bob"]])
+    sheets.put_rows(SHEET_USER_GROUPS_RANGE, [["1", GROUP_ID], ["2", GROUP_ID]])
+    group_repo = GroupSheetRepository()
+    user_group_repo = UserGroupSheetRepository()
+    user_repo = UserSheetRepository()
+    operation_repo = OperationSheetRepository()
+    expense_service = ExpenseService(
+        operation_repo=operation_repo,
+        operation_row_repo=OperationRowSheetRepository(),
+        user_group_repo=user_group_repo,
+    )
+    report_service = ReportService(
+        user_groups_svc=UserGroupsService(
+            group_repo=group_repo,
+            user_group_repo=user_group_repo,
+            user_repo=user_repo,
+        ),
+        user_repo=user_repo,
+        group_repo=group_repo,
+        operations_repo=operation_repo,
+        checkpoints=balance_checkpoints,
+    )
+    return expense_service, report_service
+
+
+def test_cancel_during_checkpoint_advance_is_not_saved(services, monkeypatch):
+    """
+    Отмена операции после точки приходит, пока фоновая задача
+    дочитывает строки: посчитанную до отмены точку сохранять нельзя,
+    иначе отменённая сумма навсегда останется в балансах.
+    """
+    expense_service, report_service = services
+    expense_service.create_expense_for_all("1", GROUP_ID, "Еда", "обед", 100_00)
+    first = report_service.advance_balance_checkpoint()
+    assert first is not None
+
+    op_id = expense_service.create_expense_for_all("2", GROUP_ID, "Еда", "ужин", 40_00)
+
+    original_iter_values = reports.iter_values
+
+    def iter_values_then_cancel(*args, **kwargs):
+        # Строки уже прочитаны (операция ещё активна), и тут приходит /cancel
+        rows = list(original_iter_values(*args, **kwargs))
+        monkeypatch.setattr(reports, "iter_values", original_iter_values)
+        expense_service.cancel_operation(GROUP_ID, op_id)
+        yield from rows
+
+    monkeypatch.setattr(reports, "iter_values", iter_values_then_cancel)
+    assert report_service.advance_balance_checkpoint() is None
+    assert balance_checkpoints.get() == first
+
+    _, balances = report_service.get_group_balance(GROUP_ID)
+    assert balances == {"1": 50_00, "2": -50_00}
+
+    second = report_service.advance_balance_checkpoint()
+    assert second.balances[GROUP_ID] == {"1": 50_00, "2": -50_00}
@@ -0,0 +1,52 @@
+# tests/test_balance_service.py
+
+from collections import Counter
+from typing import Dict, List
+
+from domain.services.balance_service import SettleTransfer, settle_up_plan
+
+
+def _apply(balances: Dict[str, int], plan: List[SettleTransfer]) -> Dict[str, int]:
+    """
+    Балансы после выполнения плана: должник, переведя сумму, гасит долг,
+    кредитор, получив её, — то, что должны ему.
+    """
+    result = Counter(balances)
+    for transfer in plan:
+        result[transfer.from_user_id] += transfer.amount_cents
+        result[transfer.to_user_id] -= transfer.amount_cents
+    return dict(result)
+
+
+def test_settle_up_plan_zero_balances_give_empty_plan():
+    assert settle_up_plan({}) == []
+    assert settle_up_plan({"1": 0, "2": 0, "3": 0}) == []
+
+
+def test_settle_up_plan_transfers_from_debtor_to_creditor():
+    """
+    Переводит тот, у кого баланс < 0, тому, у кого баланс > 0.
+    """
+    plan = settle_up_plan({"1": 150_00, "2": -100_00, "3": -50_00})
+
+    assert sorted(plan, key=lambda t: t.from_user_id) == [
+        SettleTransfer(from_user_id="2", to_user_id="1", amount_cents=100_00),
+        SettleTransfer(from_user_id="3", to_user_id="1", amount_cents=50_00),
+    ]
+
+
+def test_settle_up_plan_is_minimal_and_settles_everyone():
+    """
+    Пары с равными суммами сводятся одной передачей каждая;
+    в общем случае передач не больше n - 1 и все балансы обнуляются.
+    """
+    pairs = {"1": 500_00, "2": -500_00, "3": 30_00, "4": -30_00}
+    plan = settle_up_plan(pairs)
+    assert len(plan) == 2
+    assert all(v == 0 for v in _apply(pairs, plan).values())
+
+    balances = {"1": 700_01, "2": -250_00, "3": -199_99, "4": 120_00, "5": -370_02}
+    plan = settle_up_plan(balances)
+    assert len(plan) <= len(balances) - 1
+    assert all(t.amount_cents > 0 for t in plan)
+    assert all(v == 0 for v in _apply(balances, plan).values())
@@ -0,0 +1,44 @@
+# tests/test_dialog_prefetch.py
+
+import asyncio
+from types import SimpleNamespace
+
+from transport.telegram import dialog_prefetch
+from transport.telegram.dialog_prefetch import PREFETCH_MEMBERS, DialogPrefetcher
+
+
+def make_prefetcher() -> DialogPrefetcher:
+    user_groups_svc = SimpleNamespace(
+        user_group_repo=SimpleNamespace(get_member_ids=lambda group_id: ["1", "2"]),
+        user_repo=SimpleNamespace(get_names=lambda ids: {uid: f"User{uid}" for uid in ids}),
+    )
+    report_svc = SimpleNamespace(get_group_balance=lambda group_id: (group_id, {"1": 0, "2": 0}))
+    return DialogPrefetcher(user_groups_svc, report_svc, ttl_seconds=60)
+
+
+def test_abandoned_dialogs_are_forgotten_after_ttl(monkeypatch):
+    """
+    Диалоги, которые не завершили и не начали заново, не копятся:
+    по истечении ttl их данные выбрасываются при следующем start().
+    """
+    clock = [1000.0]
+    monkeypatch.setattr(dialog_prefetch.time, "monotonic", lambda: clock[0])
+    prefetcher = make_prefetcher()
+
+    async def scenario() -> None:
+        for user_id in range(50):
+            prefetcher.start((user_id, user_id), "G1")
+        assert prefetcher.dialog_count() == 50
+        assert await prefetcher.get((0, 0), PREFETCH_MEMBERS) == ["1", "2"]
+
+        clock[0] += 61
+        assert await prefetcher.get((0, 0), PREFETCH_MEMBERS) is None
+
+        prefetcher.start((100, 100), "G1")
+        assert prefetcher.dialog_count() == 1
+        assert await prefetcher.get((100, 100), PREFETCH_MEMBERS) == ["1", "2"]
+
+        prefetcher.drop((100, 100))
+        assert prefetcher.dialog_count() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,181 @@
+# tests/test_expense_cube.py
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Iterator, List, Optional
+
+import pytest
+
+from application.usecases.reports import ReportService
+from domain.models.expenses import Operation
+from domain.services.expense_cube import CubeCell, ExpenseCube
+
+
+@pytest.fixture
+def cube() -> ExpenseCube:
+    cube = ExpenseCube()
+    cube.add("G1", "1", "Еда", "2025-01", 100_00)
+    cube.add("G1", "1", "Еда", "2025-01", 50_00)
+    cube.add("G1", "1", "Такси", "2025-02", 30_00)
+    cube.add("G1", "2", "Еда", "2025-02", 200_00)
+    cube.add("G1", "3", "Аренда", "2025-02", 70_00)
+    cube.add("G2", "1", "Еда", "2025-01", 999_00)
+    return cube
+
+
+def test_slice_keeps_one_value_and_leaves_source_cube(cube):
+    g1 = cube.slice("group", "G1")
+
+    assert {key[0] for key in g1.cells} == {"G1"}
+    assert g1.total() == CubeCell(count=5, sum_cents=450_00)
+    assert cube.total() == CubeCell(count=6, sum_cents=1449_00)
+
+
+def test_dice_keeps_several_values_of_several_dimensions(cube):
+    diced = cube.dice(group=["G1"], person=["1", "2"], month=["2025-02"])
+
+    assert set(diced.cells) == {("G1", "1", "Такси", "2025-02"), ("G1", "2", "Еда", "2025-02")}
+    assert diced.total() == CubeCell(count=2, sum_cents=230_00)
+
+
+def test_roll_up_sums_other_dimensions(cube):
+    by_person = cube.slice("group", "G1").roll_up("person")
+
+    assert by_person == {
+        ("1",): CubeCell(count=3, sum_cents=180_00),
+        ("2",): CubeCell(count=1, sum_cents=200_00),
+        ("3",): CubeCell(count=1, sum_cents=70_00),
+    }
+    assert cube.roll_up("category", "month")[("Еда", "2025-01")] == CubeCell(count=3, sum_cents=1149_00)
+    assert cube.roll_up() == {(): CubeCell(count=6, sum_cents=1449_00)}
+
+
+def test_top_k_by_sum_descending(cube):
+    top = cube.slice("group", "G1").top_k("category", 2)
+
+    assert top == [
+        ("Еда", CubeCell(count=3, sum_cents=350_00)),
+        ("Аренда", CubeCell(count=1, sum_cents=70_00)),
+    ]
+    assert len(cube.top_k("person", 10)) == 3
+
+
+def test_add_negative_drops_cancelled_cell(cube):
+    cube.add("G1", "3", "Аренда", "2025-02", -70_00, count=-1)
+
+    assert ("G1", "3", "Аренда", "2025-02") not in cube.cells
+
+
+def test_unknown_dimension_rejected(cube):
+    with pytest.raises(ValueError):
+        cube.roll_up("city")
+
+
+def make_expense(person_id: str, amount_cents: int, day: date) -> Operation:
+    return Operation(
+        group_id="G1",
+        date=datetime(day.year, day.month, day.day),
+        id=f"{person_id}-{amount_cents}",
+        operation_type="expense",
+        person_id=person_id,
+        is_expense=True,
+        category="Еда",
+        comment="",
+        amount_cents=amount_cents,
+    )
+
+
+@dataclass
+class FakeOperations:
+    """
+    Лист operations: операции по строкам начиная со 2-й
+    и поколение истории, как у OperationSheetRepository.
+    """
+
+    ops: List[Operation] = field(default_factory=list)
+    generation: int = 0
+
+    def history_generation(self) -> int:
+        return self.generation
+
+    def iter_all(self, start_row: int | None = None) -> Iterator[tuple[int, Operation]]:
+        first = start_row or 2
+        for row_no, op in enumerate(self.ops[first - 2:], start=first):
+            yield row_no, op
+
+
+@dataclass
+class FakeArchive:
+    ops: List[Operation] = field(default_factory=list)
+    through: Optional[date] = None
+
+    def archived_through(self) -> Optional[date]:
+        return self.through
+
+    def iter_operations(self) -> Iterator[Operation]:
+        return iter(self.ops)
+
+
+def make_report_service(operations: FakeOperations, archive: FakeArchive) -> ReportService:
+    return ReportService(
+        user_groups_svc=None,
+        user_repo=None,
+        group_repo=None,
+        operations_repo=operations,
+        archive=archive,
+    )
+
+
+def test_refresh_cube_reads_only_new_rows():
+    operations = FakeOperations([make_expense("1", 100_00, date(2025, 1, 5))])
+    report = make_report_service(operations, FakeArchive())
+
+    assert report.expense_cube("G1").total() == CubeCell(count=1, sum_cents=100_00)
+
+    operations.ops.append(make_expense("2", 40_00, date(2025, 1, 6)))
+    assert report.expense_cube("g1").total() == CubeCell(count=2, sum_cents=140_00)
+    assert report._cube_row == 3
+
+
+def test_refresh_cube_rebuilds_on_history_generation_change():
+    """
+    Отмена операции меняет уже учтённую строку: куб строится заново.
+    """
+    operations = FakeOperations([
+        make_expense("1", 100_00, date(2025, 1, 5)),
+        make_expense("2", 40_00, date(2025, 1, 6)),
+    ])
+    report = make_report_service(operations, FakeArchive())
+    assert report.expense_cube("G1").total().sum_cents == 140_00
+
+    operations.ops[0].active = False
+    assert report.expense_cube("G1").total().sum_cents == 140_00  # поколение то же — строка не перечитана
+
+    operations.generation += 1
+    assert report.expense_cube("G1").total() == CubeCell(count=1, sum_cents=40_00)
+
+
+def test_refresh_cube_rebuilds_on_archived_through_change():
+    """
+    Архивация перенесла строки из листа в архив: куб строится заново
+    из архива и оставшегося листа, без двойного учёта и потерь.
+    """
+    old = make_expense("1", 100_00, date(2025, 1, 5))
+    new = make_expense("2", 40_00, date(2025, 2, 6))
+    operations = FakeOperations([old, new])
+    archive = FakeArchive()
+    report = make_report_service(operations, archive)
+    assert report.expense_cube("G1").total().sum_cents == 140_00
+
+    # Сжатие листа: "old" ушла в архив, "new" переехала на строку 2
+    archive.ops, archive.through = [old], date(2025, 1, 31)
+    operations.ops = [new]
+    operations.ops.append(make_expense("3", 5_00, date(2025, 2, 7)))
+
+    cube = report.expense_cube("G1")
+    assert cube.total() == CubeCell(count=3, sum_cents=145_00)
+    assert cube.roll_up("month") == {
+        ("2025-01",): CubeCell(count=1, sum_cents=100_00),
+        ("2025-02",): CubeCell(count=2, sum_cents=45_00),
+    }
+    assert report._cube_archived_through == "2025-01-31"
@@ -0,0 +1,22 @@
+# tests/test_expense_handlers.py
+
+import asyncio
+
+from config.settings import SHEET_OPERATIONS_RANGE
+from tests.conftest import MEMBERS
+
+
+def test_quick_expense_escapes_comment(bot, sheets):
+    """
+    /e с "<" и "&" в комментарии: ответ и запись в лог-канал доходят
+    (в HTML-режиме неэкранированный текст Telegram отклоняет).
+    """
+    asyncio.run(bot.send(MEMBERS[0], "/e 1500 Реклама баннер <300x250> & макет"))
+
+    texts = bot.session.texts()
+    assert any(
+        text.startswith("Записано затрат: 1") and "баннер &lt;300x250&gt; &amp; макет" in text
+        for text in texts
+    )
+    assert any(text.startswith("Новые операции зарегистрированы (/e)") for text in texts)
+    assert sheets.spreadsheet.read(SHEET_OPERATIONS_RANGE)[-1][7] == "баннер <300x250> & макет"
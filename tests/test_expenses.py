@@ -0,0 +1,45 @@
+# tests/test_expenses.py
+"""
+Затрата «за всех» поверх эмулятора Sheets (бывший test_expense.py,
+который писал в рабочую таблицу).
+"""
+
+from application.usecases.expenses import ExpenseService
+from config.settings import SHEET_USER_GROUPS_RANGE
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+
+
+GROUP_ID = "F857LW"
+MEMBERS = ["405145783", "2", "3"]
+
+
+def test_create_expense_for_all(sheets):
+    sheets.put_rows(SHEET_USER_GROUPS_RANGE, [[uid, GROUP_ID] for uid in MEMBERS])
+    operation_repo = OperationSheetRepository()
+    row_repo = OperationRowSheetRepository()
+    service = ExpenseService(
+        operation_repo=operation_repo,
+        operation_row_repo=row_repo,
+        user_group_repo=UserGroupSheetRepository(),
+    )
+
+    op_id = service.create_expense_for_all(
+        user_id=MEMBERS[0],
+        group_id=GROUP_ID,
+        category="Реклама",
+        comment="Тестовая затрата за всех",
+        amount_cents=100_000,
+    )
+
+    operation = operation_repo.get_by_id(op_id)
+    assert operation is not None
+    assert operation.amount_cents == 100_000
+
+    rows = [row for row in row_repo.iter_rows_for_group(GROUP_ID) if row.operation_id == op_id]
+    debits = [row for row in rows if row.row_type == "debit"]
+    credits = [row for row in rows if row.row_type == "credit"]
+    assert [(row.person_id, row.amount_cents) for row in debits] == [(MEMBERS[0], 100_000)]
+    assert sorted(row.person_id for row in credits) == sorted(MEMBERS)
+    assert sum(row.amount_cents for row in credits) == 100_000
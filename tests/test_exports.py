@@ -0,0 +1,67 @@
+# tests/test_exports.py
+
+import csv
+import io
+from datetime import date, datetime
+
+from application.usecases.archive import ArchiveService
+from application.usecases.expenses import ExpenseService
+from application.usecases.exports import EXPORT_PERIOD_ALL, LedgerExportService
+from infrastructure.archive.operation_archive import OperationFileArchive
+from infrastructure.google_sheets import operation_repository
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+
+
+def exported(service: LedgerExportService, period_code: str) -> list[dict]:
+    out = io.BytesIO()
+    service.write_export("G1", period_code, "csv", out)
+    return list(csv.DictReader(io.StringIO(out.getvalue().decode("utf-8-sig"))))
+
+
+def test_export_includes_archived_periods(sheets, tmp_path, monkeypatch):
+    """
+    После архивации /export за всё время берёт закрытые периоды
+    из архива; строки входящего остатка в выгрузку не попадают.
+    """
+    monkeypatch.setattr(operation_repository, "SHEET_ID_OPERATIONS", 11)
+    monkeypatch.setattr(operation_repository, "SHEET_ID_OPERATION_ROWS", 12)
+    sheets.spreadsheet.sheet_ids.update({11: "operations", 12: "operationsRows"})
+    sheets.spreadsheet.load_rows("operations", [["Group", "Date", "Id"]])
+    sheets.spreadsheet.load_rows("operationsRows", [["Group", "Date", "Operation"]])
+
+    operation_repo = OperationSheetRepository()
+    operation_row_repo = OperationRowSheetRepository()
+    expense_service = ExpenseService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        user_group_repo=None,
+    )
+    for op_id, day, group_id in [
+        ("old", date(2024, 11, 10), "G1"),
+        ("other", date(2024, 11, 11), "G2"),
+        ("new", date(2025, 2, 10), "G1"),
+    ]:
+        op, rows = expense_service.build_expense_for_all(
+            "A", group_id, "Прочее", op_id, 100_00, ["A", "B"],
+            datetime(day.year, day.month, day.day), op_id=op_id,
+        )
+        operation_repo.create_batch([op], rows)
+
+    archive = OperationFileArchive(str(tmp_path / "archive"))
+    ArchiveService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        archive=archive,
+    ).archive_through(date(2024, 12, 31), today=date(2025, 3, 1))
+
+    service = LedgerExportService(
+        operation_repo=operation_repo,
+        operation_row_repo=operation_row_repo,
+        archive=archive,
+    )
+    records = exported(service, EXPORT_PERIOD_ALL)
+
+    assert [r["id"] for r in records if r["record"] == "operation"] == ["old", "new"]
+    row_ops = [r["operation_id"] for r in records if r["record"] == "row"]
+    assert row_ops == ["old"] * 3 + ["new"] * 3
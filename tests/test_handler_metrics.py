@@ -0,0 +1,53 @@
+# tests/test_handler_metrics.py
+
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery
+
+from tests.telegram_fakes import BotHarness
+from transport.telegram.handler_metrics import handler_name, register_known_commands
+
+
+def _label(harness: BotHarness, text: str) -> tuple[str, str]:
+    return handler_name(harness._message(1, text))
+
+
+def test_handler_name_only_registered_commands():
+    """
+    Метка команды — только для команд с хэндлером; "/x@bot" сводится
+    к "/x", произвольные команды попадают в "other".
+    """
+    harness = BotHarness()
+
+    async def noop(message):
+        pass
+
+    harness.dp.message.register(noop, Command("report"))
+    register_known_commands(harness.dp)
+
+    assert _label(harness, "/report за месяц") == ("message", "/report")
+    assert _label(harness, "/report@some_bot") == ("message", "/report")
+    assert _label(harness, "/asdf123") == ("message", "other")
+    assert _label(harness, "/asdf123@some_bot") == ("message", "other")
+    assert _label(harness, "просто текст") == ("message", "text")
+
+
+def test_handler_name_only_known_callback_prefixes():
+    """
+    Метка callback-а — только известный префикс callback_data.
+    """
+    harness = BotHarness()
+
+    def label(data: str) -> tuple[str, str]:
+        query = CallbackQuery(
+            id="1",
+            from_user=harness._user(1),
+            chat_instance="test",
+            message=harness._message(1, "…"),
+            data=data,
+        )
+        return handler_name(query)
+
+    assert label("report:month") == ("callback", "report")
+    assert label("op_expense") == ("callback", "op_expense")
+    assert label("x9f2:123") == ("callback", "other")
+    assert label("") == ("callback", "other")
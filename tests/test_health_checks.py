@@ -0,0 +1,41 @@
+# tests/test_health_checks.py
+
+import threading
+
+from application.usecases.reports import ReportService
+from infrastructure.google_sheets.operation_index import operations_index
+from infrastructure.google_sheets.operation_repository import operation_search_index
+from transport.http.metrics_server import MetricsServer
+
+
+def test_warm_checks_do_not_wait_for_locks_held_during_sheet_reads():
+    """
+    Пока индекс или куб перестраивается (его lock занят чтением листа),
+    проверки /healthz и счётчики /metrics отвечают сразу.
+    """
+    report_service = ReportService(user_groups_svc=None, user_repo=None, group_repo=None, operations_repo=None)
+    server = MetricsServer(
+        host="127.0.0.1",
+        port=0,
+        sheets_service=None,
+        warm_checks={
+            "operations_index": operations_index.is_warm,
+            "search_index": operation_search_index.is_warm,
+            "expense_cube": report_service.is_cube_warm,
+        },
+    )
+    results = {}
+
+    def probe():
+        results["caches"] = server._check_caches()
+        results["stats"] = operations_index.stats()
+
+    with operations_index._lock, operation_search_index._lock, report_service._cube_lock:
+        thread = threading.Thread(target=probe, daemon=True)
+        thread.start()
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+
+    assert set(results["caches"]) == {"operations_index", "search_index", "expense_cube"}
+    assert results["caches"]["expense_cube"] is False
+    assert set(results["stats"]) == {"hit", "catch_up"}
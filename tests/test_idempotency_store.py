@@ -0,0 +1,102 @@
+# tests/test_idempotency_store.py
+
+import json
+
+import pytest
+
+from infrastructure.idempotency.idempotency_store import IdempotencyStore
+
+
+class Calls:
+    """
+    func для run_once: возвращает следующий номер и считает вызовы.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self) -> str:
+        self.count += 1
+        return f"op-{self.count}"
+
+
+def _journal(path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_returns_first_result(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idem.jsonl"), max_keys=10)
+    func = Calls()
+
+    assert store.run_once("msg:1:1", func) == "op-1"
+    assert store.run_once("msg:1:1", func) == "op-1"
+    assert store.run_once("msg:1:2", func) == "op-2"
+    assert func.count == 2
+
+
+def test_failed_call_is_not_remembered(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idem.jsonl"), max_keys=10)
+
+    def fail():
+        raise RuntimeError("Sheets недоступен")
+
+    with pytest.raises(RuntimeError):
+        store.run_once("msg:1:1", fail)
+    assert store.run_once("msg:1:1", Calls()) == "op-1"
+
+
+def test_journal_reloaded_after_restart(tmp_path):
+    """
+    Новый процесс читает журнал: повтор после перезапуска не выполняется,
+    недописанная последняя строка пропускается.
+    """
+    path = tmp_path / "idem.jsonl"
+    first = IdempotencyStore(str(path), max_keys=10)
+    first.run_once("msg:1:1", lambda: "op-a")
+    first.run_once("msg:1:2", lambda: None)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"k": "msg:1:3", "v": "op-')
+
+    restarted = IdempotencyStore(str(path), max_keys=10)
+    func = Calls()
+    assert restarted.run_once("msg:1:1", func) == "op-a"
+    assert restarted.run_once("msg:1:2", func) is None
+    assert restarted.run_once("msg:1:3", func) == "op-1"
+    assert func.count == 1
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idem.jsonl"), max_keys=2)
+    store.run_once("a", lambda: "A")
+    store.run_once("b", lambda: "B")
+    store.run_once("a", Calls())  # "a" снова свежий
+    store.run_once("c", lambda: "C")  # вытесняет "b"
+
+    func = Calls()
+    assert store.run_once("a", func) == "A"
+    assert store.run_once("c", func) == "C"
+    assert store.run_once("b", func) == "op-1"
+    assert func.count == 1
+
+
+def test_journal_rewritten_with_live_keys_only(tmp_path):
+    """
+    Когда строк журнала становится больше 2 * max_keys, журнал
+    переписывается: в нём остаются только ключи из памяти.
+    """
+    path = tmp_path / "idem.jsonl"
+    store = IdempotencyStore(str(path), max_keys=2)
+    for i in range(4):
+        store.run_once(f"k{i}", lambda i=i: i)
+    assert len(_journal(path)) == 4
+
+    store.run_once("k4", lambda: 4)
+
+    assert _journal(path) == [{"k": "k3", "v": 3}, {"k": "k4", "v": 4}]
+    assert not (tmp_path / "idem.jsonl.tmp").exists()
+
+    restarted = IdempotencyStore(str(path), max_keys=2)
+    func = Calls()
+    assert restarted.run_once("k4", func) == 4
+    assert restarted.run_once("k0", func) == "op-1"
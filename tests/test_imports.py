@@ -0,0 +1,99 @@
+# tests/test_imports.py
+
+import pytest
+
+from application.usecases.expenses import ExpenseService
+from application.usecases.imports import ExpenseImportService
+from config.settings import (
+    SHEET_OPERATION_ROWS_RANGE,
+    SHEET_OPERATIONS_RANGE,
+    SHEET_USER_GROUPS_RANGE,
+    SHEET_USERS_RANGE,
+)
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository
+from infrastructure.google_sheets.operation_row_repository import OperationRowSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+
+
+GROUP_ID = "G1"
+
+
+@pytest.fixture
+def import_service(sheets):
+    sheets.put_rows(SHEET_USERS_RANGE, [["1", "Alice"], ["2", "Bob"], ["3", "Carol"]])
+    sheets.put_rows(SHEET_USER_GROUPS_RANGE, [["1", GROUP_ID], ["2", GROUP_ID], ["3", GROUP_ID]])
+    user_group_repo = UserGroupSheetRepository()
+    return ExpenseImportService(
+        expense_svc=ExpenseService(
+            operation_repo=OperationSheetRepository(),
+            operation_row_repo=OperationRowSheetRepository(),
+            user_group_repo=user_group_repo,
+        ),
+        user_group_repo=user_group_repo,
+        user_repo=UserSheetRepository(),
+        min_interval_seconds=0,
+    )
+
+
+def write_csv(tmp_path, *lines: str) -> str:
+    path = tmp_path / "history.csv"
+    path.write_text("\n".join(["date,payer,category,amount,split", *lines]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("split", ['";"', '" , "'])
+def test_split_of_separators_only_is_an_error(import_service, sheets, tmp_path, split):
+    path = write_csv(tmp_path, f"2024-03-01,Alice,Реклама,100,{split}")
+
+    report = import_service.import_csv(path, GROUP_ID)
+
+    assert report.rows_imported == 0
+    assert report.error_count == 1
+    assert "нет ни одного участника" in report.errors[0]
+    assert sheets.spreadsheet.read(SHEET_OPERATION_ROWS_RANGE) == []
+
+
+def test_repeated_split_refs_get_one_share(import_service, sheets, tmp_path):
+    path = write_csv(tmp_path, "2024-03-01,Alice,Реклама,100,alice;Alice;2;Bob")
+
+    report = import_service.import_csv(path, GROUP_ID)
+
+    assert report.rows_imported == 1
+    credits = [row for row in sheets.spreadsheet.read(SHEET_OPERATION_ROWS_RANGE) if row[5] == "credit"]
+    assert sorted((row[3], row[6]) for row in credits) == [("1", "50"), ("2", "50")]
+
+
+def test_resume_after_crash_between_write_and_state_does_not_duplicate(import_service, sheets, tmp_path):
+    """
+    Процесс упал после записи пакета, но до сохранения состояния:
+    повторный запуск не пишет операции этого пакета второй раз.
+    """
+    import_service.chunk_size = 2
+    path = write_csv(
+        tmp_path,
+        "2024-03-01,Alice,Реклама,100,all",
+        "2024-03-02,Bob,Реклама,200,all",
+        "2024-03-03,Carol,Реклама,300,all",
+    )
+    save_state = import_service._save_state
+
+    def crash_after_write(state_path, group_id, rows_done, pending_through=0):
+        if rows_done == 2:
+            raise KeyboardInterrupt
+        save_state(state_path, group_id, rows_done, pending_through)
+
+    import_service._save_state = crash_after_write
+    with pytest.raises(KeyboardInterrupt):
+        import_service.import_csv(path, GROUP_ID)
+    assert len(sheets.spreadsheet.read(SHEET_OPERATIONS_RANGE)) == 2
+
+    import_service._save_state = save_state
+    report = import_service.import_csv(path, GROUP_ID)
+
+    assert report.rows_imported == 1
+    assert report.rows_skipped == 2
+    op_ids = [row[2] for row in sheets.spreadsheet.read(SHEET_OPERATIONS_RANGE)]
+    assert len(op_ids) == len(set(op_ids)) == 3
+    # debit плательщику и credit каждому из трёх участников
+    assert len(sheets.spreadsheet.read(SHEET_OPERATION_ROWS_RANGE)) == 3 * 4
@@ -0,0 +1,76 @@
+# tests/test_money.py
+
+import pytest
+
+from common.money import format_money, parse_money, split_cents, to_cents
+
+
+@pytest.mark.parametrize(
+    "text, cents",
+    [
+        ("1500", 1500_00),
+        ("123,45", 123_45),
+        ("1 500.50", 1500_50),
+        ("1 500", 1500_00),
+        ("0.005", 1),
+        ("0.004", 0),
+        ("-12,3", -12_30),
+    ],
+)
+def test_parse_money(text, cents):
+    assert parse_money(text) == cents
+
+
+@pytest.mark.parametrize("text", ["", "abc", "12,34,56", "1e", "NaN", "Infinity", "-inf"])
+def test_parse_money_rejects_bad_input(text):
+    assert parse_money(text) is None
+
+
+@pytest.mark.parametrize(
+    "value, cents",
+    [
+        (1500, 1500_00),
+        (123.45, 123_45),
+        ("123,45", 123_45),
+        (" 99.9 ", 99_90),
+        (333.3333, 333_33),
+        ("666,6667", 666_67),
+        (-12.3, -12_30),
+        ("-0,01", -1),
+        ("-333.3333", -333_33),
+    ],
+)
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize("value", ["сто рублей", "inf", "-Infinity", "nan", float("inf"), float("nan")])
+def test_to_cents_rejects_bad_input(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_split_cents_remainder_goes_to_first_sorted_ids():
+    """
+    Лишние копейки — по одной первым id в порядке сортировки,
+    независимо от порядка участников во входном списке.
+    """
+    shares = split_cents(100_01, ["3", "1", "2"])
+
+    assert shares == {"1": 33_34, "2": 33_34, "3": 33_33}
+    assert split_cents(100_01, ["2", "3", "1"]) == shares
+    assert sum(shares.values()) == 100_01
+
+
+def test_split_cents_edge_cases():
+    assert split_cents(100_00, []) == {}
+    assert split_cents(100_00, ["1", "2"]) == {"1": 50_00, "2": 50_00}
+    assert split_cents(1, ["b", "a", "c"]) == {"a": 1, "b": 0, "c": 0}
+
+
+@pytest.mark.parametrize(
+    "cents, text",
+    [(0, "0.00"), (5, "0.05"), (1500_00, "1500.00"), (-12_30, "-12.30"), (-7, "-0.07")],
+)
+def test_format_money(cents, text):
+    assert format_money(cents) == text
@@ -0,0 +1,89 @@
+# tests/test_operation_repository.py
+
+from datetime import datetime
+
+from config.settings import SHEET_OPERATIONS_RANGE
+from domain.models.expenses import Operation
+from infrastructure.google_sheets.operation_repository import OperationSheetRepository, operation_to_values
+
+
+def make_operation(op_id: str, group_id: str, person_id: str) -> Operation:
+    return Operation(
+        group_id=group_id,
+        date=datetime(2025, 1, 1),
+        id=op_id,
+        operation_type="expense",
+        person_id=person_id,
+        is_expense=True,
+        category="Прочее",
+        comment=op_id,
+        amount_cents=100,
+    )
+
+
+def test_last_active_for_person_after_external_compaction(sheets):
+    """
+    Архивация из другого процесса удалила строку листа, индекс этого
+    процесса устарел — нельзя вернуть операцию чужого пользователя.
+    """
+    sheets.put_rows(
+        SHEET_OPERATIONS_RANGE,
+        [
+            operation_to_values(make_operation("a1", "G1", "A")),
+            operation_to_values(make_operation("b1", "G2", "B")),
+            operation_to_values(make_operation("a2", "G1", "A")),
+        ],
+    )
+    repo = OperationSheetRepository()
+    assert repo.get_last_active_for_person("G1", "A").id == "a2"
+
+    # Удаляем первую строку данных (строка 2 листа) в обход репозитория
+    del sheets.spreadsheet.rows("operations")[1]
+
+    assert repo.get_last_active_for_person("G1", "A").id == "a2"
+    assert repo.get_last_active_for_person("G2", "B").id == "b1"
+    assert repo.get_last_active_for_person("G2", "A") is None
+
+
+def test_search_after_external_compaction(sheets):
+    """
+    После сжатия листа в другом процессе поиск видит операции,
+    дописанные в лист позже (например, импортом), и не видит удалённые.
+    """
+    sheets.put_rows(
+        SHEET_OPERATIONS_RANGE,
+        [
+            operation_to_values(make_operation("студия январь", "G1", "A")),
+            operation_to_values(make_operation("студия февраль", "G1", "A")),
+            operation_to_values(make_operation("аренда", "G1", "A")),
+        ],
+    )
+    repo = OperationSheetRepository()
+    assert len(repo.search("G1", "студия")) == 2
+
+    # Архивация удалила две строки, затем импорт дописал операцию
+    del sheets.spreadsheet.rows("operations")[1:3]
+    sheets.spreadsheet.append(
+        SHEET_OPERATIONS_RANGE, [operation_to_values(make_operation("студия март", "G1", "A"))]
+    )
+
+    assert [op.id for op in repo.search("G1", "студия")] == ["студия март"]
+    assert [op.id for op in repo.search("G1", "аренда")] == ["аренда"]
+
+
+def test_search_orders_same_day_operations_by_write_order(sheets):
+    """
+    Дата операции — с точностью до дня: операции одного дня идут
+    от записанной последней к первой, одинаково при каждом поиске.
+    """
+    op_ids = [f"op{i:02d}" for i in range(20)]
+    sheets.put_rows(
+        SHEET_OPERATIONS_RANGE,
+        [operation_to_values(make_operation(op_id, "G1", "A")) for op_id in op_ids],
+    )
+    repo = OperationSheetRepository()
+
+    assert [op.id for op in repo.search("G1", "прочее")] == op_ids[::-1]
+
+    repo.create(make_operation("op20", "G1", "A"))
+    assert [op.id for op in repo.search("G1", "прочее")] == ["op20"] + op_ids[::-1]
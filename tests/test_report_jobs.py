@@ -0,0 +1,65 @@
+# tests/test_report_jobs.py
+
+import asyncio
+from datetime import datetime
+
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import Chat, Message
+
+from tests.telegram_fakes import BotHarness
+from transport.telegram.report_jobs import TELEGRAM_TEXT_LIMIT, ReportJobs
+
+
+def deliver(harness: BotHarness, report_text: str) -> Message:
+    """
+    Доставить отчёт в заглушку (id 7) и дождаться доставки.
+    """
+    placeholder = Message(
+        message_id=7,
+        date=datetime.now(),
+        chat=Chat(id=1, type="private"),
+        text="Считаю…",
+    ).as_(harness.bot)
+    jobs = ReportJobs()
+
+    async def run() -> None:
+        jobs.deliver(placeholder, "report", lambda: report_text)
+        await asyncio.gather(*jobs._deliveries)
+
+    asyncio.run(run())
+    return placeholder
+
+
+def test_report_replaces_placeholder():
+    harness = BotHarness()
+    deliver(harness, "Отчёт")
+
+    assert [type(m) for m in harness.session.requests] == [EditMessageText]
+    assert harness.session.texts() == ["Отчёт"]
+
+
+def test_deleted_placeholder_falls_back_to_new_message():
+    harness = BotHarness()
+    harness.session.deleted_message_ids.add(7)
+
+    deliver(harness, "Отчёт")
+
+    assert [type(m) for m in harness.session.requests] == [SendMessage]
+    assert harness.session.texts() == ["Отчёт"]
+
+
+def test_long_report_is_split_across_messages():
+    """
+    Отчёт длиннее лимита Telegram: первая часть — в заглушке,
+    остальное — следующими сообщениями, ничего не теряется.
+    """
+    harness = BotHarness()
+    lines = [f"Категория {i}: {i * 100}.00" for i in range(400)]
+
+    deliver(harness, "\n".join(lines))
+
+    texts = harness.session.texts()
+    assert len(texts) > 1
+    assert type(harness.session.requests[0]) is EditMessageText
+    assert all(len(text) <= TELEGRAM_TEXT_LIMIT for text in texts)
+    assert "\n".join(texts).split("\n") == lines
@@ -0,0 +1,108 @@
+# tests/test_sheets_budget.py
+"""
+Бюджеты обращений к Sheets для основных сценариев бота.
+
+Числа в budget(...) — сколько запросов сценарий делает сейчас.
+Если изменение их превышает, тест покажет список всех вызовов;
+если изменение осознанное (и стало дешевле) — уменьшите бюджет.
+"""
+
+import asyncio
+
+import pytest
+
+from config.settings import (
+    SHEET_OPERATIONS_RANGE,
+    SHEET_USER_GROUPS_RANGE,
+    SHEET_USERS_RANGE,
+)
+from transport.telegram.registration_handlers import JOIN_GROUP_BTN
+from tests.conftest import GROUP_ID, MEMBERS
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_operation_expense_flow(bot, sheets):
+    """
+    /operation -> Затрата -> За всех -> категория -> комментарий -> сумма.
+    """
+    user = MEMBERS[0]
+
+    async def flow():
+        await bot.send(user, "/operation")
+        await bot.press(user, "op_expense")
+        await bot.press(user, "mode_all")
+        await bot.press(user, "cat:Контент")
+        await bot.send(user, "обложка")
+        await bot.send(user, "1500")
+
+    with sheets.budget(max_calls=8, max_writes=2, max_rows=270, max_calls_per_range=3) as calls:
+        run(flow())
+
+    assert any("Затрата успешно зарегистрирована" in text for text in bot.session.texts())
+    assert [c.method for c in calls if not c.is_read] == ["values.append", "values.append"]
+
+
+def test_operation_for_names_read_once(bot, sheets):
+    """
+    /operation_for: клавиатура с именами участников читает лист users
+    одним запросом, а не по запросу на участника.
+    """
+    with sheets.budget(max_calls=6, max_writes=0) as calls:
+        run(bot.send(MEMBERS[0], "/operation_for"))
+
+    users_reads = [c for c in calls if c.ranges == (SHEET_USERS_RANGE,)]
+    assert len(users_reads) == 1
+    assert any("Выберите пользователя" in text for text in bot.session.texts())
+
+
+def test_report_balance(bot, sheets):
+    """
+    /report -> Баланс.
+    """
+    user = MEMBERS[1]
+
+    async def flow():
+        await bot.send(user, "/report")
+        await bot.press(user, "report:balance")
+
+    with sheets.budget(max_calls=4, max_writes=0, max_rows=255, max_calls_per_range=2):
+        run(flow())
+
+    report = next(text for text in bot.session.texts() if text.startswith("Группа:"))
+    assert all(f"User{uid}:" in report for uid in MEMBERS)
+
+
+def test_join_group(bot, sheets):
+    """
+    Новый пользователь: /start -> Присоединиться к группе -> ID группы.
+    """
+    newcomer = 999
+
+    async def flow():
+        await bot.send(newcomer, "/start")
+        await bot.send(newcomer, JOIN_GROUP_BTN)
+        await bot.send(newcomer, GROUP_ID)
+
+    with sheets.budget(max_calls=10, max_writes=2) as calls:
+        run(flow())
+
+    assert any("успешно присоединились" in text for text in bot.session.texts())
+    assert {c.ranges[0] for c in calls if not c.is_read} == {SHEET_USERS_RANGE, SHEET_USER_GROUPS_RANGE}
+    assert [str(newcomer), GROUP_ID] in sheets.spreadsheet.read(SHEET_USER_GROUPS_RANGE)
+
+
+def test_budget_failure_lists_calls(bot, sheets):
+    """
+    Превышение бюджета падает с понятным списком вызовов.
+    """
+    with pytest.raises(AssertionError) as excinfo:
+        with sheets.budget(max_calls=0):
+            run(bot.send(MEMBERS[0], "/operation_for"))
+
+    message = str(excinfo.value)
+    assert "Sheets budget exceeded" in message
+    assert SHEET_USER_GROUPS_RANGE in message
+    assert SHEET_OPERATIONS_RANGE not in message
@@ -0,0 +1,75 @@
+# tests/test_sheets_emulator.py
+
+import time
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from infrastructure.google_sheets import client
+from infrastructure.google_sheets.emulator import EmulatorFaults, SheetsEmulator
+
+
+RANGE = "users!A2:B"
+
+
+def test_values_roundtrip():
+    service = SheetsEmulator()
+    values = service.spreadsheets().values()
+
+    values.append(spreadsheetId="x", range=RANGE, body={"values": [["1", "Аня"], [2, 3.0]]}).execute()
+    values.update(spreadsheetId="x", range="users!B3", body={"values": [["Боря", ""]]}).execute()
+
+    result = values.get(spreadsheetId="x", range=RANGE).execute()
+    assert result["values"] == [["1", "Аня"], ["2", "Боря"]]
+    batch = values.batchGet(spreadsheetId="x", ranges=[RANGE, "users!A3"]).execute()
+    assert [vr.get("values") for vr in batch["valueRanges"]] == [[["1", "Аня"], ["2", "Боря"]], [["2"]]]
+
+
+def test_injected_errors_are_http_errors():
+    service = SheetsEmulator(faults=EmulatorFaults(error_rate=1.0, error_statuses=(429,)))
+
+    with pytest.raises(HttpError) as excinfo:
+        service.spreadsheets().values().append(spreadsheetId="x", range=RANGE, body={"values": [["1"]]}).execute()
+
+    assert excinfo.value.resp.status == 429
+    # Упавшая запись ничего не меняет
+    assert service.spreadsheet.read(RANGE) == []
+
+
+def test_num_retries_recovers_from_transient_errors():
+    faults = EmulatorFaults(error_rate=0.5, error_statuses=(503,), seed=1)
+    service = SheetsEmulator(faults=faults)
+    values = service.spreadsheets().values()
+
+    for i in range(20):
+        values.append(spreadsheetId="x", range=RANGE, body={"values": [[str(i)]]}).execute(num_retries=10)
+
+    assert len(service.spreadsheet.read(RANGE)) == 20
+
+
+def test_latency_grows_with_payload():
+    faults = EmulatorFaults(latency_seconds=0.01, seconds_per_kb=0.02)
+    service = SheetsEmulator(faults=faults)
+    values = service.spreadsheets().values()
+    values.update(spreadsheetId="x", range=RANGE, body={"values": [["x" * 100]] * 100}).execute()
+
+    start = time.perf_counter()
+    values.get(spreadsheetId="x", range="users!A2").execute()
+    small = time.perf_counter() - start
+    start = time.perf_counter()
+    values.get(spreadsheetId="x", range=RANGE).execute()
+    large = time.perf_counter() - start
+
+    assert small >= 0.01
+    assert large > small + 0.1
+
+
+def test_setting_switches_client_to_emulator(monkeypatch):
+    monkeypatch.setattr(client, "SHEETS_EMULATOR", True)
+    monkeypatch.setattr(client, "_emulator", None)
+
+    service = client.get_sheets_service()
+
+    assert isinstance(service, SheetsEmulator)
+    assert client.get_sheets_service() is service
+    client.ping_spreadsheet(service)
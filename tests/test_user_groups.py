@@ -0,0 +1,51 @@
+# tests/test_user_groups.py
+"""
+Группы пользователя поверх эмулятора Sheets (бывший testUserGroups.py,
+который писал в рабочую таблицу).
+"""
+
+from application.usecases.user_groups import UserGroupsService
+from config.settings import SHEET_USER_GROUPS_RANGE, SHEET_USERS_RANGE
+from infrastructure.google_sheets.group_repository import GroupSheetRepository
+from infrastructure.google_sheets.user_group_repository import UserGroupSheetRepository
+from infrastructure.google_sheets.user_repository import UserSheetRepository
+
+
+USER_ID = "123456"
+
+
+def make_service() -> UserGroupsService:
+    return UserGroupsService(
+        group_repo=GroupSheetRepository(),
+        user_group_repo=UserGroupSheetRepository(),
+        user_repo=UserSheetRepository(),
+    )
+
+
+def test_create_group_and_assign(sheets):
+    service = make_service()
+    assert service.get_current_user_group(USER_ID) is None
+
+    group = service.create_group_and_assign(USER_ID, "TESTGRP1", "Тестовый")
+
+    assert group.id == "TESTGRP1"
+    assert service.get_current_user_group(USER_ID).id == "TESTGRP1"
+    assert sheets.spreadsheet.read(SHEET_USERS_RANGE) == [[USER_ID, "Тестовый"]]
+
+
+def test_join_existing_group_moves_user(sheets):
+    service = make_service()
+    service.create_group_and_assign(USER_ID, "TESTGRP1", "Тестовый")
+    GroupSheetRepository().create("TESTGRP2")
+
+    assert service.join_group(USER_ID, " testgrp2 ", "Тестовый") is True
+
+    assert service.get_current_user_group(USER_ID).id == "TESTGRP2"
+    assert sheets.spreadsheet.read(SHEET_USER_GROUPS_RANGE) == [[USER_ID, "TESTGRP2"]]
+
+
+def test_join_missing_group(sheets):
+    service = make_service()
+
+    assert service.join_group(USER_ID, "NOPE", "Тестовый") is False
+    assert service.get_current_user_group(USER_ID) is None
@@ -0,0 +1,100 @@
+# transport/http/metrics_server.py
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+
+from common.logger import get_logger
+from common.metrics import metrics
+from infrastructure.google_sheets.client import ping_spreadsheet
+
+
+logger = get_logger(__name__)
+
+
+# Формат ответа /metrics (Prometheus text exposition)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Сколько секунд /healthz ждёт ответа Sheets
+HEALTH_SHEETS_TIMEOUT_SECONDS = 5.0
+
+
+class MetricsServer:
+    """
+    HTTP-сервер для мониторинга рядом с ботом (aiohttp, в том же цикле событий).
+
+    - GET /metrics — все метрики процесса в формате Prometheus;
+    - GET /healthz — JSON: доступен ли Sheets (с таймаутом) и прогреты ли
+      кэши (warm_checks: имя -> функция без аргументов, True — прогрет).
+      200, если Sheets отвечает, иначе 503. Холодные кэши — не ошибка:
+      сразу после старта они строятся по первым запросам.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sheets_service,
+        warm_checks: Dict[str, Callable[[], bool]],
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sheets_service = sheets_service
+        self.warm_checks = warm_checks
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self.handle_metrics)
+        self.app.router.add_get("/healthz", self.handle_healthz)
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Metrics server listening on http://%s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render().encode("utf-8"),
+            headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+        )
+
+    async def handle_healthz(self, request: web.Request) -> web.Response:
+        sheets = await self._check_sheets()
+        # Проверки могут читать файлы (контрольная точка) — не в цикле событий
+        caches = await asyncio.to_thread(self._check_caches)
+
+        return web.json_response(
+            {"status": "ok" if sheets["ok"] else "unavailable", "sheets": sheets, "caches": caches},
+            status=200 if sheets["ok"] else 503,
+        )
+
+    def _check_caches(self) -> Dict[str, bool]:
+        caches: Dict[str, bool] = {}
+        for name, check in self.warm_checks.items():
+            try:
+                caches[name] = bool(check())
+            except Exception as e:
+                logger.warning("Health check %s failed: %r", name, e)
+                caches[name] = False
+        return caches
+
+    async def _check_sheets(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(ping_spreadsheet, self.sheets_service),
+                timeout=HEALTH_SHEETS_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"timeout after {HEALTH_SHEETS_TIMEOUT_SECONDS:g}s"}
+        except Exception as e:
+            return {"ok": False, "error": repr(e)}
+        return {"ok": True, "latency_seconds": round(time.perf_counter() - started, 3)}
@@ -0,0 +1,117 @@
+# transport/telegram/dialog_prefetch.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from application.usecases.reports import ReportService
+from application.usecases.user_groups import UserGroupsService
+from common.logger import get_logger
+from config.settings import DIALOG_PREFETCH_TTL_SECONDS
+
+
+logger = get_logger(__name__)
+
+
+# Что загружаем заранее при старте диалога /operation и /operation_for
+PREFETCH_MEMBERS = "members"    # list[str] — участники группы
+PREFETCH_NAMES = "names"        # dict[str, str] — имена участников
+PREFETCH_BALANCE = "balance"    # dict[str, int] — балансы до операции, копейки
+
+
+class DialogPrefetcher:
+    """
+    Фоновая подгрузка данных для диалога учёта операции.
+
+    Пока пользователь проходит меню, режим, категорию и комментарий,
+    в фоне уже читаются участники группы, их имена и баланс группы.
+    К шагам, где эти данные нужны (выбор получателя, ввод суммы),
+    они обычно уже готовы.
+
+    Данные хранятся по ключу диалога (chat_id, user_id) до следующего
+    старта диалога, до drop() или не дольше ttl_seconds: брошенный
+    диалог (пользователь не дошёл до конца) при очередном start()
+    забывается, и get() для него вернёт None.
+    """
+
+    def __init__(
+        self,
+        user_groups_svc: UserGroupsService,
+        report_svc: ReportService,
+        ttl_seconds: float = DIALOG_PREFETCH_TTL_SECONDS,
+    ) -> None:
+        self.user_groups_svc = user_groups_svc
+        self.report_svc = report_svc
+        self.ttl_seconds = ttl_seconds
+        # ключ диалога -> (время старта, {что загружаем -> задача}),
+        # в порядке старта: устаревшие диалоги — в начале
+        self._dialogs: OrderedDict[Hashable, tuple[float, Dict[str, asyncio.Task]]] = OrderedDict()
+
+    def dialog_count(self) -> int:
+        """
+        Для скольких диалогов сейчас хранятся фоновые загрузки.
+        """
+        return len(self._dialogs)
+
+    def start(self, dialog_key: Hashable, group_id: str) -> None:
+        """
+        Запустить фоновые загрузки для нового диалога.
+        Незавершённые загрузки предыдущего диалога отменяются.
+        """
+        self.drop(dialog_key)
+        now = time.monotonic()
+        self._drop_expired(now)
+
+        members = asyncio.create_task(
+            asyncio.to_thread(self.user_groups_svc.user_group_repo.get_member_ids, group_id)
+        )
+        self._dialogs[dialog_key] = (now, {
+            PREFETCH_MEMBERS: members,
+            PREFETCH_NAMES: asyncio.create_task(self._load_names(members)),
+            PREFETCH_BALANCE: asyncio.create_task(self._load_balance(group_id)),
+        })
+
+    async def get(self, dialog_key: Hashable, what: str) -> Optional[Any]:
+        """
+        Дождаться результата загрузки.
+
+        Возвращает None, если загрузка не запускалась или упала —
+        тогда вызывающий код читает данные сам, как раньше.
+        """
+        entry = self._dialogs.get(dialog_key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            return None
+        task = entry[1].get(what)
+        if task is None:
+            return None
+        try:
+            # shield: если хэндлер отменят, сама загрузка пусть доработает
+            return await asyncio.shield(task)
+        except Exception as e:
+            logger.warning("Prefetch %r failed: %r", what, e)
+            return None
+
+    def drop(self, dialog_key: Hashable) -> None:
+        """
+        Забыть данные диалога (диалог завершён или начат заново).
+        """
+        _, tasks = self._dialogs.pop(dialog_key, (0.0, {}))
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
+    def _drop_expired(self, now: float) -> None:
+        while self._dialogs:
+            dialog_key, (started, _) = next(iter(self._dialogs.items()))
+            if now - started <= self.ttl_seconds:
+                break
+            self.drop(dialog_key)
+
+    async def _load_names(self, members: asyncio.Task) -> Dict[str, str]:
+        member_ids = await members
+        return await asyncio.to_thread(self.user_groups_svc.user_repo.get_names, member_ids)
+
+    async def _load_balance(self, group_id: str) -> Dict[str, int]:
+        _, balances = await asyncio.to_thread(self.report_svc.get_group_balance, group_id)
+        return balances
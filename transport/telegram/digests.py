@@ -0,0 +1,139 @@
+# transport/telegram/digests.py
+
+import asyncio
+import json
+import os
+from datetime import date, datetime
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from application.usecases.digests import DigestService, format_digest
+from application.usecases.reports import ReportPeriod, _get_period_bounds
+from common.logger import get_logger
+from transport.telegram.rate_limiter import AsyncRateLimiter
+
+
+logger = get_logger(__name__)
+
+
+# Как часто (секунд) планировщик проверяет, не пора ли рассылать
+DIGEST_CHECK_INTERVAL_SECONDS = 15 * 60
+
+# Сколько раз пробуем отправить одно сообщение, если Telegram просит подождать
+DIGEST_SEND_ATTEMPTS = 3
+
+
+class DigestSender:
+    """
+    Рассылка итогов прошлого месяца всем участникам всех групп.
+
+    - Сводки всех групп строит DigestService за одно чтение листов.
+    - Сообщения уходят через AsyncRateLimiter, чтобы не упереться
+      в лимиты Telegram на рассылку.
+    - В state_file отмечается месяц и кому итоги уже отправлены:
+      после перезапуска в тот же день рассылка продолжается с места
+      остановки, а повторно никому ничего не уходит.
+
+    Итоги отправляются в первый день месяца после send_hour.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        digest_svc: DigestService,
+        limiter: AsyncRateLimiter,
+        state_file: str,
+        send_hour: int,
+    ) -> None:
+        self.bot = bot
+        self.digest_svc = digest_svc
+        self.limiter = limiter
+        self.state_file = state_file
+        self.send_hour = send_hour
+
+    async def run_forever(self) -> None:
+        """
+        Фоновая задача: раз в DIGEST_CHECK_INTERVAL_SECONDS проверяет,
+        не пора ли отправить итоги.
+        """
+        while True:
+            now = datetime.now()
+            if now.day == 1 and now.hour >= self.send_hour:
+                try:
+                    await self.send_month(now.date())
+                except Exception:
+                    logger.exception("Digest sending failed")
+            await asyncio.sleep(DIGEST_CHECK_INTERVAL_SECONDS)
+
+    async def send_month(self, today: date) -> int:
+        """
+        Отправить итоги месяца, предшествующего today, тем,
+        кому они ещё не отправлены. Возвращает число отправленных сообщений.
+        """
+        start_date, end_date = _get_period_bounds(ReportPeriod.PREV_MONTH, today)
+        period_key = f"{start_date:%Y-%m}"
+
+        state = self._read_state()
+        if state.get("period") != period_key:
+            state = {"period": period_key, "done": False, "sent": []}
+        if state.get("done"):
+            return 0
+        sent: set[str] = set(state["sent"])
+
+        digests = await asyncio.to_thread(self.digest_svc.build_digests, start_date, end_date)
+
+        sent_count = 0
+        for digest in digests:
+            text = format_digest(digest, start_date, end_date)
+            for user_id in digest.member_ids:
+                key = f"{digest.group_id}:{user_id}"
+                if key in sent:
+                    continue
+                if await self._send(user_id, text):
+                    sent_count += 1
+                # Недоставленные (бот заблокирован и т.п.) тоже отмечаем,
+                # чтобы не пытаться снова при каждом перезапуске
+                sent.add(key)
+            # Отметку сохраняем после каждой группы
+            self._write_state({"period": period_key, "done": False, "sent": sorted(sent)})
+
+        self._write_state({"period": period_key, "done": True, "sent": []})
+        logger.info("Digests sent", extra={"period": period_key, "sent": sent_count})
+        return sent_count
+
+    async def _send(self, user_id: str, text: str) -> bool:
+        for _ in range(DIGEST_SEND_ATTEMPTS):
+            await self.limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=int(user_id), text=text)
+                return True
+            except TelegramRetryAfter as e:
+                # Притормаживаем всю рассылку, а не только это сообщение
+                self.limiter.pause(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest, ValueError) as e:
+                # Пользователь заблокировал бота, чат не найден и т.п.
+                logger.warning("Digest not delivered: %r", e, extra={"user_id": user_id})
+                return False
+        logger.warning("Digest not delivered: retry limit exceeded", extra={"user_id": user_id})
+        return False
+
+    def _read_state(self) -> dict:
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError as e:
+            logger.warning("Digest state ignored: %r", e)
+            return {}
+
+    def _write_state(self, state: dict) -> None:
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
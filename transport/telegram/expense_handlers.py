@@ -1,9 +1,12 @@
 # transport/telegram/expense_handlers.py
 
+import asyncio
+import html
+from typing import Callable
 from enum import IntEnum  # (в этом примере IntEnum не обязателен, но можно использовать)
 from aiogram import Dispatcher, F
 from enum import StrEnum
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import (
@@ -16,10 +19,26 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 
-from application.usecases.expenses import ExpenseService
+from application.usecases.expenses import ExpenseService, OperationCancelError
+from domain.models.expenses import CATEGORIES, Operation
+from domain.services.balance_service import SettleTransfer
+from application.usecases.expense_parsing import parse_expense_lines
 from application.usecases.user_groups import UserGroupsService
 from application.usecases.reports import ReportService
+from transport.telegram.report_jobs import ReportJobs, REPORT_PLACEHOLDER_TEXT
+from transport.telegram.dialog_prefetch import (
+    DialogPrefetcher,
+    PREFETCH_BALANCE,
+    PREFETCH_MEMBERS,
+    PREFETCH_NAMES,
+)
 from common.id_generator import generate_group_id  # если потребуется
+from common.logger import get_logger
+from common.metrics import metrics
+from common.money import format_money, parse_money, split_cents
+
+
+logger = get_logger(__name__)
 
 
 LOG_CHANNEL_ID = -1002907150912
@@ -38,9 +57,10 @@ EXPENSE_SELECTIVE_BTN = "Выборочно"  # пока не реализуем
 # Кнопки выбора отчета
 REPORT_BALANCE_BTN = "Баланс"
 
-# Список категорий затрат
-CATEGORIES = ["Реклама", "Релизы", "Контент", "Концерты", "Прочее"]
-
+# Сколько кнопок быстрой передачи показываем в отчёте "Как рассчитаться"
+SETTLE_MAX_BUTTONS = 10
+# Комментарий передачи, начатой из отчёта "Как рассчитаться"
+SETTLE_COMMENT = "Взаиморасчёт"
 
 # ----- СОСТОЯНИЯ FSM (диалога) -----
 
@@ -135,14 +155,14 @@ def _expense_mode_keyboard() -> InlineKeyboardMarkup:
 
 def _person_selection_keyboard(
     group_member_ids: list[str],
-    user_groups_svc: UserGroupsService,
+    names: dict[str, str],
 ) -> InlineKeyboardMarkup:
     """
     Строит inline-клавиатуру для выбора пользователя, за которого регистрируем операцию.
     
     Параметры:
     - group_member_ids: список ID всех участников группы
-    - user_groups_svc: сервис для получения информации о пользователях
+    - names: имена участников {user_id -> имя} (из листа users)
     
     Возвращает:
     - InlineKeyboardMarkup с кнопками для каждого участника группы
@@ -150,15 +170,8 @@ def _person_selection_keyboard(
     buttons: list[list[InlineKeyboardButton]] = []
     
     for uid in group_member_ids:
-        # Пытаемся получить информацию о пользователе из репозитория users
-        user_info = user_groups_svc.user_repo.get_by_id(uid)
-        
-        if user_info is not None and getattr(user_info, "name", None):
-            # Если имя есть — используем его
-            display_name = user_info.name
-        else:
-            # Если имени нет — показываем ID
-            display_name = f"Пользователь {uid}"
+        # Если имя есть — используем его, иначе показываем ID
+        display_name = names.get(uid) or f"Пользователь {uid}"
         
         # Каждая кнопка — отдельная строка
         # callback_data имеет вид "person:user_id"
@@ -236,9 +249,55 @@ def _report_menu_keyboard() -> InlineKeyboardMarkup:
                     callback_data="report:by_category",
                 ),
             ],
+            [
+                InlineKeyboardButton(
+                    text="Затраты по участникам",
+                    callback_data="report:by_person",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="Динамика по месяцам",
+                    callback_data="report:trend",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    text="Как рассчитаться",
+                    callback_data="report:settle",
+                ),
+            ],
         ]
     )
 
+
+def _settle_keyboard(
+    plan: list[SettleTransfer],
+    current_user_id: str,
+    names: dict[str, str],
+) -> InlineKeyboardMarkup | None:
+    """
+    Кнопки быстрой передачи для передач из плана, которые должен
+    сделать сам пользователь. callback_data: "settle:<кому>:<копейки>".
+    """
+    buttons: list[list[InlineKeyboardButton]] = []
+    for transfer in plan:
+        if transfer.from_user_id != current_user_id:
+            continue
+        name = names.get(transfer.to_user_id) or f"Пользователь {transfer.to_user_id}"
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text=f"Передать {name} {format_money(transfer.amount_cents)}",
+                    callback_data=f"settle:{transfer.to_user_id}:{transfer.amount_cents}",
+                )
+            ]
+        )
+        if len(buttons) >= SETTLE_MAX_BUTTONS:
+            break
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
+
 # >>> ИЗМЕНЕНО: категории тоже как inline-кнопки.
 def _category_keyboard() -> InlineKeyboardMarkup:
     """
@@ -262,7 +321,7 @@ def _category_keyboard() -> InlineKeyboardMarkup:
 def _transfer_target_keyboard(
     group_member_ids: list[str],
     current_user_id: str,
-    user_groups_svc: UserGroupsService,
+    names: dict[str, str],
 ) -> InlineKeyboardMarkup:
     """
     Строит inline-клавиатуру для выбора получателя передачи.
@@ -277,14 +336,8 @@ def _transfer_target_keyboard(
             # Себя не показываем как возможного получателя
             continue
 
-        # Пытаемся получить информацию о пользователе из репозитория users
-        # user_repo реализует интерфейс IUserRepository
-        user_info = user_groups_svc.user_repo.get_by_id(uid)
-        if user_info is not None and getattr(user_info, "name", None):
-            display_name = user_info.name
-        else:
-            # Fallback: если имени нет, показываем id
-            display_name = f"Пользователь {uid}"
+        # Fallback: если имени нет, показываем id
+        display_name = names.get(uid) or f"Пользователь {uid}"
 
         buttons.append(
             [
@@ -325,6 +378,45 @@ def register_expense_handlers(
     - expense_svc: сервис, который создаёт записи об операциях в Google Sheets.
     """
 
+    # Фоновые задачи отчётов: ответ на кнопку сразу, результат — правкой заглушки
+    report_jobs = ReportJobs()
+
+    # Фоновая подгрузка участников, имён и баланса при старте диалога
+    prefetcher = DialogPrefetcher(user_groups_svc, report_svc)
+
+    metrics.callback(
+        "report_jobs_in_flight", "Сколько разных отчётов считается в фоне", report_jobs.in_flight_count
+    )
+    metrics.callback(
+        "prefetch_dialogs", "Для скольких диалогов хранятся фоновые загрузки", prefetcher.dialog_count
+    )
+
+    async def _dialog_members(dialog_key: tuple, state: FSMContext, group_id: str) -> list[str]:
+        """
+        Участники группы для текущего диалога: из FSM, из фоновой
+        загрузки или (если её нет) прямым чтением листа userGroups.
+        Результат сохраняется в FSM вместе с остальными данными диалога.
+        """
+        data = await state.get_data()
+        member_ids = data.get("member_ids")
+        if member_ids is None:
+            member_ids = await prefetcher.get(dialog_key, PREFETCH_MEMBERS)
+        if member_ids is None:
+            member_ids = await asyncio.to_thread(
+                user_groups_svc.user_group_repo.get_member_ids, group_id
+            )
+        await state.update_data(member_ids=member_ids)
+        return member_ids
+
+    async def _dialog_names(dialog_key: tuple, member_ids: list[str]) -> dict[str, str]:
+        """
+        Имена участников: из фоновой загрузки или одним чтением листа users.
+        """
+        names = await prefetcher.get(dialog_key, PREFETCH_NAMES)
+        if names is None:
+            names = await asyncio.to_thread(user_groups_svc.user_repo.get_names, member_ids)
+        return names
+
     # ---------- ШАГ 1. Команда /operation ----------
 
     @dp.message(Command("operation"))
@@ -338,8 +430,10 @@ def register_expense_handlers(
         """
         user_id = str(message.from_user.id)
 
-        # Пытаемся получить текущую группу по user_id
-        group = user_groups_svc.get_current_user_group(user_id)
+        # Пытаемся получить текущую группу по user_id.
+        # Обращения к Google Sheets блокирующие, поэтому уводим их в поток,
+        # чтобы не останавливать обработку апдейтов других пользователей.
+        group = await asyncio.to_thread(user_groups_svc.get_current_user_group, user_id)
         if group is None:
             # Группы нет — очищаем состояние и просим пользователя
             # сначала выбрать/создать группу
@@ -351,8 +445,13 @@ def register_expense_handlers(
             )
             return
 
-        # Сохраняем group_id в памяти FSM, чтобы не искать его каждый раз
-        await state.update_data(group_id=group.id)
+        # Сохраняем group_id в памяти FSM, чтобы не искать его каждый раз.
+        # Данные прошлого диалога (участники и т.п.) больше не актуальны.
+        await state.set_data({"group_id": group.id})
+
+        # Пока пользователь идёт по меню, в фоне грузим участников,
+        # их имена и баланс группы — они понадобятся на последних шагах
+        prefetcher.start((message.chat.id, user_id), group.id)
 
         # Переводим FSM в состояние выбора типа операции
         await state.set_state(ExpenseStates.MAIN_MENU)
@@ -376,7 +475,7 @@ def register_expense_handlers(
         user_id = str(message.from_user.id)
         
         # Проверяем текущую группу пользователя
-        group = user_groups_svc.get_current_user_group(user_id)
+        group = await asyncio.to_thread(user_groups_svc.get_current_user_group, user_id)
         if group is None:
             # Группы нет — просим сначала пройти /start
             await state.clear()
@@ -387,22 +486,16 @@ def register_expense_handlers(
             )
             return
         
-        # Сохраняем group_id в FSM
-        await state.update_data(group_id=group.id)
-        
+        # Сохраняем group_id в FSM (данные прошлого диалога сбрасываем)
+        await state.set_data({"group_id": group.id})
+
+        # Запускаем фоновые загрузки: участники и имена нужны прямо сейчас
+        # (читаются параллельно), баланс — к концу диалога
+        dialog_key = (message.chat.id, user_id)
+        prefetcher.start(dialog_key, group.id)
+
         # Получаем список участников группы
-        # Используем тот же способ, что и для выбора получателя передачи
-        links, _ = user_groups_svc.user_group_repo._read_all_rows()
-        member_ids: list[str] = []
-        
-        if links:
-            for row in links:
-                if not row:
-                    continue
-                row_user_id = row[0].strip()
-                row_group_id = row[1].strip().upper() if len(row) > 1 else ""
-                if row_group_id == str(group.id).strip().upper():
-                    member_ids.append(row_user_id)
+        member_ids = await _dialog_members(dialog_key, state, group.id)
         
         # Проверяем, что в группе есть участники
         if not member_ids:
@@ -416,9 +509,162 @@ def register_expense_handlers(
         await state.set_state(ExpenseStates.SELECT_PERSON)
         
         # Показываем клавиатуру со списком участников
+        names = await _dialog_names(dialog_key, member_ids)
         await message.answer(
             "Выберите пользователя, за которого регистрируете операцию:",
-            reply_markup=_person_selection_keyboard(member_ids, user_groups_svc),
+            reply_markup=_person_selection_keyboard(member_ids, names),
+        )
+
+    # ---------- БЫСТРЫЙ ВВОД: /e ----------
+
+    @dp.message(Command("e"))
+    async def cmd_quick_expense(message: Message):
+        """
+        Быстрый ввод затрат 'за всех в группе' одним сообщением,
+        без пошагового диалога.
+
+        Формат (одна или несколько строк):
+            /e 1500 Реклама таргет VK
+            300 Контент фотосессия
+
+        Каждая строка: сумма, категория из CATEGORIES, комментарий.
+        Если хоть одна строка с ошибкой — ничего не записываем.
+        Все операции и их строки пишутся одним пакетным вызовом.
+        """
+        user_id = str(message.from_user.id)
+
+        # Всё, что после самой команды (включая следующие строки)
+        parts = (message.text or "").split(maxsplit=1)
+        body = parts[1] if len(parts) > 1 else ""
+
+        if not body.strip():
+            await message.answer(
+                "Формат: /e СУММА КАТЕГОРИЯ КОММЕНТАРИЙ\n"
+                "Например: /e 1500 Реклама таргет VK\n"
+                "Можно несколько затрат — каждая с новой строки.\n"
+                f"Категории: {', '.join(CATEGORIES)}.",
+            )
+            return
+
+        drafts, errors = parse_expense_lines(body, CATEGORIES)
+        if errors:
+            await message.answer(
+                "Ничего не записано, исправьте ошибки:\n" + html.escape("\n".join(errors)),
+            )
+            return
+
+        group = await asyncio.to_thread(user_groups_svc.get_current_user_group, user_id)
+        if group is None:
+            await message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        op_ids = await asyncio.to_thread(
+            expense_svc.create_expenses_batch,
+            user_id=user_id,
+            group_id=group.id,
+            drafts=drafts,
+            idempotency_key=f"msg:{message.chat.id}:{message.message_id}",
+        )
+
+        # Комментарий — текст пользователя, а сообщения уходят в HTML-режиме
+        lines = [
+            html.escape(
+                f"{format_money(d.amount_cents)} — {d.category}" + (f" ({d.comment})" if d.comment else "")
+            )
+            for d in drafts
+        ]
+
+        # ---------- ЛОГИРОВАНИЕ В КАНАЛ ----------
+        log_text = (
+            "Новые операции зарегистрированы (/e):\n"
+            f"Пользователь: {html.escape(message.from_user.full_name)} (id={user_id})\n"
+            f"Группа: {group.id}\n"
+            + "\n".join(
+                f"{line} [ID: {op_id}]" for line, op_id in zip(lines, op_ids)
+            )
+        )
+        await message.bot.send_message(
+            chat_id=LOG_CHANNEL_ID,
+            text=log_text,
+        )
+
+        await message.answer(
+            f"Записано затрат: {len(op_ids)}\n" + "\n".join(lines),
+        )
+
+    # ---------- ОТМЕНА ОПЕРАЦИЙ: /undo и /cancel ----------
+
+    async def _cancel_and_report(message: Message, cancel: Callable[[str], Operation]) -> None:
+        """
+        Общая часть /undo и /cancel: отменяем операцию (cancel получает
+        id текущей группы), пишем в лог-канал и отвечаем пользователю.
+        """
+        user_id = str(message.from_user.id)
+
+        group = await asyncio.to_thread(user_groups_svc.get_current_user_group, user_id)
+        if group is None:
+            await message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        try:
+            op = await asyncio.to_thread(cancel, group.id)
+        except OperationCancelError as e:
+            await message.answer(str(e))
+            return
+
+        description = html.escape(
+            f"{format_money(op.amount_cents)} — {op.category}" + (f" ({op.comment})" if op.comment else "")
+        )
+
+        await message.bot.send_message(
+            chat_id=LOG_CHANNEL_ID,
+            text=(
+                "Операция отменена:\n"
+                f"Пользователь: {html.escape(message.from_user.full_name)} (id={user_id})\n"
+                f"Группа: {group.id}\n"
+                f"{description} [ID: {op.id}]"
+            ),
+        )
+
+        await message.answer(
+            f"Операция отменена: {description}\n"
+            f"ID операции: <code>{op.id}</code>",
+        )
+
+    @dp.message(Command("undo"))
+    async def cmd_undo(message: Message):
+        """
+        Отменить свою последнюю операцию в текущей группе.
+        """
+        user_id = str(message.from_user.id)
+        await _cancel_and_report(
+            message,
+            lambda group_id: expense_svc.undo_last(user_id, group_id),
+        )
+
+    @dp.message(Command("cancel"))
+    async def cmd_cancel(message: Message, command: CommandObject):
+        """
+        /cancel <ID операции> — отменить операцию своей группы по id.
+        """
+        operation_id = (command.args or "").strip()
+        if not operation_id:
+            await message.answer(
+                "Формат: /cancel ID_ОПЕРАЦИИ\n"
+                "ID показывается в ответе бота после записи операции.\n"
+                "Отменить свою последнюю операцию: /undo",
+            )
+            return
+
+        await _cancel_and_report(
+            message,
+            lambda group_id: expense_svc.cancel_operation(group_id, operation_id),
         )
 
     # ---------- ОБРАБОТКА ВЫБОРА ПОЛЬЗОВАТЕЛЯ ----------
@@ -498,18 +744,11 @@ def register_expense_handlers(
                 # Обычный режим /operation — операция от своего имени
                 person_id = str(callback.from_user.id)
             
-            # Получаем список всех участников группы
-            links, _ = user_groups_svc.user_group_repo._read_all_rows()
-            member_ids: list[str] = []
-            
-            if links:
-                for row in links:
-                    if not row:
-                        continue
-                    row_user_id = row[0].strip()
-                    row_group_id = row[1].strip().upper() if len(row) > 1 else ""
-                    if row_group_id == str(group_id).strip().upper():
-                        member_ids.append(row_user_id)
+            # Получаем список всех участников группы и их имена
+            # (обычно уже загружены в фоне при старте диалога)
+            dialog_key = (callback.message.chat.id, str(callback.from_user.id))
+            member_ids = await _dialog_members(dialog_key, state, group_id)
+            names = await _dialog_names(dialog_key, member_ids)
             
             # Переводим FSM в состояние выбора получателя
             await state.set_state(ExpenseStates.TRANSFER_TARGET)
@@ -521,7 +760,7 @@ def register_expense_handlers(
                 reply_markup=_transfer_target_keyboard(
                     group_member_ids=member_ids,
                     current_user_id=person_id,  # <- ИЗМЕНЕНО: передаём person_id
-                    user_groups_svc=user_groups_svc,
+                    names=names,
                 ),
             )
             await callback.answer()
@@ -691,19 +930,17 @@ def register_expense_handlers(
         3. Вызываем ExpenseService.create_expense_for_all.
         4. Очищаем состояние и пишем пользователю результат.
         """
-        # Заменяем запятую на точку, чтобы поддержать формат "123,45"
-        text_amount = (message.text or "").replace(",", ".").strip()
+        # Сумма в копейках; поддерживаются форматы "123,45" и "1 500"
+        amount_cents = parse_money((message.text or "").strip())
 
-        try:
-            amount = float(text_amount)
-        except ValueError:
+        if amount_cents is None:
             # Не удалось преобразовать строку к числу
             await message.answer(
                 "Не удалось понять сумму. Введите число, например 123.45:",
             )
             return
 
-        if amount <= 0:
+        if amount_cents <= 0:
             await message.answer(
                 "Сумма должна быть больше нуля. Введите ещё раз:",
             )
@@ -717,23 +954,31 @@ def register_expense_handlers(
         mode = data.get("mode", "expense")
         transfer_target_id = data.get("transfer_target_id")
 
+        # Данные, загруженные в фоне при старте диалога
+        dialog_key = (message.chat.id, str(message.from_user.id))
+
         # Если в FSM есть operation_person_id — используем его
         # Иначе — используем ID текущего пользователя (обычный режим)
         operation_person_id = data.get("operation_person_id")
         if operation_person_id:
             # Режим /operation_for — операция за другого пользователя
             user_id = operation_person_id
-            # Получаем имя выбранного пользователя для логов
-            user_info = user_groups_svc.user_repo.get_by_id(user_id)
-            if user_info and getattr(user_info, "name", None):
-                user_name = user_info.name
-            else:
-                user_name = f"Пользователь {user_id}"
+            # Имя выбранного пользователя для логов
+            member_ids = await _dialog_members(dialog_key, state, group_id)
+            names = await _dialog_names(dialog_key, member_ids)
+            user_name = names.get(user_id) or f"Пользователь {user_id}"
         else:
             # Обычный режим /operation — операция от своего имени
             user_id = str(message.from_user.id)
             user_name = message.from_user.full_name
 
+        # Повторная доставка того же сообщения с суммой не создаст дубль
+        idempotency_key = f"msg:{message.chat.id}:{message.message_id}"
+
+        # Баланс группы до операции: дожидаемся фоновой загрузки
+        # до записи, чтобы в снимок не попала сама новая операция
+        balances = await prefetcher.get(dialog_key, PREFETCH_BALANCE)
+
         # Вызываем бизнес-логику:
         # создаём операцию типа 'expense' или 'transfer' в зависимости от mode.
 
@@ -746,12 +991,14 @@ def register_expense_handlers(
                 )
                 return
 
-            op_id = expense_svc.create_transfer(
-                group_id=group_id, 
+            op_id = await asyncio.to_thread(
+                expense_svc.create_transfer,
+                group_id=group_id,
                 from_user_id=user_id,
                 to_user_id=transfer_target_id,
                 comment=comment,
-                amount=amount,
+                amount_cents=amount_cents,
+                idempotency_key=idempotency_key,
             )
         else:
             if not group_id or not category:
@@ -762,15 +1009,29 @@ def register_expense_handlers(
                 )
                 return
 
-            op_id = expense_svc.create_expense_for_all(
+            # Участники уже известны из фоновой загрузки —
+            # сервис не будет повторно читать лист userGroups
+            member_ids = await _dialog_members(dialog_key, state, group_id)
+
+            op_id = await asyncio.to_thread(
+                expense_svc.create_expense_for_all,
                 user_id=user_id,
                 group_id=group_id,
                 category=category,
                 comment=comment,
-                amount=amount,
+                amount_cents=amount_cents,
+                member_ids=member_ids,
+                idempotency_key=idempotency_key,
             )
 
-
+        # Баланс после операции = баланс до неё (загружен в фоне) + её эффект
+        balance_text = ""
+        if balances is not None and user_id in balances:
+            new_balance = balances[user_id] + amount_cents
+            if mode != "transfer" and user_id in member_ids:
+                new_balance -= split_cents(amount_cents, member_ids)[user_id]
+            balance_text = f"\nБаланс после операции: {format_money(new_balance)}"
+        prefetcher.drop(dialog_key)
 
         # ---------- ЛОГИРОВАНИЕ В КАНАЛ ----------  #
         # Формируем человекочитаемый текст операции со всеми атрибутами.
@@ -795,7 +1056,7 @@ def register_expense_handlers(
             f"Группа: {group_id}\n"
             f"Категория: {log_category}\n"
             f"Комментарий: {comment or '—'}\n"
-            f"Сумма: {amount}\n"
+            f"Сумма: {format_money(amount_cents)}\n"
         )
 
         # Отправляем сообщение в канал логов.
@@ -816,7 +1077,7 @@ def register_expense_handlers(
         )
 
         await message.answer(
-            result_text + f"ID операции: <code>{op_id}</code>",
+            result_text + f"ID операции: <code>{op_id}</code>" + balance_text,
             reply_markup=ReplyKeyboardRemove(),
         )
     
@@ -833,30 +1094,111 @@ def register_expense_handlers(
         """
         Обработчик выбора отчёта 'Баланс'.
 
-        1. Определяем текущую группу пользователя.
-        2. Запрашиваем отчёт у ReportService.
-        3. Отправляем текст пользователю.
+        1. Сразу отвечаем на callback, чтобы у кнопки не висели "часики".
+        2. Определяем текущую группу пользователя.
+        3. Отправляем заглушку и считаем отчёт в фоне,
+           затем подставляем текст отчёта в заглушку.
         """
+        await callback.answer()
         user_id = str(callback.from_user.id)
 
         # Текущая группа по userGroups
-        link = user_groups_svc.user_group_repo.get_by_user_id(user_id)
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        if link is None:
+            await state.clear()
+            await callback.message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        group_id = link.group_id
+
+        # Одинаковые запросы баланса группы считаются один раз
+        placeholder = await callback.message.answer(REPORT_PLACEHOLDER_TEXT)
+        report_jobs.deliver(
+            placeholder,
+            ("balance", group_id),
+            report_svc.format_balance_report,
+            group_id,
+        )
+
+    @dp.callback_query(F.data == "report:settle")
+    async def process_report_settle(callback: CallbackQuery, state: FSMContext):
+        """
+        Отчёт "Как рассчитаться": минимальный набор передач по балансам
+        группы и кнопки, которые сразу открывают диалог передачи.
+        """
+        await callback.answer()
+        user_id = str(callback.from_user.id)
+
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
         if link is None:
             await state.clear()
             await callback.message.answer(
                 "Вы ещё не выбрали группу.\n"
                 "Сначала используйте команду /start и выберите или создайте группу.",
             )
-            await callback.answer()
             return
 
         group_id = link.group_id
+        placeholder = await callback.message.answer(REPORT_PLACEHOLDER_TEXT)
+        # Одинаковые запросы плана группы считаются один раз
+        job = report_jobs.submit(("settle", group_id), report_svc.build_settle_report, group_id)
+        try:
+            report_text, plan, names = await asyncio.shield(job)
+        except Exception:
+            logger.exception("Settle report failed")
+            await placeholder.edit_text("Не удалось построить отчёт. Попробуйте ещё раз позже.")
+            return
 
-        # Получаем уже отформатированный текст отчёта
-        report_text = report_svc.format_balance_report(group_id)
+        await placeholder.edit_text(
+            html.escape(report_text),
+            reply_markup=_settle_keyboard(plan, user_id, names),
+        )
 
-        await callback.message.answer(report_text)
+    @dp.callback_query(F.data.startswith("settle:"))
+    async def process_settle_transfer(callback: CallbackQuery, state: FSMContext):
+        """
+        Кнопка из отчёта "Как рассчитаться": открываем диалог передачи
+        сразу на шаге ввода суммы — получатель и комментарий уже
+        заполнены, рекомендованная сумма предложена кнопкой.
+        """
         await callback.answer()
+        _, target_user_id, cents_str = callback.data.split(":", 2)
+        user_id = str(callback.from_user.id)
+
+        group = await asyncio.to_thread(user_groups_svc.get_current_user_group, user_id)
+        if group is None:
+            await state.clear()
+            await callback.message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        await state.set_data(
+            {
+                "group_id": group.id,
+                "mode": "transfer",
+                "transfer_target_id": target_user_id,
+                "comment": SETTLE_COMMENT,
+            }
+        )
+        # Баланс до операции нужен для ответа "Баланс после операции"
+        prefetcher.start((callback.message.chat.id, user_id), group.id)
+        await state.set_state(ExpenseStates.EXPENSE_AMOUNT)
+
+        amount_text = format_money(int(cents_str))
+        await callback.message.answer(
+            f"Передача по плану взаиморасчёта: {amount_text}.\n"
+            "Нажмите кнопку с суммой или введите другую:",
+            reply_markup=ReplyKeyboardMarkup(
+                keyboard=[[KeyboardButton(text=amount_text)]],
+                resize_keyboard=True,
+                one_time_keyboard=True,
+            ),
+        )
 
     @dp.callback_query(F.data == "report:by_category")
     async def process_report_by_category_menu(callback: CallbackQuery, state: FSMContext):
@@ -871,32 +1213,85 @@ def register_expense_handlers(
         )
         await callback.answer()
 
+    @dp.callback_query(F.data == "report:by_person")
+    async def process_report_by_person_menu(callback: CallbackQuery, state: FSMContext):
+        """
+        Пользователь выбрал отчёт "Затраты по участникам".
+        Меню периодов то же, что у отчёта по категориям;
+        какой отчёт строить по выбранному периоду, запоминаем в FSM.
+        """
+        await state.clear()
+        await state.update_data(period_report="by_person")
+        await callback.message.answer(
+            "Выберите период для отчёта по участникам:",
+            reply_markup=_period_menu_keyboard(),
+        )
+        await callback.answer()
+
+    @dp.callback_query(F.data == "report:trend")
+    async def process_report_trend(callback: CallbackQuery, state: FSMContext):
+        """
+        Отчёт "Динамика по месяцам" (по кубу расходов, без выбора периода).
+        """
+        await callback.answer()
+        user_id = str(callback.from_user.id)
+
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        if link is None:
+            await state.clear()
+            await callback.message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        group_id = link.group_id
+
+        placeholder = await callback.message.answer(REPORT_PLACEHOLDER_TEXT)
+        report_jobs.deliver(
+            placeholder,
+            ("trend", group_id),
+            report_svc.format_month_trend_report,
+            group_id,
+        )
+
     @dp.callback_query(F.data.in_({value for value in PeriodChoice}))
     async def process_report_by_category(callback: CallbackQuery, state: FSMContext):
         """
-        Обрабатывает выбор периода и вызывает сервис отчётов.
+        Обрабатывает выбор периода и вызывает сервис отчётов
+        (по категориям или, если так запомнено в FSM, по участникам).
+
+        Отчёт за год по большому листу считается долго, поэтому
+        отвечаем на callback сразу, а отчёт строим в фоне.
         """
+        await callback.answer()
         user_id = str(callback.from_user.id)
+        period_report = (await state.get_data()).get("period_report", "by_category")
 
         # Определяем текущую группу пользователя
-        link = user_groups_svc.user_group_repo.get_by_user_id(user_id)
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
         if link is None:
             await state.clear()
             await callback.message.answer(
                 "Вы ещё не выбрали группу.\n"
                 "Сначала используйте команду /start и выберите или создайте группу.",
             )
-            await callback.answer()
             return
 
         group_id = link.group_id
 
         period_code = callback.data  # одно из значений PeriodChoice
-        # Просим сервис отчётов сформировать текст
-        report_text = report_svc.format_category_expense_report(
-            group_id=group_id,
-            period_code=period_code,
+        # Просим сервис отчётов сформировать текст (в фоне, с дедупликацией
+        # одинаковых запросов: та же группа и тот же период)
+        if period_report == "by_person":
+            report_func = report_svc.format_person_expense_report
+        else:
+            report_func = report_svc.format_category_expense_report
+        placeholder = await callback.message.answer(REPORT_PLACEHOLDER_TEXT)
+        report_jobs.deliver(
+            placeholder,
+            (period_report, group_id, period_code),
+            report_func,
+            group_id,
+            period_code,
         )
-
-        await callback.message.answer(report_text)
-        await callback.answer()
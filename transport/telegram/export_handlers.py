@@ -0,0 +1,122 @@
+# transport/telegram/export_handlers.py
+
+import asyncio
+import tempfile
+
+from aiogram import Dispatcher, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from application.usecases.exports import (
+    EXPORT_FORMATS,
+    EXPORT_PERIOD_ALL,
+    LedgerExportService,
+)
+from application.usecases.reports import ReportPeriod
+from application.usecases.user_groups import UserGroupsService
+from config.settings import EXPORT_SPOOL_MAX_BYTES
+from transport.telegram.files import SpooledInputFile
+
+
+# Подписи периодов выгрузки (те же, что у отчёта по категориям, плюс "всё время")
+EXPORT_PERIOD_TITLES = {
+    ReportPeriod.CURRENT_MONTH: "Текущий месяц",
+    ReportPeriod.PREV_MONTH: "Прошлый месяц",
+    ReportPeriod.CURRENT_QUARTER: "Текущий квартал",
+    ReportPeriod.PREV_QUARTER: "Прошлый квартал",
+    ReportPeriod.CURRENT_YEAR: "Текущий год",
+    ReportPeriod.PREV_YEAR: "Прошлый год",
+    EXPORT_PERIOD_ALL: "Всё время",
+}
+
+
+def _export_period_keyboard(fmt: str) -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора периода выгрузки.
+    callback_data: "export:<формат>:<код периода>".
+    """
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=title, callback_data=f"export:{fmt}:{code}")]
+            for code, title in EXPORT_PERIOD_TITLES.items()
+        ]
+    )
+
+
+def register_export_handlers(
+    dp: Dispatcher,
+    user_groups_svc: UserGroupsService,
+    export_svc: LedgerExportService,
+) -> None:
+    """
+    Регистрирует команду /export — выгрузку журнала группы файлом.
+
+    Параметры:
+    - dp: Dispatcher aiogram.
+    - user_groups_svc: сервис, который знает, к какой группе привязан пользователь.
+    - export_svc: сервис выгрузки журнала.
+    """
+
+    @dp.message(Command("export"))
+    async def cmd_export(message: Message, command: CommandObject):
+        """
+        /export [csv|xlsx|json] — спросить период и прислать файл.
+        Формат по умолчанию — csv.
+        """
+        fmt = (command.args or "csv").strip().lower()
+        if fmt not in EXPORT_FORMATS:
+            await message.answer(
+                f"Неизвестный формат '{fmt}'. Доступны: {', '.join(EXPORT_FORMATS)}.\n"
+                "Например: /export xlsx"
+            )
+            return
+
+        await message.answer(
+            "Выберите период выгрузки:",
+            reply_markup=_export_period_keyboard(fmt),
+        )
+
+    @dp.callback_query(F.data.startswith("export:"))
+    async def process_export(callback: CallbackQuery):
+        """
+        Строим файл выгрузки и отправляем его документом.
+
+        Файл пишется во SpooledTemporaryFile: небольшие выгрузки
+        остаются в памяти, большие уходят на диск, так что память
+        не растёт вместе с историей группы.
+        """
+        await callback.answer()
+        _, fmt, period_code = callback.data.split(":", 2)
+        user_id = str(callback.from_user.id)
+
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        if link is None:
+            await callback.message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        group_id = link.group_id
+        period_name = period_code.removeprefix("period:")
+        filename = f"ledger_{group_id}_{period_name}.{fmt}"
+
+        await callback.message.answer("Готовлю выгрузку…")
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as buffer:
+            try:
+                await asyncio.to_thread(
+                    export_svc.write_export, group_id, period_code, fmt, buffer
+                )
+            except ValueError as e:
+                await callback.message.answer(str(e))
+                return
+
+            await callback.message.answer_document(
+                SpooledInputFile(buffer, filename=filename),
+                caption=f"Журнал группы {group_id}: {EXPORT_PERIOD_TITLES.get(period_code, period_name)}",
+            )
@@ -0,0 +1,27 @@
+# transport/telegram/files.py
+
+import asyncio
+from typing import IO, AsyncGenerator
+
+from aiogram import Bot
+from aiogram.types import InputFile
+
+
+class SpooledInputFile(InputFile):
+    """
+    Отправка файла из открытого бинарного потока
+    (например, tempfile.SpooledTemporaryFile) без чтения целиком в память.
+
+    Поток читается с начала кусками по chunk_size в отдельном потоке,
+    т.к. после переноса на диск это обычное блокирующее чтение.
+    Закрывает поток вызывающий код — после отправки.
+    """
+
+    def __init__(self, stream: IO[bytes], filename: str, chunk_size: int = 64 * 1024) -> None:
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.stream = stream
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        await asyncio.to_thread(self.stream.seek, 0)
+        while chunk := await asyncio.to_thread(self.stream.read, self.chunk_size):
+            yield chunk
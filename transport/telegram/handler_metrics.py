@@ -0,0 +1,97 @@
+# transport/telegram/handler_metrics.py
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Router
+from aiogram.filters import Command
+from aiogram.types import BotCommand, CallbackQuery, Message, TelegramObject
+
+from common.metrics import metrics
+
+
+HANDLER_SECONDS = metrics.histogram(
+    "handler_seconds",
+    "Длительность обработки апдейта хэндлером",
+    ("kind", "name"),
+)
+HANDLER_ERRORS = metrics.counter(
+    "handler_errors_total",
+    "Хэндлеры, завершившиеся исключением",
+    ("kind", "name"),
+)
+
+# Префиксы callback_data кнопок бота (до первого ":"). Остальные
+# callback-и попадают в метку "other" — значения меток не задаёт клиент
+CALLBACK_PREFIXES = frozenset({
+    "op_expense", "op_transfer", "mode_all", "mode_selective",
+    "cat", "person", "trg", "period", "report", "settle",
+    "export", "find", "hist",
+})
+
+# Команды, для которых зарегистрированы хэндлеры (register_known_commands)
+_known_commands: set[str] = set()
+
+
+def register_known_commands(router: Router) -> None:
+    """
+    Запомнить команды из фильтров Command всех хэндлеров сообщений
+    router и вложенных роутеров. Вызывается после регистрации хэндлеров.
+    """
+    for sub_router in router.chain_tail:
+        for handler in sub_router.message.handlers:
+            for flt in handler.filters or ():
+                if not isinstance(flt.callback, Command):
+                    continue
+                for command in flt.callback.commands:
+                    if isinstance(command, BotCommand):
+                        command = command.command
+                    if isinstance(command, str):
+                        _known_commands.add(command)
+
+
+def handler_name(event: TelegramObject) -> tuple[str, str]:
+    """
+    Вид и короткое имя апдейта для меток: команда сообщения ("/report")
+    или префикс callback_data до первого ":" ("report", "find").
+    Незнакомые команды и префиксы, свободный текст и числа в метки
+    не попадают (метка "other"), иначе пользователи могли бы создавать
+    сколько угодно рядов метрик.
+    """
+    if isinstance(event, Message):
+        text = event.text or ""
+        if text.startswith("/"):
+            command = text.split(maxsplit=1)[0][1:].split("@", 1)[0]
+            return "message", f"/{command}" if command in _known_commands else "other"
+        return "message", "text" if text else "other"
+    if isinstance(event, CallbackQuery):
+        prefix = (event.data or "").split(":", 1)[0]
+        return "callback", prefix if prefix in CALLBACK_PREFIXES else "other"
+    return type(event).__name__.lower(), "other"
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware на message и callback_query: время хэндлера
+    (handler_seconds) и число упавших хэндлеров (handler_errors_total).
+
+    Регистрируется в main.py:
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.callback_query.middleware(HandlerMetricsMiddleware())
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind, name = handler_name(event)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(kind=kind, name=name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, kind=kind, name=name)
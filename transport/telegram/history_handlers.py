@@ -0,0 +1,112 @@
+# transport/telegram/history_handlers.py
+
+import asyncio
+
+from aiogram import Dispatcher, F
+from aiogram.filters import Command
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from application.usecases.history import OperationHistoryService
+from application.usecases.user_groups import UserGroupsService
+from domain.models.expenses import OperationPage
+from transport.telegram.search_handlers import format_operation_entry
+
+
+# Сколько операций на одной странице /history
+HISTORY_PAGE_SIZE = 10
+
+
+def _format_history(page: OperationPage, names: dict[str, str]) -> str:
+    if not page.items:
+        return "В журнале группы пока нет операций."
+
+    lines = ["Журнал операций группы (от новых к старым):"]
+    for _, op in page.items:
+        lines.append("")
+        lines.append(format_operation_entry(op, names))
+    return "\n".join(lines)
+
+
+def _history_keyboard(page: OperationPage) -> InlineKeyboardMarkup | None:
+    """
+    Кнопки листания. Курсор — номер строки в callback_data:
+    "hist:older:<строка>" — операции до неё, "hist:newer:<строка>" — после неё.
+    """
+    if not page.items:
+        return None
+    newest_row = page.items[0][0]
+    oldest_row = page.items[-1][0]
+
+    buttons: list[InlineKeyboardButton] = []
+    if page.has_newer:
+        buttons.append(InlineKeyboardButton(text="« Назад", callback_data=f"hist:newer:{newest_row}"))
+    if page.has_older:
+        buttons.append(InlineKeyboardButton(text="Дальше »", callback_data=f"hist:older:{oldest_row}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+
+
+def register_history_handlers(
+    dp: Dispatcher,
+    user_groups_svc: UserGroupsService,
+    history_svc: OperationHistoryService,
+) -> None:
+    """
+    Регистрирует команду /history — журнал операций группы постранично.
+
+    Параметры:
+    - dp: Dispatcher aiogram.
+    - user_groups_svc: сервис, который знает, к какой группе привязан пользователь.
+    - history_svc: сервис журнала операций.
+    """
+
+    async def _current_group_id(user_id: str) -> str | None:
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        return link.group_id if link is not None else None
+
+    @dp.message(Command("history"))
+    async def cmd_history(message: Message):
+        """
+        /history — последние операции группы и кнопки "Дальше" / "Назад".
+        """
+        group_id = await _current_group_id(str(message.from_user.id))
+        if group_id is None:
+            await message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        page, names = await asyncio.to_thread(history_svc.page, group_id, HISTORY_PAGE_SIZE)
+        await message.answer(_format_history(page, names), reply_markup=_history_keyboard(page))
+
+    @dp.callback_query(F.data.startswith("hist:"))
+    async def process_history_page(callback: CallbackQuery):
+        """
+        Листание /history: следующая страница по курсору из callback_data.
+        Группа — текущая группа пользователя.
+        """
+        _, direction, row_str = callback.data.split(":", 2)
+        if direction not in ("older", "newer") or not row_str.isdigit():
+            await callback.answer()
+            return
+
+        group_id = await _current_group_id(str(callback.from_user.id))
+        if group_id is None:
+            await callback.answer("Вы ещё не выбрали группу.", show_alert=True)
+            return
+        await callback.answer()
+
+        row = int(row_str)
+        page, names = await asyncio.to_thread(
+            history_svc.page,
+            group_id,
+            HISTORY_PAGE_SIZE,
+            before_row=row if direction == "older" else None,
+            after_row=row if direction == "newer" else None,
+        )
+        await callback.message.edit_text(_format_history(page, names), reply_markup=_history_keyboard(page))
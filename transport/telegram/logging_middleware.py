@@ -0,0 +1,34 @@
+# transport/telegram/logging_middleware.py
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from common.logger import correlation_id
+
+
+class UpdateCorrelationMiddleware(BaseMiddleware):
+    """
+    Outer middleware на update: correlation id апдейта ("upd-<update_id>")
+    для всех записей лога, сделанных при его обработке, в том числе
+    из потоков asyncio.to_thread.
+
+    Регистрируется в main.py первым:
+        dp.update.outer_middleware(UpdateCorrelationMiddleware())
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        token = correlation_id.set(f"upd-{event.update_id}")
+        try:
+            return await handler(event, data)
+        finally:
+            correlation_id.reset(token)
@@ -0,0 +1,40 @@
+# transport/telegram/rate_limiter.py
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Ограничитель частоты вызовов: не больше rate_per_second в секунду,
+    равномерно (следующий вызов — не раньше чем через 1 / rate_per_second).
+
+    Использование:
+        await limiter.acquire()
+        await bot.send_message(...)
+
+    Если Telegram всё же ответил "слишком часто" (RetryAfter),
+    pause(seconds) сдвигает все следующие вызовы.
+    """
+
+    def __init__(self, rate_per_second: float) -> None:
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second должен быть больше нуля.")
+        self.interval = 1.0 / rate_per_second
+        # момент (time.monotonic), раньше которого следующий вызов не начнётся
+        self._next_at = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        # Слот занимаем сразу, до ожидания: параллельные вызовы
+        # получают следующие слоты, а не один и тот же
+        start_at = max(now, self._next_at)
+        self._next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Не начинать новые вызовы ещё seconds секунд.
+        """
+        self._next_at = max(self._next_at, time.monotonic() + seconds)
@@ -1,5 +1,6 @@
 # transport/telegram/registration_handlers.py
 
+import asyncio
 from enum import IntEnum
 
 from aiogram import Dispatcher, F
@@ -69,6 +70,12 @@ def register_registration_handlers(dp: Dispatcher, svc: UserGroupsService) -> No
             "/change_group - сменить текущую группу (создать новую или присоединиться к существующей).\n"
             "/leave_group - выйти из текущей группы.\n"
             "/operation - ввод данных о затратах и передачах.\n"
+            "/e - быстрый ввод затрат за всех: /e 1500 Реклама таргет VK (можно несколько строк).\n"
+            "/undo - отменить свою последнюю операцию.\n"
+            "/cancel ID - отменить операцию группы по её ID.\n"
+            "/export [csv|xlsx|json] - выгрузить операции группы файлом за выбранный период.\n"
+            "/find СЛОВА - найти операции группы по словам из комментария или категории.\n"
+            "/history - журнал операций группы, от новых к старым.\n"
             "/help - показать это справочное сообщение.\n"
         )
 
@@ -84,7 +91,7 @@ def register_registration_handlers(dp: Dispatcher, svc: UserGroupsService) -> No
         """
         user_id = str(message.from_user.id)
 
-        current_group = svc.get_current_user_group(user_id)
+        current_group = await asyncio.to_thread(svc.get_current_user_group, user_id)
 
         if current_group is not None:
             await state.clear()
@@ -133,12 +140,14 @@ def register_registration_handlers(dp: Dispatcher, svc: UserGroupsService) -> No
             # Генерируем случайный ID группы, пока не найдём свободный
             while True:
                 group_id = generate_group_id(6)
-                if not svc.group_repo.exists(group_id):
+                if not await asyncio.to_thread(svc.group_repo.exists, group_id):
                     break
 
             # Создаём группу и привязываем к ней пользователя,
             # одновременно регистрируя его в листе users (внутри сервиса)
-            group = svc.create_group_and_assign(user_id, group_id, user_name)
+            group = await asyncio.to_thread(
+                svc.create_group_and_assign, user_id, group_id, user_name
+            )
             
             # ========== БЛОК ЛОГИРОВАНИЯ ==========
             # Формируем сообщение для лога
@@ -197,9 +206,9 @@ def register_registration_handlers(dp: Dispatcher, svc: UserGroupsService) -> No
         user_name = message.from_user.full_name  # или message.from_user.username
         
         # Проверяем, была ли у пользователя старая группа
-        old_group = svc.get_current_user_group(user_id)
+        old_group = await asyncio.to_thread(svc.get_current_user_group, user_id)
 
-        joined = svc.join_group(user_id, group_id, user_name)
+        joined = await asyncio.to_thread(svc.join_group, user_id, group_id, user_name)
         if not joined:
             await message.answer(
                 "Группа с таким ID не найдена. "
@@ -251,7 +260,7 @@ def register_registration_handlers(dp: Dispatcher, svc: UserGroupsService) -> No
         # На всякий случай сбрасываем состояние диалога
         await state.clear()
 
-        left = svc.leave_group(user_id)
+        left = await asyncio.to_thread(svc.leave_group, user_id)
         if not left:
             await message.answer(
                 "Вы и так не привязаны ни к одной группе.",
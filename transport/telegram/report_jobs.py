@@ -0,0 +1,122 @@
+# transport/telegram/report_jobs.py
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List
+
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message
+
+from common.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Текст-заглушка, которую видит пользователь, пока отчёт считается
+REPORT_PLACEHOLDER_TEXT = "Считаю…"
+
+# Максимальная длина текста одного сообщения Telegram
+TELEGRAM_TEXT_LIMIT = 4096
+
+
+def split_text(text: str, limit: int = TELEGRAM_TEXT_LIMIT) -> List[str]:
+    """
+    Разбить текст на части не длиннее limit — по границам строк
+    (слишком длинная строка режется как есть).
+    """
+    chunks: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            candidate = line
+        current = candidate
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+class ReportJobs:
+    """
+    Фоновое построение отчётов.
+
+    Хэндлер сразу отвечает на callback и отправляет заглушку "Считаю…",
+    а отчёт считается в фоне (в потоке, т.к. сервис отчётов блокирующий)
+    и затем подставляется в ту же заглушку через edit_text.
+    Если заглушку отредактировать нельзя (её удалили и т.п.), отчёт
+    приходит новым сообщением; длинный отчёт делится на несколько.
+
+    Одинаковые запросы, которые пришли, пока отчёт ещё считается
+    (например, ("by_category", group_id, period)), не запускают
+    повторный расчёт — они ждут результат уже запущенной задачи.
+    """
+
+    def __init__(self) -> None:
+        # ключ запроса -> задача расчёта, которая ещё не завершилась
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        # задачи доставки результата; держим ссылки, чтобы их не собрал GC
+        self._deliveries: set[asyncio.Task] = set()
+
+    def in_flight_count(self) -> int:
+        """
+        Сколько разных отчётов считается прямо сейчас.
+        """
+        return len(self._in_flight)
+
+    def submit(self, key: Hashable, func: Callable[..., str], *args: Any) -> asyncio.Task:
+        """
+        Запустить расчёт отчёта или присоединиться к уже идущему с тем же ключом.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(func, *args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    def deliver(
+        self,
+        placeholder: Message,
+        key: Hashable,
+        func: Callable[..., str],
+        *args: Any,
+    ) -> None:
+        """
+        Посчитать отчёт в фоне и заменить им текст сообщения-заглушки.
+        """
+        job = self.submit(key, func, *args)
+        delivery = asyncio.create_task(self._edit_when_ready(placeholder, job))
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+
+    async def _edit_when_ready(self, placeholder: Message, job: asyncio.Task) -> None:
+        try:
+            # shield: отмена одной доставки не должна отменять общий расчёт
+            report_text = await asyncio.shield(job)
+        except Exception:
+            logger.exception("Report job failed")
+            report_text = "Не удалось построить отчёт. Попробуйте ещё раз позже."
+
+        chunks = split_text(report_text)
+        rest = chunks[1:]
+        try:
+            await placeholder.edit_text(chunks[0])
+        except TelegramAPIError as e:
+            if "message is not modified" not in str(e):
+                # Заглушку удалили, чат недоступен и т.п. — отправим отчёт заново
+                logger.warning("Report placeholder not edited: %r", e)
+                rest = chunks
+
+        for chunk in rest:
+            try:
+                await placeholder.answer(chunk)
+            except TelegramAPIError as e:
+                logger.warning("Report not delivered: %r", e)
+                return
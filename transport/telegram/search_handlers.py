@@ -0,0 +1,162 @@
+# transport/telegram/search_handlers.py
+
+import asyncio
+import hashlib
+import html
+from collections import OrderedDict
+
+from aiogram import Dispatcher, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from application.usecases.search import OperationSearchService, SearchPage
+from application.usecases.user_groups import UserGroupsService
+from common.money import format_money
+from domain.models.expenses import Operation
+
+
+# Сколько операций на одной странице результатов /find
+FIND_PAGE_SIZE = 10
+
+# Сколько последних запросов помним для кнопок листания
+FIND_MAX_QUERIES = 1000
+
+
+def _query_key(group_id: str, query: str) -> str:
+    """
+    Короткий ключ запроса для callback_data (сам запрос может не влезть в 64 байта).
+    """
+    return hashlib.sha1(f"{group_id}\n{query}".encode("utf-8")).hexdigest()[:12]
+
+
+def format_operation_entry(op: Operation, names: dict[str, str]) -> str:
+    """
+    Операция для списков (/find, /history): дата, автор, сумма,
+    категория, комментарий и ID (HTML).
+    """
+    name = names.get(op.person_id) or f"Пользователь {op.person_id}"
+    description = f"{format_money(op.amount_cents)} — {op.category}" + (
+        f" ({op.comment})" if op.comment else ""
+    )
+    status = "" if op.active else " [отменена]"
+    return (
+        f"{op.date:%d.%m.%Y}, {html.escape(name)}: {html.escape(description)}{status}\n"
+        f"ID: <code>{op.id}</code>"
+    )
+
+
+def _format_page(query: str, page: SearchPage) -> str:
+    if not page.total:
+        return f"По запросу «{html.escape(query)}» ничего не найдено."
+
+    first = page.offset + 1
+    last = page.offset + len(page.operations)
+    lines = [f"Найдено по запросу «{html.escape(query)}»: {page.total} (показаны {first}–{last})"]
+    for number, op in enumerate(page.operations, start=first):
+        lines.append("")
+        lines.append(f"{number}. {format_operation_entry(op, page.names)}")
+    return "\n".join(lines)
+
+
+def _page_keyboard(key: str, page: SearchPage) -> InlineKeyboardMarkup | None:
+    """
+    Кнопки листания. callback_data: "find:<ключ запроса>:<offset>".
+    """
+    buttons: list[InlineKeyboardButton] = []
+    if page.offset > 0:
+        buttons.append(
+            InlineKeyboardButton(
+                text="« Новее",
+                callback_data=f"find:{key}:{max(0, page.offset - FIND_PAGE_SIZE)}",
+            )
+        )
+    if page.offset + len(page.operations) < page.total:
+        buttons.append(
+            InlineKeyboardButton(
+                text="Старше »",
+                callback_data=f"find:{key}:{page.offset + FIND_PAGE_SIZE}",
+            )
+        )
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+
+
+def register_search_handlers(
+    dp: Dispatcher,
+    user_groups_svc: UserGroupsService,
+    search_svc: OperationSearchService,
+) -> None:
+    """
+    Регистрирует команду /find — поиск операций группы по словам
+    из комментария и категории.
+
+    Параметры:
+    - dp: Dispatcher aiogram.
+    - user_groups_svc: сервис, который знает, к какой группе привязан пользователь.
+    - search_svc: сервис поиска операций.
+    """
+
+    # ключ запроса -> (группа, запрос); старые запросы забываются
+    queries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+
+    def remember(group_id: str, query: str) -> str:
+        key = _query_key(group_id, query)
+        queries[key] = (group_id, query)
+        queries.move_to_end(key)
+        while len(queries) > FIND_MAX_QUERIES:
+            queries.popitem(last=False)
+        return key
+
+    @dp.message(Command("find"))
+    async def cmd_find(message: Message, command: CommandObject):
+        """
+        /find <слова> — операции группы, где в комментарии или категории
+        есть все слова (можно начало слова: "студ" найдёт "студия").
+        """
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer(
+                "Формат: /find СЛОВА\n"
+                "Например: /find студия"
+            )
+            return
+
+        user_id = str(message.from_user.id)
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        if link is None:
+            await message.answer(
+                "Вы ещё не выбрали группу.\n"
+                "Сначала используйте команду /start и выберите или создайте группу.",
+            )
+            return
+
+        page = await asyncio.to_thread(search_svc.find, link.group_id, query, 0, FIND_PAGE_SIZE)
+        key = remember(link.group_id, query)
+        await message.answer(_format_page(query, page), reply_markup=_page_keyboard(key, page))
+
+    @dp.callback_query(F.data.startswith("find:"))
+    async def process_find_page(callback: CallbackQuery):
+        """
+        Листание результатов /find: та же выборка с другим offset.
+        """
+        _, key, offset_str = callback.data.split(":", 2)
+        remembered = queries.get(key)
+        if remembered is None or not offset_str.isdigit():
+            await callback.answer("Результаты поиска устарели, повторите /find.", show_alert=True)
+            return
+
+        group_id, query = remembered
+        user_id = str(callback.from_user.id)
+        link = await asyncio.to_thread(user_groups_svc.user_group_repo.get_by_user_id, user_id)
+        if link is None or link.group_id.strip().upper() != group_id.strip().upper():
+            # С тех пор пользователь сменил группу
+            await callback.answer("Результаты поиска устарели, повторите /find.", show_alert=True)
+            return
+        await callback.answer()
+
+        page = await asyncio.to_thread(search_svc.find, group_id, query, int(offset_str), FIND_PAGE_SIZE)
+        await callback.message.edit_text(_format_page(query, page), reply_markup=_page_keyboard(key, page))
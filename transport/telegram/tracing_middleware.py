@@ -0,0 +1,43 @@
+# transport/telegram/tracing_middleware.py
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from common.tracing import tracer
+from transport.telegram.handler_metrics import handler_name
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """
+    Outer middleware на update: каждый апдейт — корневой span трассы
+    ("update /operation_for", "update report" и т.п.). Вложенные span'ы
+    открывают сервисы, репозитории и HTTP-запросы к Sheets.
+
+    Регистрируется в main.py первым, до планировщика апдейтов,
+    чтобы в трассу попало и ожидание в очереди пользователя:
+        dp.update.outer_middleware(UpdateTracingMiddleware())
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not tracer.enabled or not isinstance(event, Update):
+            return await handler(event, data)
+
+        inner = event.message or event.callback_query
+        kind, name = handler_name(inner) if inner is not None else (event.event_type, "other")
+        user = data.get("event_from_user")
+        with tracer.root_span(
+            f"update {name}",
+            **{
+                "update.id": event.update_id,
+                "update.kind": kind,
+                "user.id": user.id if user is not None else 0,
+            },
+        ):
+            return await handler(event, data)
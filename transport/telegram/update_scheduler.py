@@ -0,0 +1,98 @@
+# transport/telegram/update_scheduler.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+
+class UserUpdateScheduler(BaseMiddleware):
+    """
+    Планировщик апдейтов на уровне Dispatcher (outer middleware на update).
+
+    Правила:
+    - апдейты одного пользователя выполняются строго по очереди
+      (в порядке поступления), чтобы не гонять FSM-переходы наперегонки;
+    - апдейты разных пользователей выполняются параллельно,
+      но не больше max_concurrency одновременно;
+    - если у пользователя в очереди уже max_queue_per_user апдейтов,
+      новые отбрасываются (backpressure);
+    - повторное нажатие той же inline-кнопки, пока первое ещё
+      в очереди или выполняется, отбрасывается (двойной тап).
+
+    Регистрируется в main.py:
+        dp.update.outer_middleware(UserUpdateScheduler(...))
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_per_user: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue_per_user = max_queue_per_user
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # user_id -> замок, по которому выстраивается очередь пользователя
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+        # user_id -> сколько апдейтов сейчас ждут или выполняются
+        self._queue_sizes: Dict[int, int] = {}
+        # (user_id, message_id, callback_data) нажатий, которые ещё не обработаны
+        self._pending_callbacks: set[Tuple[int, int, str]] = set()
+
+    def queue_size(self, user_id: int) -> int:
+        """
+        Длина очереди пользователя (включая апдейт, который выполняется сейчас).
+        """
+        return self._queue_sizes.get(user_id, 0)
+
+    def queue_sizes(self) -> Dict[int, int]:
+        """
+        Длины очередей всех пользователей, у которых есть необработанные апдейты.
+        """
+        return dict(self._queue_sizes)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or not isinstance(event, Update):
+            # Апдейты без пользователя (посты в каналах и т.п.) не упорядочиваем
+            return await handler(event, data)
+
+        user_id = user.id
+        callback = event.callback_query
+
+        callback_key: Optional[Tuple[int, int, str]] = None
+        if callback is not None:
+            message_id = callback.message.message_id if callback.message else 0
+            callback_key = (user_id, message_id, callback.data or "")
+            if callback_key in self._pending_callbacks:
+                # Двойное нажатие: первое ещё обрабатывается — второе гасим
+                await callback.answer()
+                return None
+
+        if self.queue_size(user_id) >= self.max_queue_per_user:
+            # Очередь пользователя переполнена — отбрасываем апдейт
+            if callback is not None:
+                await callback.answer("Подождите, обрабатываю предыдущие действия…")
+            return None
+
+        if callback_key is not None:
+            self._pending_callbacks.add(callback_key)
+        self._queue_sizes[user_id] = self.queue_size(user_id) + 1
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+
+        try:
+            # Сначала ждём своей очереди, и только потом занимаем общий слот,
+            # чтобы ожидающие апдейты не держали слоты других пользователей
+            async with lock:
+                async with self._semaphore:
+                    return await handler(event, data)
+        finally:
+            if callback_key is not None:
+                self._pending_callbacks.discard(callback_key)
+            self._queue_sizes[user_id] -= 1
+            if self._queue_sizes[user_id] == 0:
+                del self._queue_sizes[user_id]
+                del self._user_locks[user_id]